@@ -1,7 +1,12 @@
 import os
 import toml
 from panda3d.core import Vec3
-from script_loader import load_script
+from script_loader import load_script, register_instance
+from scene_streamer import SceneStreamer, entity_files_in_folder
+from model_cache import ModelCache
+from model_import import resolve_converted
+from entity_registry import EntityRegistry
+from behavior_schema import schema_for
 from twisted.internet.protocol import DatagramProtocol
 from twisted.internet import reactor
 
@@ -44,9 +49,19 @@ class Entity:
             print(f"No model specified for entity '{self.name}'")
             return
 
-        self.node = loader.loadModel(os.path.relpath(self.entity_model))
+        # Entities sharing a model file share one cached prototype (instanced).
+        self.attach(render, ModelCache.shared(loader).get(resolve_converted(self.entity_model)))
+
+    def attach(self, render, model):
+        """Sets up an already loaded model as this entity's node and starts its behaviors."""
+        if model is None:
+            print(f"Model '{self.entity_model}' failed to load for entity '{self.name}'")
+            return
+
+        self.node = model
         self.node.setName(self.name)
         self.node.set_python_tag("id", self.entity_id)
+        EntityRegistry.shared().register(self.node)
 
         pos = Vec3(*self.transform.get("position", {"x": 0.0, "y": 0.0, "z": 0.0}).values())
         hpr = Vec3(*self.transform.get("rotation", {"h": 0.0, "p": 0.0, "r": 0.0}).values())
@@ -72,13 +87,12 @@ class Entity:
                     behavior_class = getattr(module, class_name)
                     instance = behavior_class(self.node, self.network_manager, self.input_manager) if self.network_manager else behavior_class(self.node, self.input_manager)
                     instance.node = self.node
+                    register_instance(script_path, instance)
                     
-                    # Auto-register public variables with defined sync categories
-                    for attr in dir(instance):
-                        if not attr.startswith("_") and not callable(getattr(instance, attr)):
-                            sync_category = getattr(instance, f"_{attr}_sync", "private")
-                            if self.network_manager and sync_category == "shared":
-                                self.network_manager.register_behavior(instance)
+                    # Built once per class, before saved properties change the field types
+                    schema = schema_for(instance)
+                    if self.network_manager and schema.shared_of(instance):
+                        self.network_manager.register_behavior(instance, schema)
                     
                     for key, value in script_properties.get(script_path, {}).items():
                         setattr(instance, key, value)
@@ -109,3 +123,26 @@ def load_all_entities_from_folder(folder_path, render, network_manager=None, inp
             if entity.node:
                 entities.append(entity)
     return entities
+
+
+def load_all_entities_from_folder_async(base, folder_path, render, network_manager=None, input_manager=None,
+                                        on_progress=None, on_done=None):
+    """
+    Streaming version of load_all_entities_from_folder: files are parsed on a thread
+    pool, models load asynchronously and entities are attached a batch per frame.
+    on_done receives the list of loaded entities.
+    """
+    def build_entity(data, model):
+        entity = Entity(data, input_manager, network_manager)
+        entity.attach(render, model)
+        return entity if entity.node else None
+
+    streamer = SceneStreamer(
+        base,
+        build_entity,
+        on_progress=on_progress,
+        on_done=on_done,
+        resolve_model_path=lambda model_path: os.path.relpath(resolve_converted(model_path)) if model_path else None,
+        model_cache=ModelCache.shared(base.loader),
+    )
+    return streamer.load_files(entity_files_in_folder(folder_path))
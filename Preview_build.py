@@ -4,14 +4,17 @@ import sys
 
 import toml
 from direct.showbase.ShowBase import ShowBase
-from Entity import load_all_entities_from_folder
+from Entity import load_all_entities_from_folder_async
+from static_batching import StaticBatcher
+from script_loader import watch_scripts
+from behavior_scheduler import BehaviorScheduler
 from input_manager import InputManager, NetworkManager  # Import InputManager & NetworkManager
 
 from twisted.internet.protocol import DatagramProtocol
 from twisted.internet import reactor
 
 class GamePreviewApp(ShowBase):
-    def __init__(self, network_manager=None):
+    def __init__(self, network_manager=None, tick_rate=60, max_catch_up=5):
         super().__init__()
         self.disableMouse()
         if network_manager is None:
@@ -28,16 +31,35 @@ class GamePreviewApp(ShowBase):
 
         # Load game content
         self.load_game_assets()
+        watch_scripts(self.taskMgr)  # Hot reload behavior scripts edited while the preview runs
+        # Gameplay runs at a fixed tick rate; rendering interpolates between ticks.
+        BehaviorScheduler.shared().set_fixed_step(tick_rate, max_catch_up)
+        # Distant and offscreen scripted entities update less often.
+        BehaviorScheduler.shared().set_update_lod(self.cam)
         
     def load_game_assets(self):
         """Load game content without editor references"""
         data_folder = "saves"
-        self.entities = load_all_entities_from_folder(
-            data_folder, 
+        self.entities = []
+        self.static_batcher = StaticBatcher(self.render)
+        # Entities stream in over the next frames instead of blocking startup.
+        self.entity_streamer = load_all_entities_from_folder_async(
+            self,
+            data_folder,
             self.render,      # Use THIS ShowBase's render
             self.network_manager,
-            self.input_manager
+            self.input_manager,
+            on_progress=self.on_load_progress,
+            on_done=self.on_entities_loaded,
         )
+
+    def on_entities_loaded(self, entities):
+        self.entities.extend(entities)
+        # Static set dressing is merged per spatial cell to cut draw calls.
+        self.static_batcher.build(self.entities)
+
+    def on_load_progress(self, loaded, total):
+        print(f"Loading entities... {loaded}/{total}")
         
 
     def setup_camera(self):
@@ -63,10 +85,15 @@ class GamePreviewApp(ShowBase):
 
     def recreate_entities(self):
         """Reload all entities when required (e.g., if settings change)."""
+        self.entity_streamer.cancel()
         for entity in self.entities:
-            entity.node.removeNode()
-        self.entities.clear()
-        self.entities = load_all_entities_from_folder("saves", self.render, self.network_manager, self.input_manager)
+            for behavior in entity.behavior_instances:
+                if hasattr(behavior, "destroy"):
+                    behavior.destroy()
+            if entity.node is not None:
+                entity.node.removeNode()
+        self.static_batcher.clear()
+        self.load_game_assets()
         
     
 
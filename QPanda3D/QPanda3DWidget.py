@@ -23,6 +23,8 @@ from QPanda3D.QPanda3D_Modifiers_Translation import QPanda3D_Modifier_translatio
 import builtins
 import os
 
+from model_import import ModelImporter
+
 __all__ = ["QPanda3DWidget"]
 
 panda_widgets = []
@@ -177,16 +179,30 @@ class QPanda3DWidget(QWidget):
             return
 
         
-        path = os.path.relpath(normalized_path)
+        # Text formats (.egg, .obj, ...) are converted to .bam once, on a worker process;
+        # the entity is pointed at the cached .bam so later loads skip parsing the source.
+        importer = ModelImporter.shared(self.panda3DWorld)
+        bam_path = importer.import_model(normalized_path, on_ready=lambda bam: self._use_converted_model(model, bam))
+        model_path = bam_path or normalized_path
+        path = os.path.relpath(model_path)
 
         # Reference self.panda3DWorld.render instead of the global render
         print("NORMALIZED PATH", normalized_path)
         model = self.panda3DWorld.loader.loadModel(path)
         if model:
-            model.set_python_tag("model_path", normalized_path)
+            model.set_python_tag("model_path", model_path)
             model.reparentTo(self.panda3DWorld.render)
             self.panda3DWorld.add_model(model)
             print(f"Model added to world: {normalized_path}")
+
+    def _use_converted_model(self, model, bam_path):
+        """Point an entity dropped before its conversion finished at the cached .bam."""
+        if model is None or model.is_empty():
+            return
+        model.set_python_tag("model_path", bam_path)
+        tracker = getattr(self.panda3DWorld, "dirty_tracker", None)
+        if tracker is not None:
+            tracker.mark_dirty(model, tracker.TAGS)
         
 
 
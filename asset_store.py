@@ -0,0 +1,136 @@
+# asset_store.py
+
+import hashlib
+import json
+import os
+import zlib
+
+STORE_DIR_NAME = ".store"
+MANIFEST_FORMAT = "p3d-manifest"
+MANIFEST_VERSION = 1
+
+
+class AssetStore:
+    """
+    Content-addressed blob store for a project (<project>/.store/objects).
+
+    Every blob is kept once, zlib compressed, under the SHA-256 of its
+    uncompressed bytes. Saved layouts are small manifests that name their
+    entries and point at blobs, so saving an unchanged entity again writes
+    nothing and several saves of the same project share their data.
+    """
+
+    _stores = {}
+
+    def __init__(self, project_dir):
+        self.project_dir = os.path.abspath(project_dir)
+        self.root = os.path.join(self.project_dir, STORE_DIR_NAME)
+        self.objects_dir = os.path.join(self.root, "objects")
+
+    @classmethod
+    def for_project(cls, project_dir):
+        """The store of a project folder (one instance per folder and process)."""
+        project_dir = os.path.abspath(project_dir)
+        store = cls._stores.get(project_dir)
+        if store is None:
+            store = cls._stores[project_dir] = cls(project_dir)
+        return store
+
+    # ------------------------------------------------------------------
+    # Blobs
+    # ------------------------------------------------------------------
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest[2:])
+
+    def has(self, digest):
+        return os.path.exists(self._object_path(digest))
+
+    def put(self, data):
+        """Stores data (bytes) if it is not stored yet and returns its digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        object_path = self._object_path(digest)
+        if os.path.exists(object_path):
+            return digest
+
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        temp_path = f"{object_path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(zlib.compress(data))
+        os.replace(temp_path, object_path)
+        return digest
+
+    def get(self, digest):
+        with open(self._object_path(digest), "rb") as file:
+            data = zlib.decompress(file.read())
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"Corrupt object in asset store: {digest}")
+        return data
+
+    # ------------------------------------------------------------------
+    # Manifests
+    # ------------------------------------------------------------------
+
+    def write_manifest(self, manifest_path, kind, entries):
+        """
+        Writes a manifest for entries (name -> digest) to manifest_path. The
+        store location is recorded relative to the manifest.
+        """
+        manifest_path = os.path.abspath(manifest_path)
+        manifest = {
+            "format": MANIFEST_FORMAT,
+            "version": MANIFEST_VERSION,
+            "kind": kind,
+            "store": os.path.relpath(self.project_dir, os.path.dirname(manifest_path)),
+            "entries": dict(entries),
+        }
+        temp_path = f"{manifest_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as file:
+            json.dump(manifest, file, indent=1)
+        os.replace(temp_path, manifest_path)
+
+    def collect_garbage(self, manifest_paths):
+        """
+        Deletes every blob no manifest in manifest_paths refers to.
+        Returns the number of removed blobs.
+        """
+        referenced = set()
+        for manifest_path in manifest_paths:
+            referenced.update(read_manifest(manifest_path)["entries"].values())
+
+        removed = 0
+        if not os.path.isdir(self.objects_dir):
+            return removed
+        for prefix in os.listdir(self.objects_dir):
+            prefix_dir = os.path.join(self.objects_dir, prefix)
+            for rest in os.listdir(prefix_dir):
+                if prefix + rest not in referenced:
+                    os.remove(os.path.join(prefix_dir, rest))
+                    removed += 1
+        return removed
+
+
+def is_manifest(path):
+    """Returns True if path is a manifest written by AssetStore.write_manifest."""
+    try:
+        with open(path, "rb") as file:
+            head = file.read(256)
+    except OSError:
+        return False
+    return head.lstrip().startswith(b"{") and MANIFEST_FORMAT.encode() in head
+
+
+def read_manifest(manifest_path):
+    with open(manifest_path, "r") as file:
+        manifest = json.load(file)
+    if manifest.get("format") != MANIFEST_FORMAT:
+        raise ValueError(f"{manifest_path} is not an asset manifest")
+    return manifest
+
+
+def open_manifest(manifest_path):
+    """Returns (manifest, store) for a manifest file."""
+    manifest_path = os.path.abspath(manifest_path)
+    manifest = read_manifest(manifest_path)
+    store_dir = os.path.join(os.path.dirname(manifest_path), manifest.get("store", "."))
+    return manifest, AssetStore.for_project(os.path.normpath(store_dir))
@@ -0,0 +1,97 @@
+# background_save.py
+
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+
+class SaveSkipped(Exception):
+    """A job was dropped because a save queued before it failed."""
+
+
+class BackgroundSaver:
+    """
+    Runs scene writes on a single worker thread so saving never blocks the frame.
+
+    Jobs run one at a time in the order they were submitted, so an incremental
+    save queued behind a full rewrite always lands on the rewritten file. Jobs
+    submitted with needs_previous=True (appends) are skipped once an earlier job
+    failed, until a job without it (a full rewrite) succeeds again.
+    Progress and completion are handed back to the main thread through a queue
+    drained by a task, the same way scene_streamer.SceneStreamer reports loads.
+    """
+
+    _instance = None
+
+    def __init__(self, base):
+        self.base = base
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scene_save")
+        self.pending = 0
+        self._failed = False  # Only touched by the worker thread
+        self._events = queue.Queue()  # Filled by the worker thread
+        self._task_name = f"background_saver_{id(self)}"
+        self._task = None
+
+    @classmethod
+    def shared(cls, base):
+        """The saver used by the editor (one per process)."""
+        if cls._instance is None:
+            cls._instance = cls(base)
+        return cls._instance
+
+    @property
+    def busy(self):
+        return self.pending > 0
+
+    def submit(self, job, on_progress=None, on_done=None, needs_previous=False):
+        """
+        Runs job(report) on the worker thread. job may call report(done, total)
+        to publish progress. on_progress(done, total) and on_done(result, error)
+        are called on the main thread; error is None when the job succeeded.
+        With needs_previous the job builds on the jobs queued before it and is
+        skipped (error SaveSkipped) if one of them failed.
+        """
+        def report(done, total):
+            self._events.put((False, on_progress, (done, total)))
+
+        def run():
+            if needs_previous and self._failed:
+                self._events.put((True, on_done, (None, SaveSkipped("an earlier save failed"))))
+                return
+            try:
+                result = job(report if on_progress else None)
+            except Exception as e:
+                self._failed = True
+                self._events.put((True, on_done, (None, e)))
+            else:
+                if not needs_previous:
+                    self._failed = False
+                self._events.put((True, on_done, (result, None)))
+
+        self.pending += 1
+        self.executor.submit(run)
+        if self._task is None:
+            self._task = self.base.taskMgr.add(self._drain_task, self._task_name)
+
+    def wait(self):
+        """Blocks until every queued save has been written (e.g. before quitting)."""
+        self.executor.shutdown(wait=True)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scene_save")
+        self._drain()
+
+    def _drain(self):
+        while True:
+            try:
+                finished, callback, args = self._events.get_nowait()
+            except queue.Empty:
+                return
+            if finished:
+                self.pending -= 1
+            if callback is not None:
+                callback(*args)
+
+    def _drain_task(self, task):
+        self._drain()
+        if not self.pending:
+            self._task = None
+            return task.done
+        return task.cont
@@ -0,0 +1,169 @@
+# behavior_profiler.py
+
+import time
+
+UPDATE = "update"
+HANDLE_INPUT = "handle_input"
+
+
+class ProfileStats:
+    __slots__ = ("calls", "total", "max", "frames")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.frames = 0  # Sampled frames this entry was seen in
+
+    def add(self, elapsed):
+        self.calls += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+    @property
+    def mean(self):
+        return self.total / self.calls if self.calls else 0.0
+
+
+class BehaviorProfiler:
+    """
+    Times MonoBehavior.update and handle_input calls, aggregated per script
+    class and per entity.
+
+    When disabled the behavior runtime takes its untimed path and the profiler
+    costs nothing. When enabled, only one frame in every sample_every frames is
+    timed (sampling mode); the default keeps the overhead of the timer calls
+    well under 1% of the frame. sample_every = 1 times every frame.
+
+    A sampled frame lasts from one begin_frame() to the next, so the input
+    handlers that run between two scheduler steps are timed in the same frames
+    as the updates and count toward the per-frame figures and the budget.
+
+    With a frame_budget (seconds), every sampled frame whose behavior time goes
+    over budget logs its most expensive behaviors.
+    """
+
+    _instance = None
+
+    def __init__(self, sample_every=16, frame_budget=None, report_top=3):
+        self.enabled = False
+        self.sample_every = sample_every
+        self.frame_budget = frame_budget
+        self.report_top = report_top
+        self.by_class = {}  # (kind, class name) -> ProfileStats
+        self.by_entity = {}  # (kind, entity name, class name) -> ProfileStats
+        self.sampled_frames = 0
+        self.over_budget_frames = 0
+        self.timing = False  # True while the current frame (until the next begin_frame) is sampled
+        self._frame = 0
+        self._frame_calls = []  # (elapsed, behavior) of the sampled frame
+
+    @classmethod
+    def shared(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def enable(self, sample_every=None):
+        if sample_every is not None:
+            self.sample_every = max(1, int(sample_every))
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+        if self.timing:
+            self._end_sample()
+
+    def reset(self):
+        self.by_class.clear()
+        self.by_entity.clear()
+        self.sampled_frames = 0
+        self.over_budget_frames = 0
+
+    # ------------------------------------------------------------------
+    # Frame hooks (called by behavior_scheduler.BehaviorScheduler)
+    # ------------------------------------------------------------------
+
+    def begin_frame(self):
+        """Closes the previous sampled frame and decides whether this one is sampled. Returns self.timing."""
+        if self.timing:
+            self._end_sample()
+        self._frame += 1
+        self.timing = self.enabled and self._frame % self.sample_every == 0
+        if self.timing:
+            self._frame_calls = []
+        return self.timing
+
+    def _end_sample(self):
+        self.timing = False
+        self.sampled_frames += 1
+        if self.frame_budget is None:
+            return
+        frame_total = sum(elapsed for elapsed, _ in self._frame_calls)
+        if frame_total > self.frame_budget:
+            self.over_budget_frames += 1
+            worst = sorted(self._frame_calls, key=lambda call: call[0], reverse=True)[:self.report_top]
+            offenders = ", ".join(
+                f"{type(b).__name__}@{_entity_name(b)} {elapsed * 1000:.2f}ms" for elapsed, b in worst
+            )
+            print(f"⚠️ Behaviors took {frame_total * 1000:.2f}ms "
+                  f"(budget {self.frame_budget * 1000:.2f}ms): {offenders}")
+
+    # ------------------------------------------------------------------
+    # Timed calls
+    # ------------------------------------------------------------------
+
+    def timed(self, kind, behavior, method, *args):
+        """Calls method(*args), recording its duration against behavior."""
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            self.record(kind, behavior, time.perf_counter() - start)
+
+    def record(self, kind, behavior, elapsed):
+        class_name = type(behavior).__name__
+        stats = self.by_class.get((kind, class_name))
+        if stats is None:
+            stats = self.by_class[(kind, class_name)] = ProfileStats()
+        stats.add(elapsed)
+
+        entity_key = (kind, _entity_name(behavior), class_name)
+        stats = self.by_entity.get(entity_key)
+        if stats is None:
+            stats = self.by_entity[entity_key] = ProfileStats()
+        stats.add(elapsed)
+
+        self._frame_calls.append((elapsed, behavior))
+
+    # ------------------------------------------------------------------
+    # Reports
+    # ------------------------------------------------------------------
+
+    def rows(self, per_entity=False):
+        """
+        Table rows for the profiler panel: (kind, entity or "", class, calls,
+        total ms, mean ms, max ms, ms per sampled frame).
+        """
+        frames = max(1, self.sampled_frames)
+        rows = []
+        source = self.by_entity if per_entity else self.by_class
+        for key, stats in source.items():
+            if per_entity:
+                kind, entity_name, class_name = key
+            else:
+                (kind, class_name), entity_name = key, ""
+            rows.append((
+                kind, entity_name, class_name, stats.calls,
+                stats.total * 1000, stats.mean * 1000, stats.max * 1000, stats.total * 1000 / frames,
+            ))
+        rows.sort(key=lambda row: row[4], reverse=True)
+        return rows
+
+
+def _entity_name(behavior):
+    node = getattr(behavior, "node", None)
+    if node is None or node.is_empty():
+        return "?"
+    return node.getName()
@@ -0,0 +1,296 @@
+# behavior_scheduler.py
+
+import builtins
+
+from direct.task import Task
+
+from behavior_profiler import UPDATE, BehaviorProfiler
+from coroutines import CoroutineRunner, is_coroutine
+from fixed_step import FixedTimestep, TransformInterpolator
+from update_lod import UpdateLOD
+
+
+class BehaviorScheduler:
+    """
+    Runs every MonoBehavior from a single task.
+
+    Behaviors live in plain lists, one per priority (lower runs first). Each
+    frame the task reads dt once, calls start() on everything added since the
+    last frame in one batch, then calls update(dt) across the lists in a tight
+    loop. Pausing or removing a behavior only moves it between these lists;
+    the task manager is never touched.
+
+    Frames sampled by the BehaviorProfiler take a separate, timed loop.
+
+    With set_fixed_step(tick_rate) the update loop runs on a fixed timestep
+    instead: every update(dt) gets exactly 1 / tick_rate, the number of ticks
+    per frame follows the frame time (capped by max_steps) and the nodes of the
+    behaviors are shown interpolated between the last two ticks.
+
+    With set_update_lod(camera) distant and offscreen behaviors update less
+    often (see update_lod.UpdateLOD).
+
+    Coroutines started by behaviors (or a start() written as a generator or
+    async def) are resumed before the updates of each step, only when what
+    they wait for has happened (see coroutines.CoroutineRunner).
+    """
+
+    _instance = None
+
+    def __init__(self, task_mgr=None, clock=None, task_sort=0):
+        self.task_mgr = task_mgr or builtins.taskMgr
+        self.clock = clock or builtins.globalClock
+        self._lanes = {}  # priority -> list of running behaviors
+        self._order = []  # lanes sorted by priority
+        self._priority = {}  # behavior -> priority
+        self._starting = []  # added since the last frame, start() pending
+        self._paused = set()
+        self._removed = set()  # (behavior, priority) that left a lane while the update loop ran
+        self._iterating = False
+        self.profiler = BehaviorProfiler.shared()
+        self.timestep = None  # FixedTimestep in fixed-step mode
+        self.interpolator = None
+        self.lod = None  # UpdateLOD when update-rate tiers are on
+        self.coroutines = CoroutineRunner()
+        self.task = self.task_mgr.add(self._tick, "behavior_scheduler", sort=task_sort)
+
+    @classmethod
+    def shared(cls):
+        """The scheduler of the running ShowBase (one per process)."""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __len__(self):
+        return len(self._priority)
+
+    # ------------------------------------------------------------------
+    # Membership
+    # ------------------------------------------------------------------
+
+    def add(self, behavior, priority=0):
+        """Schedules behavior; start() runs at the beginning of the next frame."""
+        if behavior in self._priority:
+            return
+        self._priority[behavior] = priority
+        self._starting.append(behavior)
+
+    def remove(self, behavior):
+        priority = self._priority.pop(behavior, None)
+        if priority is None:
+            return
+        if behavior in self._starting:
+            self._starting.remove(behavior)
+        elif behavior not in self._paused:
+            self._leave_lane(behavior, priority)
+        self._paused.discard(behavior)
+        self.coroutines.stop_owner(behavior)
+        if self.lod is not None:
+            self.lod.forget(behavior)
+
+    def pause(self, behavior):
+        """Stops calling update() on behavior until resume()."""
+        if behavior not in self._priority or behavior in self._paused:
+            return
+        self._paused.add(behavior)
+        self.coroutines.pause_owner(behavior)
+        if behavior in self._starting:
+            return  # Stays queued; start() runs once it is resumed
+        self._leave_lane(behavior, self._priority[behavior])
+
+    def resume(self, behavior):
+        if behavior not in self._paused:
+            return
+        self._paused.discard(behavior)
+        self.coroutines.resume_owner(behavior)
+        if behavior in self._starting:
+            return
+        self._enter_lane(behavior, self._priority[behavior])
+
+    def is_paused(self, behavior):
+        return behavior in self._paused
+
+    def set_priority(self, behavior, priority):
+        """Moves behavior to another lane; its coroutines and LOD state are kept."""
+        old = self._priority.get(behavior)
+        if old is None or old == priority:
+            return
+        self._priority[behavior] = priority
+        if behavior in self._starting or behavior in self._paused:
+            return  # Joins the lane of its new priority on start() / resume()
+        self._leave_lane(behavior, old)
+        self._enter_lane(behavior, priority)
+
+    # ------------------------------------------------------------------
+    # Timestep
+    # ------------------------------------------------------------------
+
+    def set_fixed_step(self, tick_rate=60, max_steps=5, interpolate=True):
+        """Simulate behaviors at tick_rate updates per second."""
+        if self.interpolator is not None:
+            self.interpolator.clear()
+        self.timestep = FixedTimestep(tick_rate, max_steps)
+        self.interpolator = TransformInterpolator() if interpolate else None
+
+    def set_variable_step(self):
+        """Back to one update(dt) per frame with the frame's dt (the default)."""
+        if self.interpolator is not None:
+            self.interpolator.clear()
+        self.timestep = None
+        self.interpolator = None
+
+    def set_update_lod(self, camera, **options):
+        """Update far/offscreen behaviors less often; options go to UpdateLOD."""
+        self.lod = UpdateLOD(camera, **options)
+
+    def clear_update_lod(self):
+        self.lod = None
+
+    def _nodes(self):
+        nodes = {}
+        for lane in self._order:
+            for behavior in lane:
+                node = getattr(behavior, "node", None)
+                if node is not None:
+                    nodes[node] = None
+        return nodes
+
+    def _lane(self, priority):
+        lane = self._lanes.get(priority)
+        if lane is None:
+            lane = self._lanes[priority] = []
+            self._order = [self._lanes[p] for p in sorted(self._lanes)]
+        return lane
+
+    def _enter_lane(self, behavior, priority):
+        if (behavior, priority) in self._removed:
+            self._removed.discard((behavior, priority))  # Never left this lane
+        else:
+            self._lane(priority).append(behavior)
+
+    def _leave_lane(self, behavior, priority):
+        if self._iterating:
+            self._removed.add((behavior, priority))  # Compacted after the loop
+        else:
+            self._remove_from_lane(behavior, priority)
+
+    def _remove_from_lane(self, behavior, priority):
+        lane = self._lanes.get(priority)
+        if lane is not None and behavior in lane:
+            lane.remove(behavior)
+
+    # ------------------------------------------------------------------
+    # Frame
+    # ------------------------------------------------------------------
+
+    def _tick(self, task):
+        dt = self.clock.getDt()
+        if self.timestep is None:
+            self._step(dt)
+            return Task.cont
+
+        steps, alpha = self.timestep.advance(dt)
+        interpolator = self.interpolator
+        if steps and interpolator is not None:
+            interpolator.restore()
+        for _ in range(steps):
+            if interpolator is not None:
+                interpolator.capture_previous(self._nodes())
+            self._step(self.timestep.step)
+        if interpolator is not None:
+            if steps:
+                interpolator.capture_current()
+            interpolator.apply(alpha)
+        return Task.cont
+
+    def _step(self, dt):
+        if self._starting:
+            batch = [b for b in self._starting if b not in self._paused]
+            self._starting = [b for b in self._starting if b in self._paused]
+            for behavior in batch:
+                if self._call(behavior, behavior.start):
+                    behavior.started = True
+                    # start() may have paused or removed the behavior itself
+                    if behavior in self._priority and behavior not in self._paused:
+                        self._lane(self._priority[behavior]).append(behavior)
+
+        self.coroutines.advance(dt)
+
+        timing = self.profiler.begin_frame()
+        self._iterating = True
+        try:
+            if self.lod is not None:
+                self._update_with_lod(dt, timing)
+            elif timing:
+                timed = self.profiler.timed
+                for lane in self._order:
+                    for behavior in lane:
+                        try:
+                            timed(UPDATE, behavior, behavior.update, dt)
+                        except Exception as e:
+                            self._fail(behavior, e)
+            else:
+                for lane in self._order:
+                    for behavior in lane:
+                        try:
+                            behavior.update(dt)
+                        except Exception as e:
+                            self._fail(behavior, e)
+        finally:
+            self._iterating = False
+
+        if self._removed:
+            removed, self._removed = self._removed, set()
+            by_lane = {}
+            for behavior, priority in removed:
+                by_lane.setdefault(priority, set()).add(behavior)
+            for priority, behaviors in by_lane.items():
+                lane = self._lanes.get(priority)
+                if lane is not None:
+                    lane[:] = [b for b in lane if b not in behaviors]
+
+    def _update_with_lod(self, dt, timing):
+        lod = self.lod
+        if lod.tick % lod.reclassify_every == 0:
+            lod.classify([b for lane in self._order for b in lane])
+        lod.tick += 1
+        intervals = lod.intervals
+        timed = self.profiler.timed if timing else None
+        for lane in self._order:
+            for behavior in lane:
+                behavior_dt = dt
+                if behavior in intervals:
+                    behavior_dt = lod.due(behavior, dt)
+                    if behavior_dt is None:
+                        continue
+                try:
+                    if timed is not None:
+                        timed(UPDATE, behavior, behavior.update, behavior_dt)
+                    else:
+                        behavior.update(behavior_dt)
+                except Exception as e:
+                    self._fail(behavior, e)
+
+    def _call(self, behavior, method):
+        try:
+            result = method()
+            if is_coroutine(result):
+                self.coroutines.start(behavior, result)
+            return True
+        except Exception as e:
+            self._fail(behavior, e)
+            return False
+
+    def _fail(self, behavior, error):
+        # One broken script must not stop every other behavior; pause it instead.
+        print(f"❌ {type(behavior).__name__} on '{_node_name(behavior)}' raised {error!r}; behavior paused")
+        self._paused.add(behavior)
+        if not behavior.started:
+            self._starting.append(behavior)  # start() is retried on resume()
+        else:
+            self._leave_lane(behavior, self._priority[behavior])
+
+
+def _node_name(behavior):
+    node = getattr(behavior, "node", None)
+    return node.getName() if node is not None and not node.is_empty() else "?"
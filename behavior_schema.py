@@ -0,0 +1,141 @@
+# behavior_schema.py
+
+import weakref
+
+from panda3d.core import LPoint3f, LVecBase4f, NodePath, Vec3
+
+# Widget kinds used by the script inspector
+BOOL = "bool"
+VEC3 = "vec3"
+POINT3 = "point3"
+VEC4 = "vec4"
+NODEPATH = "nodepath"
+TEXTURE = "texture"
+INPUTS = "inputs"
+VALUE = "value"
+
+VECTOR_KINDS = (VEC3, POINT3, VEC4)
+
+PRIVATE = "private"
+SHARED = "shared"
+
+
+class FieldSchema:
+    __slots__ = ("name", "type", "widget", "sync")
+
+    def __init__(self, name, field_type, widget, sync=PRIVATE):
+        self.name = name
+        self.type = field_type
+        self.widget = widget
+        self.sync = sync
+
+    def __repr__(self):
+        return f"FieldSchema({self.name!r}, {self.type.__name__}, {self.widget!r}, {self.sync!r})"
+
+
+class BehaviorSchema:
+    """
+    Reflection data of one behavior class: its public fields, their types, the
+    inspector widget kind of each and their sync category (the attribute
+    _<field>_sync, "private" by default).
+
+    Fields are the instance attributes a freshly constructed behavior has, so the
+    schema is built from the first instance of the class and reused for every
+    other one. A hot-reloaded script is a new class and gets a new schema.
+    Sync categories set per instance (self._hp_sync = "shared" in __init__) are
+    re-read from each instance by shared_of().
+    """
+
+    __slots__ = ("cls", "fields", "by_name", "shared", "builtin", "instance_sync", "__weakref__")
+
+    def __init__(self, cls, fields, shared=(), builtin=False, instance_sync=False):
+        self.cls = cls
+        self.fields = tuple(fields)
+        self.by_name = {field.name: field for field in self.fields}
+        self.shared = tuple(shared)  # Shared field names, class-level ones included
+        self.builtin = builtin
+        self.instance_sync = instance_sync  # The instances declare _<field>_sync themselves
+
+    def shared_of(self, instance):
+        """Shared field names of instance (differs from shared only with per-instance declarations)."""
+        if not self.instance_sync:
+            return self.shared
+        return tuple(name for name, category in sync_categories(self.cls, instance).items() if category == SHARED)
+
+    def widget_of(self, name, value):
+        """Widget kind for the current value of field name."""
+        field = self.by_name.get(name)
+        if field is not None and type(value) is field.type and field.type not in _SIZED_TYPES:
+            return field.widget
+        # Not in the schema, its type changed since, or a list/tuple whose kind depends on its length
+        return widget_kind(name, value)
+
+    def items(self, instance):
+        """(name, value, widget kind) for the attributes of instance, in definition order."""
+        for name, value in vars(instance).items():
+            yield name, value, self.widget_of(name, value)
+
+
+# Their widget kind depends on the length of the value, not only its type
+_SIZED_TYPES = (list, tuple)
+
+# class -> BehaviorSchema; weak so classes replaced by hot reloads are dropped
+_schemas = weakref.WeakKeyDictionary()
+
+
+def schema_for(instance):
+    """The cached schema of type(instance), built from instance the first time."""
+    cls = type(instance)
+    schema = _schemas.get(cls)
+    if schema is None:
+        schema = _schemas[cls] = build_schema(instance)
+    return schema
+
+
+def build_schema(instance):
+    cls = type(instance)
+    sync = sync_categories(cls, instance)
+    fields = []
+    for name, value in vars(instance).items():
+        if name.startswith("_") or callable(value):
+            continue
+        fields.append(FieldSchema(name, type(value), widget_kind(name, value), sync.get(name, PRIVATE)))
+    shared = [name for name, category in sync.items() if category == SHARED]
+    instance_sync = any(_is_sync_attr(name) for name in vars(instance))
+    return BehaviorSchema(cls, fields, shared, builtin=bool(vars(instance).get("__builtin__")),
+                          instance_sync=instance_sync)
+
+
+def sync_categories(cls, instance=None):
+    """{field: category} from the _<field>_sync attributes of cls and its bases, then of instance."""
+    categories = {}
+    for attr in dir(cls):
+        if _is_sync_attr(attr):
+            categories[attr[1:-5]] = getattr(cls, attr)
+    if instance is not None:
+        for attr, value in vars(instance).items():
+            if _is_sync_attr(attr):
+                categories[attr[1:-5]] = value
+    return categories
+
+
+def _is_sync_attr(attr):
+    return attr.startswith("_") and not attr.startswith("__") and attr.endswith("_sync") and len(attr) > 6
+
+
+def widget_kind(name, value):
+    if name == "INPUTS" and isinstance(value, dict):
+        return INPUTS
+    if isinstance(value, bool):
+        return BOOL
+    if isinstance(value, Vec3) or (isinstance(value, (list, tuple)) and len(value) == 3):
+        return VEC3
+    if isinstance(value, LPoint3f):
+        return POINT3
+    if isinstance(value, LVecBase4f):
+        return VEC4
+    if isinstance(value, NodePath):
+        return NODEPATH
+    if hasattr(value, "get_name") and "Texture" in str(type(value)):
+        return TEXTURE
+    return VALUE
@@ -0,0 +1,214 @@
+# coroutines.py
+
+import inspect
+import itertools
+
+from direct.showbase.DirectObject import DirectObject
+
+
+class Wait:
+    """Base of what a behavior coroutine can yield (generators) or await (async def)."""
+
+    __slots__ = ()
+
+    def __await__(self):
+        return (yield self)
+
+
+class wait(Wait):
+    """Resume after seconds of scheduler time: yield wait(1.5) / await wait(1.5)."""
+
+    __slots__ = ("seconds",)
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+
+class next_frame(Wait):
+    """Resume on the next frame. A bare `yield` does the same in a generator."""
+
+    __slots__ = ()
+
+
+class event(Wait):
+    """
+    Resume when event name fires, with its first argument (or None) as the
+    result. Input actions fire as "<action>" on press and "<action>-up" on
+    release; any messenger event works too.
+    """
+
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+
+def is_coroutine(value):
+    return inspect.isgenerator(value) or inspect.iscoroutine(value)
+
+
+class Coroutine:
+    """A running behavior coroutine; stop() ends it."""
+
+    __slots__ = ("owner", "body", "done")
+
+    def __init__(self, owner, body):
+        self.owner = owner
+        self.body = body
+        self.done = False
+
+    def stop(self):
+        if not self.done:
+            self.done = True
+            self.body.close()
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel: deadlines are rounded up to ticks of resolution seconds
+    and kept in slots, tick % slots. advance() only visits the slots of the ticks
+    that elapsed, so timers that are still waiting cost nothing per frame.
+    """
+
+    def __init__(self, resolution=1 / 120, slots=512):
+        self.resolution = resolution
+        self.slots = slots
+        self.wheel = [[] for _ in range(slots)]
+        self.tick = 0  # Last tick processed
+        self.count = 0
+        self._order = itertools.count()
+
+    def schedule(self, deadline, item):
+        tick = max(-int(-deadline // self.resolution), self.tick + 1)  # Round up
+        self.wheel[tick % self.slots].append((tick, next(self._order), item))
+        self.count += 1
+
+    def advance(self, now):
+        """Items whose deadline is <= now, in deadline order."""
+        target = int(now / self.resolution)
+        if target <= self.tick:
+            return []
+        if not self.count:
+            self.tick = target
+            return []
+        expired = []
+        for i in range(1, min(target - self.tick, self.slots) + 1):
+            index = (self.tick + i) % self.slots
+            bucket = self.wheel[index]
+            if not bucket:
+                continue
+            keep = []
+            for entry in bucket:
+                (expired if entry[0] <= target else keep).append(entry)
+            self.wheel[index] = keep
+        self.tick = target
+        self.count -= len(expired)
+        expired.sort()
+        return [item for _, _, item in expired]
+
+
+class CoroutineRunner:
+    """
+    Drives the coroutines of behaviors for the BehaviorScheduler.
+
+    A coroutine only runs when what it waits for happened: wait() timers sit in
+    a TimerWheel, event() waiters in a per-name list, and only next_frame()
+    waiters are looked at every frame. Coroutines of a paused behavior are held
+    until it resumes; those of a removed behavior are closed.
+    """
+
+    def __init__(self):
+        self.time = 0.0
+        self.timers = TimerWheel()
+        self._next_frame = []
+        self._events = {}  # event name -> [coroutine]
+        self._ready = []  # (coroutine, value) resumed on the next advance()
+        self._held = {}  # paused owner -> [(coroutine, value)]
+        self._by_owner = {}  # owner -> set of running coroutines
+        self._paused = set()
+        self._listener = DirectObject()
+
+    def start(self, owner, body):
+        """Runs body (a generator or coroutine object) until its first wait."""
+        coroutine = Coroutine(owner, body)
+        self._by_owner.setdefault(owner, set()).add(coroutine)
+        self._resume(coroutine, None)
+        return coroutine
+
+    def stop_owner(self, owner):
+        for coroutine in self._by_owner.pop(owner, ()):
+            coroutine.stop()
+        self._held.pop(owner, None)
+        self._paused.discard(owner)
+
+    def pause_owner(self, owner):
+        if owner in self._by_owner:
+            self._paused.add(owner)
+
+    def resume_owner(self, owner):
+        if owner in self._paused:
+            self._paused.discard(owner)
+            self._ready.extend(self._held.pop(owner, ()))
+
+    def fire(self, name, *args):
+        """Wakes the coroutines waiting for event name; they run on the next frame."""
+        waiters = self._events.pop(name, None)
+        if not waiters:
+            return
+        self._listener.ignore(name)
+        value = args[0] if args else None
+        for coroutine in waiters:
+            self._ready.append((coroutine, value))
+
+    def advance(self, dt):
+        """Called once per scheduler step, before the behavior updates."""
+        self.time += dt
+        if not (self._ready or self._next_frame or self.timers.count):
+            return
+        due = self._ready
+        self._ready = []
+        due.extend((coroutine, None) for coroutine in self._next_frame)
+        self._next_frame = []
+        due.extend((coroutine, None) for coroutine in self.timers.advance(self.time))
+        for coroutine, value in due:
+            self._resume(coroutine, value)
+
+    def _resume(self, coroutine, value):
+        if coroutine.done:
+            return
+        owner = coroutine.owner
+        if owner in self._paused:
+            self._held.setdefault(owner, []).append((coroutine, value))
+            return
+        try:
+            condition = coroutine.body.send(value)
+        except StopIteration:
+            self._finish(coroutine)
+            return
+        except Exception as e:
+            print(f"❌ Coroutine of {type(owner).__name__} raised {e!r}; coroutine stopped")
+            self._finish(coroutine)
+            return
+
+        if condition is None or isinstance(condition, next_frame):
+            self._next_frame.append(coroutine)
+        elif isinstance(condition, wait):
+            self.timers.schedule(self.time + condition.seconds, coroutine)
+        elif isinstance(condition, event):
+            waiters = self._events.get(condition.name)
+            if waiters is None:
+                waiters = self._events[condition.name] = []
+                # Messenger events (e.g. from other scripts or Panda) wake waiters too
+                self._listener.accept(condition.name, self.fire, [condition.name])
+            waiters.append(coroutine)
+        else:
+            print(f"⚠️ Coroutine of {type(owner).__name__} yielded {condition!r}; expected wait, next_frame or event")
+            self._next_frame.append(coroutine)
+
+    def _finish(self, coroutine):
+        coroutine.done = True
+        running = self._by_owner.get(coroutine.owner)
+        if running is not None:
+            running.discard(coroutine)
+            if not running:
+                del self._by_owner[coroutine.owner]
@@ -0,0 +1,109 @@
+# dirty_tracker.py
+
+from panda3d.core import Light
+
+
+class DirtyTracker:
+    """
+    Tracks which entity nodes changed since the scene was last saved or loaded.
+
+    Editor code calls mark_dirty() whenever it changes an entity's transform,
+    tags or script properties, and mark_removed() when an entity is deleted.
+    Saving then only has to serialize the entities recorded here. Lights are
+    saved as one table, so a change to any light (mark_dirty() on a light node,
+    or mark_lights_dirty()) just flags that table for the next save.
+    """
+
+    TRANSFORM = "transform"
+    TAGS = "tags"
+    SCRIPT_PROPERTIES = "script_properties"
+
+    def __init__(self):
+        self.map_path = None
+        self.saved_ids = set()  # Entity ids present in the map file at map_path
+        self.dirty = {}  # id -> NodePath
+        self.reasons = {}  # id -> set of change kinds
+        self.removed = set()
+        self.lights_dirty = False
+        self.full_save_required = True
+
+    def reset(self, map_path=None, saved_ids=()):
+        """Forget all changes; the scene now matches the file at map_path."""
+        self.map_path = map_path
+        self.saved_ids = set(saved_ids)
+        self.dirty.clear()
+        self.reasons.clear()
+        self.removed.clear()
+        self.lights_dirty = False
+        self.full_save_required = map_path is None
+
+    def mark_dirty(self, node, reason=TRANSFORM):
+        if node is None or node.is_empty():
+            return
+        if isinstance(node.node(), Light):
+            self.lights_dirty = True
+            return
+        if not node.has_python_tag("id"):
+            return
+        entity_id = node.get_python_tag("id")
+        self.dirty[entity_id] = node
+        self.reasons.setdefault(entity_id, set()).add(reason)
+        self.removed.discard(entity_id)
+
+    def mark_removed(self, node):
+        """Record the removal of node and every entity below it. Call before removeNode()."""
+        if node is None or node.is_empty():
+            return
+        for entity in [node] + list(node.find_all_matches("**")):
+            if isinstance(entity.node(), Light):
+                self.lights_dirty = True
+            elif entity.has_python_tag("id"):
+                entity_id = entity.get_python_tag("id")
+                self.dirty.pop(entity_id, None)
+                self.reasons.pop(entity_id, None)
+                if entity_id in self.saved_ids:
+                    self.removed.add(entity_id)
+
+    def rename_id(self, node, old_id):
+        """An entity got a new id (e.g. the inspector re-tags it): old record is gone."""
+        if old_id is not None and old_id in self.saved_ids:
+            self.removed.add(old_id)
+        self.dirty.pop(old_id, None)
+        self.reasons.pop(old_id, None)
+        self.mark_dirty(node, self.TAGS)
+
+    def mark_lights_dirty(self):
+        self.lights_dirty = True
+
+    def mark_all_dirty(self):
+        self.full_save_required = True
+
+    def is_dirty(self):
+        return self.full_save_required or self.lights_dirty or bool(self.dirty) or bool(self.removed)
+
+    def needs_full_save(self, map_path):
+        return self.full_save_required or self.map_path != map_path
+
+    def take_changes(self):
+        """
+        Returns (added, replaced, removed_ids) and marks them as saved.
+        added/replaced are lists of NodePaths that are still in the scene.
+        Check lights_dirty first; it is cleared here too.
+        """
+        added, replaced = [], []
+        for entity_id, node in self.dirty.items():
+            if node.is_empty():
+                continue
+            if entity_id in self.saved_ids:
+                replaced.append(node)
+            else:
+                added.append(node)
+                self.saved_ids.add(entity_id)
+        removed = list(self.removed)
+        self.saved_ids.difference_update(removed)
+
+        self.dirty.clear()
+        self.reasons.clear()
+        self.removed.clear()
+        self.lights_dirty = False
+        return added, replaced, removed
@@ -11,52 +11,88 @@ from panda3d.core import NodePath  # Assuming NodePath is from panda3d.core
 
 from panda3d.core import PointLight, Spotlight, DirectionalLight, AmbientLight, Vec4, Vec3
 
+import scene_format
+from scene_streamer import SceneStreamer, entity_files_in_folder
+from model_cache import ModelCache
+from model_import import resolve_converted
+from map_archive import MapArchive, is_map_archive
+from parse_cache import ParseCache, parse_toml_bytes
+import asset_store
+from asset_store import AssetStore
+from background_save import BackgroundSaver
+from entity_registry import EntityRegistry
+from script_loader import load_script, register_instance
+
 class MapLoader:
-    def __init__(self, world):
+    def __init__(self, world, on_progress=None, on_done=None):
         self.world = world
+        self.on_progress = on_progress
+        self.on_done = on_done
 
-    def extract_map(self, map_file, extract_to):
+    def load_map(self, map_file):
         """
-        Extracts the .map file (a ZIP archive) to a target directory.
-        Returns True on success, False otherwise.
+        Loads the project from a .map file.
+        Expects the map file to be stored in the project folder (e.g. ./saves/tttttt/tttttt.map).
+        Binary scene maps are memory mapped and loaded directly; legacy zip maps are
+        read entry by entry straight from the archive (nothing is extracted to disk).
         """
-        # Use an absolute, normalized path.
+        # Use absolute paths
         map_file = os.path.abspath(os.path.normpath(map_file))
         if not os.path.exists(map_file):
             print(f"❌ Map file not found: {map_file}")
-            return False
+            return
 
-        os.makedirs(extract_to, exist_ok=True)
+        if scene_format.is_scene_file(map_file):
+            self.load_scene_map(map_file)
+            return
 
         try:
-            with zipfile.ZipFile(map_file, 'r') as zip_ref:
-                zip_ref.extractall(extract_to)
-            print(f"📂 Extracted map to {extract_to}")
-            return True
+            archive = MapArchive(map_file)
         except Exception as e:
-            print(f"❌ Failed to extract .map file: {e}")
-            return False
+            print(f"❌ Failed to open .map file: {e}")
+            print("❌ Failed to load map.")
+            return
 
-    def load_map(self, map_file):
+        def on_done(entities):
+            archive.close()
+            tracker = getattr(self.world, "dirty_tracker", None)
+            if tracker is not None:
+                tracker.reset()  # Legacy maps are rewritten in the binary format on the next save.
+            print("🎮 Scene loaded successfully!")
+            if self.on_done:
+                self.on_done(entities)
+
+        loader_instance = Load(self.world)
+        loader_instance.load_project_from_archive_async(
+            archive, self.world.render, on_progress=self.on_progress, on_done=on_done
+        )
+
+    def load_scene_map(self, map_file):
         """
-        Loads the project from a .map file.
-        Expects the map file to be stored in the project folder (e.g. ./saves/tttttt/tttttt.map).
-        Extracts the map into a folder with the same name (without the .map extension)
-        and then loads the scene from the TOML files within.
+        Loads a binary scene map. Only the index is read up front; each entity
+        record is decoded when the streamer reaches it.
         """
-        # Use absolute paths
-        map_file = os.path.abspath(os.path.normpath(map_file))
-        project_folder = os.path.dirname(map_file)
-        # For example, if map_file is .../saves/tttttt/tttttt.map, extract to .../saves/tttttt/tttttt
-        extract_dir = os.path.join(project_folder, os.path.basename(map_file).replace('.map', ''))
-
-        if self.extract_map(map_file, extract_dir):
-            print("✅ Map extraction successful, loading scene...")
-            loader_instance = Load(self.world)
-            loader_instance.load_project_from_folder_toml(extract_dir, self.world.render)
+        try:
+            reader = scene_format.open_scene(map_file)
+        except (OSError, scene_format.SceneFormatError) as e:
+            print(f"❌ Failed to open map: {e}")
+            return
+
+        def on_done(entities):
+            reader.close()
+            tracker = getattr(self.world, "dirty_tracker", None)
+            if tracker is not None:
+                tracker.reset(map_file, [node.get_python_tag("id") for node in entities])
             print("🎮 Scene loaded successfully!")
-        else:
-            print("❌ Failed to load map.")
+            if self.on_done:
+                self.on_done(entities)
+
+        # The reader stays open until streaming finishes: records decode lazily from the mmap.
+        loader_instance = Load(self.world)
+        loader_instance.load_lights_from_data(reader.lights(), self.world.render)
+        loader_instance.stream_entities(
+            self.world.render, records=list(reader), on_progress=self.on_progress, on_done=on_done
+        )
 
 # ------------------------------------------------------------------------------
 # Load class: Reads TOML files from a folder and reconstructs scene objects.
@@ -78,6 +114,13 @@ class Load:
         with open(file_path, "r") as file:
             lights_data = toml.load(file)
 
+        self.load_lights_from_data(lights_data, render)
+        print(f"Lights loaded from {file_path}")
+
+    def load_lights_from_data(self, lights_data: dict, render: NodePath):
+        """
+        Create lights from an already parsed lights table and attach them to the render node.
+        """
         for light_name, light_data in lights_data.items():
             light_type = light_data.get("type", "point")
             position = light_data.get("position", {"x": 0, "y": 0, "z": 0})
@@ -106,7 +149,6 @@ class Load:
                 light_node.lookAt(Vec3(direction["x"], direction["y"], direction["z"]))
 
             render.setLight(light_node)
-        print(f"Lights loaded from {file_path}")
 
     def load_project_from_folder_toml(self, input_folder: str, root_node: NodePath):
         """
@@ -124,48 +166,133 @@ class Load:
             self.load_lights_from_toml(lights_toml, root_node)
         
         # Iterate over other TOML files in the folder to load entities.
+        parse_cache = ParseCache.for_folder(input_folder)
         entities = []
         for file_name in os.listdir(input_folder):
             if file_name.endswith(".toml") and file_name != "lights.toml":
                 file_path = os.path.join(input_folder, file_name)
-                with open(file_path, "r") as file:
-                    entity_data = toml.load(file)
-                
-                # Example: extract transform and load a model if available.
-                name = entity_data.get("name", "Unnamed")
-                model_path = entity_data.get("entity_model", "")
-                transform = entity_data.get("transform", {})
-                pos = transform.get("position", {"x": 0, "y": 0, "z": 0})
-                rot = transform.get("rotation", {"h": 0, "p": 0, "r": 0})
-                scale = transform.get("scale", {"x": 1, "y": 1, "z": 1})
-
-                # Create a new node for the entity.
-                entity_node = root_node.attachNewNode(name)
-                if model_path and os.path.exists(model_path):
-                    # Load and reparent the model.
-                    model = loader.loadModel(os.path.relpath(model_path))
-                    model.reparentTo(entity_node)
-                    print(f"✅ Loaded model for {name}: {model_path}")
-                else:
-                    print(f"⚠️ Model path not found for {name}: {model_path}")
-
-                entity_node.setPos(pos["x"], pos["y"], pos["z"])
-                entity_node.setHpr(rot["h"], rot["p"], rot["r"])
-                entity_node.setScale(scale["x"], scale["y"], scale["z"])
-                entities.append(entity_node)
-                print(f"✅ Entity '{name}' loaded from {file_name}")
+                entity_data = parse_cache.load(file_path)
 
+                entities.append(self.load_entity_data(entity_data, root_node))
+                print(f"✅ Entity '{entity_data.get('name', 'Unnamed')}' loaded from {file_name}")
+
+        parse_cache.flush()
+        return entities
+
+    def load_project_from_scene(self, reader, root_node: NodePath):
+        """
+        Loads every entity of an open binary scene (see scene_format.SceneReader).
+        """
+        entities = []
+        for entity_data in reader:
+            entities.append(self.load_entity_data(entity_data, root_node))
+        print(f"✅ Loaded {len(entities)} entities from {reader.path}")
         return entities
 
+    def load_entity_data(self, entity_data, root_node: NodePath):
+        """
+        Reconstructs one entity node from a parsed entity record and attaches it to root_node.
+        """
+        name = entity_data.get("name", "Unnamed")
+        model_path = entity_data.get("entity_model", "")
+        model = None
+        if model_path and os.path.exists(model_path):
+            model = ModelCache.shared(loader).get(resolve_converted(model_path))
+            print(f"✅ Loaded model for {name}: {model_path}")
+        else:
+            print(f"⚠️ Model path not found for {name}: {model_path}")
+        return self.build_entity_node(entity_data, root_node, model)
+
+    def build_entity_node(self, entity_data, root_node: NodePath, model=None):
+        """
+        Creates the entity node for a parsed record, parents the (already loaded) model
+        under it and applies the saved transform and tags.
+        """
+        name = entity_data.get("name", "Unnamed")
+        model_path = entity_data.get("entity_model", "")
+        transform = entity_data.get("transform", {})
+        pos = transform.get("position", {"x": 0, "y": 0, "z": 0})
+        rot = transform.get("rotation", {"h": 0, "p": 0, "r": 0})
+        scale = transform.get("scale", {"x": 1, "y": 1, "z": 1})
+
+        # Create a new node for the entity.
+        entity_node = root_node.attachNewNode(name)
+        if model is not None:
+            model.reparentTo(entity_node)
+
+        entity_node.setPos(pos["x"], pos["y"], pos["z"])
+        entity_node.setHpr(rot["h"], rot["p"], rot["r"])
+        entity_node.setScale(scale["x"], scale["y"], scale["z"])
+
+        # Restore the tags the saver reads back, so the entity survives the next save.
+        for key, value in entity_data.get("properties", {}).items():
+            entity_node.set_python_tag(key, value)
+        entity_node.set_python_tag("scripts", {})
+        entity_node.set_python_tag("model_path", model_path)
+        entity_node.set_python_tag("id", entity_data.get("id"))
+        EntityRegistry.shared().register(entity_node)
+        return entity_node
+
+    def load_project_from_archive_async(self, archive, root_node: NodePath, on_progress=None, on_done=None):
+        """
+        Streams a legacy zip map (map_archive.MapArchive) without extracting it: lights are
+        loaded immediately, entity entries are parsed in memory on the thread pool.
+        """
+        self.load_lights_from_data(archive.lights(), root_node)
+        return self.stream_entities(root_node, archive=archive, on_progress=on_progress, on_done=on_done)
+
+    def stream_entities(self, root_node: NodePath, files=(), records=(), archive=None,
+                        on_progress=None, on_done=None):
+        """
+        Loads entities without blocking the frame: TOML files are parsed on a thread pool,
+        models are loaded asynchronously and entities are attached a batch per frame.
+        Returns the SceneStreamer; on_done receives the list of created entity nodes.
+        """
+        streamer = SceneStreamer(
+            self.world,
+            lambda entity_data, model: self.build_entity_node(entity_data, root_node, model),
+            on_progress=on_progress,
+            on_done=on_done,
+            model_cache=ModelCache.shared(self.world.loader),
+        )
+        if files:
+            streamer.load_files(files)
+        if records:
+            streamer.load_records(records)
+        if archive is not None:
+            streamer.load_archive(archive)
+        if not files and not records and archive is None:
+            streamer.load_records([])
+        return streamer
+
+    def load_project_from_folder_toml_async(self, input_folder: str, root_node: NodePath,
+                                            on_progress=None, on_done=None):
+        """
+        Streaming version of load_project_from_folder_toml. Lights are small and loaded
+        immediately; entities arrive over the next frames.
+        """
+        if not os.path.exists(input_folder):
+            print(f"❌ Input folder {input_folder} does not exist.")
+            return None
+
+        lights_toml = os.path.join(input_folder, "lights", "lights.toml")
+        if os.path.exists(lights_toml):
+            self.load_lights_from_toml(lights_toml, root_node)
+
+        return self.stream_entities(
+            root_node,
+            files=entity_files_in_folder(input_folder),
+            on_progress=on_progress,
+            on_done=on_done,
+        )
+
     def load_script(self, script_path: str, node: NodePath):
         """
         Dynamically load a script from a Python file and attach it to a node.
         """
-        spec = importlib.util.spec_from_file_location("script", script_path)
-        script_module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(script_module)
+        script_module = load_script(script_path)
         if hasattr(script_module, "Script"):
-            return script_module.Script(node)
+            return register_instance(script_path, script_module.Script(node))
         else:
             raise AttributeError(f"The script at {script_path} does not define a 'Script' class.")
         
@@ -183,93 +310,109 @@ class Load:
             return []
 
         entities = []
-        
-        with open(input_folder, "r") as file:
-            input_folder = file.read().strip()
 
-        # Iterate over all TOML files in the input folder
-        for file_name in os.listdir(input_folder):
-            if file_name.endswith(".toml"):
-                file_path = os.path.join(os.path.relpath(input_folder), file_name)
-                with open(file_path, "r") as file:
-                    entity_data = toml.load(file)
-
-                # Extract data from the entity
-                name = entity_data.get("name", "Unnamed")
-                entity_id = entity_data.get("id", None)
-                model_path = entity_data.get("entity_model", "")
-                entity_type = entity_data.get("type", "")
-                widget_type = entity_data.get("widget_type", "")
-                action = entity_data.get("action", "")
-                properties = entity_data.get("properties", {})
-                specials = properties.get("specials", "")
-                __UIEditorLabel__ = specials.get("__UIEditorLabel__", "")
-                __UIEditorButton__ = specials.get("__UIEditorButton__", "")
+        for entity_data in self.read_ui_layout(input_folder):
+            # Extract data from the entity
+            name = entity_data.get("name", "Unnamed")
+            entity_id = entity_data.get("id", None)
+            model_path = entity_data.get("entity_model", "")
+            entity_type = entity_data.get("type", "")
+            widget_type = entity_data.get("widget_type", "")
+            action = entity_data.get("action", "")
+            properties = entity_data.get("properties", {})
+            specials = properties.get("specials", "")
+            __UIEditorLabel__ = specials.get("__UIEditorLabel__", "")
+            __UIEditorButton__ = specials.get("__UIEditorButton__", "")
+            
+            if __UIEditorLabel__ != "":
+                text = __UIEditorLabel__.get("text", "")
+            
+            if __UIEditorButton__ != "":
+                text = __UIEditorButton__.get("text", "")
                 
-                if __UIEditorLabel__ != "":
-                    text = __UIEditorLabel__.get("text", "")
+            coloring = entity_data.get("coloring", {})
+            frame_color = coloring.get("frameColor1", {"r": 0.5, "g": 0.5, "b": 0.5})
+            color = coloring.get("text_fg1", {"r": 1.0, "g": 1.0, "b": 1.0})
+            image = entity_data.get("image", "")
+            parent = entity_data.get("parent", "")
+
+            transform = entity_data.get("transform", {})
+            isCanvas = entity_data.get("isCanvas", False)
+            isLabel = entity_data.get("isLabel", False)
+            isButton = entity_data.get("isButton", False)
+            isImage = entity_data.get("isImage", False)
+            #TODO load UI object to ui editor
+
+            # Set transformation properties
+            position = transform.get("position", {"x": 0, "y": 0, "z": 0})
+            rotation = transform.get("rotation", {"h": 0, "p": 0, "r": 0})
+            scale = transform.get("scale", {"x": 0.1, "y": 0.1, "z": 0.1})
+            parent = properties.get("parent", self.world.render2d)
+            script_paths = properties.get("script_paths", "")
+            s_property = properties.get("script_properties", "")
+
+            if widget_type == "l":
+                self.widget = self.world.recreate_widget(text, frame_color, color, scale, position, parent)
+                self.widget.set_python_tag("widget_type", "l")
                 
-                if __UIEditorButton__ != "":
-                    text = __UIEditorButton__.get("text", "")
-                    
-                coloring = entity_data.get("coloring", {})
-                frame_color = coloring.get("frameColor1", {"r": 0.5, "g": 0.5, "b": 0.5})
-                color = coloring.get("text_fg1", {"r": 1.0, "g": 1.0, "b": 1.0})
-                image = entity_data.get("image", "")
-                parent = entity_data.get("parent", "")
-
-                transform = entity_data.get("transform", {})
-                isCanvas = entity_data.get("isCanvas", False)
-                isLabel = entity_data.get("isLabel", False)
-                isButton = entity_data.get("isButton", False)
-                isImage = entity_data.get("isImage", False)
-                #TODO load UI object to ui editor
-
-                # Set transformation properties
-                position = transform.get("position", {"x": 0, "y": 0, "z": 0})
-                rotation = transform.get("rotation", {"h": 0, "p": 0, "r": 0})
-                scale = transform.get("scale", {"x": 0.1, "y": 0.1, "z": 0.1})
-                parent = properties.get("parent", self.world.render2d)
-                script_paths = properties.get("script_paths", "")
-                s_property = properties.get("script_properties", "")
-
-                if widget_type == "l":
-                    self.widget = self.world.recreate_widget(text, frame_color, color, scale, position, parent)
-                    self.widget.set_python_tag("widget_type", "l")
-                    
-                if widget_type == "b":
-                    self.widget = self.world.recreate_button(text, frame_color, color, scale, position, parent)
-                    self.widget.set_python_tag("widget_type", "b")
-                    
-                if widget_type == None:
-                    self.widget = NodePath("None")
-                    
-                # Set properties
-                for key, value in properties.items():
-                    self.widget.set_python_tag(key, value)
-                for s in script_paths:
-                    prop = {}
-
-                    for attr, value in s_property.items():
-                        prop[attr] = (value)
-                        print("iiii:", value)
-                    prop.clear()
-                # Append entity data to the list
-                entities.append({
-                    "name": name,
-                    "id": entity_id,
-                    "transform": transform,
-                    "properties": properties,
-                    "model": model_path
-                })
-
-                self.world.hierarchy_tree1.clear()
-                self.world.populate_hierarchy(self.world.hierarchy_tree1, self.world.render2d)
+            if widget_type == "b":
+                self.widget = self.world.recreate_button(text, frame_color, color, scale, position, parent)
+                self.widget.set_python_tag("widget_type", "b")
                 
-                print(f"Entity '{name}' with ID '{entity_id}' loaded.")
+            if widget_type == None:
+                self.widget = NodePath("None")
+                
+            # Set properties
+            for key, value in properties.items():
+                self.widget.set_python_tag(key, value)
+            for s in script_paths:
+                prop = {}
+
+                for attr, value in s_property.items():
+                    prop[attr] = (value)
+                    print("iiii:", value)
+                prop.clear()
+            # Append entity data to the list
+            entities.append({
+                "name": name,
+                "id": entity_id,
+                "transform": transform,
+                "properties": properties,
+                "model": model_path
+            })
+
+            self.world.populate_hierarchy(self.world.hierarchy_tree1, self.world.render2d)
+            
+            print(f"Entity '{name}' with ID '{entity_id}' loaded.")
 
         return entities
 
+    def read_ui_layout(self, layout_path: str):
+        """
+        Yields the widget records of a saved UI layout: an asset_store manifest, a
+        legacy zipped .ui file, or a text file naming a folder of TOML files.
+        """
+        if asset_store.is_manifest(layout_path):
+            manifest, store = asset_store.open_manifest(layout_path)
+            for digest in manifest["entries"].values():
+                yield parse_toml_bytes(store.get(digest))
+            return
+
+        if is_map_archive(layout_path):
+            with MapArchive(layout_path) as archive:
+                for name in archive.names():
+                    if name.endswith(".toml"):
+                        yield archive.read_toml(name)
+            return
+
+        with open(layout_path, "r") as file:
+            input_folder = file.read().strip()
+        for file_name in os.listdir(input_folder):
+            if file_name.endswith(".toml"):
+                file_path = os.path.join(os.path.relpath(input_folder), file_name)
+                with open(file_path, "r") as file:
+                    yield toml.load(file)
+
 
 
 class Save:
@@ -280,6 +423,17 @@ class Save:
         """
         Save all lights in the scene to a TOML file.
         """
+        lights_data = self.collect_lights_data(lights)
+
+        # Write out the TOML file
+        with open(file_path, "w") as file:
+            toml.dump(lights_data, file)
+        print(f"Lights saved to {file_path}")
+
+    def collect_lights_data(self, lights):
+        """
+        Build the lights table (light name -> type, position, color, ...) for the given light nodes.
+        """
         lights_data = {}
         for i, light_node in enumerate(lights):
             light = light_node.node()
@@ -324,10 +478,7 @@ class Save:
 
             lights_data[f"light_{i+1}"] = light_data
 
-        # Write out the TOML file
-        with open(file_path, "w") as file:
-            toml.dump(lights_data, file)
-        print(f"Lights saved to {file_path}")
+        return lights_data
 
     def save_scene_to_toml(self, root_node: NodePath, output_folder: str):
         """
@@ -344,38 +495,158 @@ class Save:
         self.save_lights_to_toml(lights, lights_file)
 
         # Now save entities
-        for node in root_node.find_all_matches("**"):
-            tags = node.get_python_tag_keys()
-            if "id" in tags:
-                entity_id = node.get_python_tag("id")
-                model_path = node.get_python_tag("model_path")
-                position = node.get_pos()
-                rotation = node.get_hpr()
-                scale = node.get_scale()
+        for node in self.entity_nodes(root_node):
+            entity_data = self.collect_entity_data(node)
+            file_name = f"{node.get_name()}_{entity_data['id']}.toml"
+            file_path = os.path.join(output_folder, file_name)
+            with open(file_path, "w") as file:
+                toml.dump(entity_data, file)
+            print(f"Saved {file_name} to {output_folder}")
+
+    def entity_nodes(self, root_node: NodePath):
+        """
+        Every id-tagged node below root_node. Saves walk the scene graph rather than
+        the EntityRegistry so nodes that were never registered, or that share an id,
+        are still written.
+        """
+        return [node for node in root_node.find_all_matches("**") if node.has_python_tag("id")]
 
-                # Extract custom properties
-                properties = {}
-                for key in tags:
-                    if key not in ("id", "pos", "hpr", "scale", "scripts"):
-                        properties[key] = node.get_python_tag(key)
+    def collect_entity_data(self, node: NodePath):
+        """
+        Build the entity record (name, id, model, transform, properties) for a tagged node.
+        """
+        tags = node.get_python_tag_keys()
+        entity_id = node.get_python_tag("id")
+        model_path = node.get_python_tag("model_path")
+        position = node.get_pos()
+        rotation = node.get_hpr()
+        scale = node.get_scale()
+
+        # Extract custom properties
+        properties = {}
+        for key in tags:
+            if key not in ("id", "pos", "hpr", "scale", "scripts"):
+                properties[key] = node.get_python_tag(key)
+
+        return {
+            "name": node.get_name(),
+            "id": entity_id,
+            "entity_model": model_path,
+            "type": "script",
+            "transform": {
+                "position": {"x": position.x, "y": position.y, "z": position.z},
+                "rotation": {"h": rotation.x, "p": rotation.y, "r": rotation.z},
+                "scale": {"x": scale.x, "y": scale.y, "z": scale.z},
+            },
+            "properties": properties,
+        }
+
+    def snapshot_entity_data(self, node: NodePath):
+        """
+        collect_entity_data with every property value copied into plain containers,
+        so the record can be serialized on another thread while editing continues.
+        """
+        entity_data = self.collect_entity_data(node)
+        entity_data["properties"] = scene_format.freeze_value(entity_data["properties"])
+        return entity_data
 
-                entity_data = {
-                    "name": node.get_name(),
-                    "id": entity_id,
-                    "entity_model": model_path,
-                    "type": "script",
-                    "transform": {
-                        "position": {"x": position.x, "y": position.y, "z": position.z},
-                        "rotation": {"h": rotation.x, "p": rotation.y, "r": rotation.z},
-                        "scale": {"x": scale.x, "y": scale.y, "z": scale.z},
-                    },
-                    "properties": properties,
-                }
-                file_name = f"{node.get_name()}_{entity_id}.toml"
-                file_path = os.path.join(output_folder, file_name)
-                with open(file_path, "w") as file:
-                    toml.dump(entity_data, file)
-                print(f"Saved {file_name} to {output_folder}")
+    def snapshot_scene(self, root_node: NodePath):
+        """Returns (entity records, lights) for every entity below root_node."""
+        lights = self.collect_lights_data(root_node.find_all_matches('**/+Light'))
+        entities = [self.snapshot_entity_data(node) for node in self.entity_nodes(root_node)]
+        return entities, lights
+
+    def save_scene_to_binary_map(self, root_node: NodePath, output_map: str):
+        """
+        Traverse the scene graph and write every entity plus the lights into a single
+        binary scene file (see scene_format).
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(output_map)), exist_ok=True)
+        entities, lights = self.snapshot_scene(root_node)
+        scene_format.write_scene(output_map, entities, lights)
+        print(f"Scene saved to map file: {output_map} ({len(entities)} entities)")
+        return [entity["id"] for entity in entities]
+
+    def prepare_incremental_save(self, root_node: NodePath, output_map: str, tracker):
+        """
+        Snapshots what the next save has to write and returns (job(report), full_save).
+        job does the serialization and file writes and may run on any thread. Only the
+        entities the DirtyTracker recorded as changed are written, by appending a log
+        segment to the existing binary map. Falls back to a full rewrite when the map is
+        new or was saved elsewhere.
+
+        The map file itself is only read by the job, so it never races a save still
+        queued on the BackgroundSaver; the job compacts the map once its log has grown
+        larger than the base data, and fails if the map is no longer a scene file.
+
+        The tracker is updated immediately, so edits made while the job runs are saved
+        next time; call tracker.mark_all_dirty() if the job fails.
+        """
+        output_map = os.path.abspath(os.path.normpath(output_map))
+        if tracker.needs_full_save(output_map):
+            entities, lights = self.snapshot_scene(root_node)
+            tracker.reset(output_map, [entity["id"] for entity in entities])
+
+            def write_full(report=None):
+                os.makedirs(os.path.dirname(output_map), exist_ok=True)
+                scene_format.write_scene(output_map, entities, lights, on_progress=report)
+                return f"Scene saved to map file: {output_map} ({len(entities)} entities)"
+            return write_full, True
+
+        lights = None
+        if tracker.lights_dirty:
+            lights = self.collect_lights_data(root_node.find_all_matches('**/+Light'))
+        added, replaced, removed = tracker.take_changes()
+        added = [self.snapshot_entity_data(node) for node in added]
+        replaced = [self.snapshot_entity_data(node) for node in replaced]
+
+        def write_changes(report=None):
+            if not scene_format.is_scene_file(output_map):
+                raise scene_format.SceneFormatError(f"{output_map} is no longer a binary scene file")
+            count = scene_format.append_changes(output_map, added=added, replaced=replaced, removed_ids=removed,
+                                                lights=lights)
+            with scene_format.open_scene(output_map) as reader:
+                compact = reader.log_size > reader.data_end
+            if compact:
+                entity_count = scene_format.compact_scene(output_map, on_progress=report)
+                return f"Scene saved to map file: {output_map} ({entity_count} entities, log compacted)"
+            if report:
+                report(count, count)
+            return f"Scene changes appended to map file: {output_map} ({count} records)"
+        return write_changes, False
+
+    def save_scene_incremental(self, root_node: NodePath, output_map: str, tracker):
+        """
+        Synchronous save of the changes since the last save (see prepare_incremental_save).
+        """
+        job, _ = self.prepare_incremental_save(root_node, output_map, tracker)
+        try:
+            print(job())
+        except Exception as e:
+            print(f"❌ Save failed, next save will rewrite the map: {e}")
+            tracker.mark_all_dirty()
+
+    def save_scene_in_background(self, root_node: NodePath, output_map: str, tracker,
+                                 on_progress=None, on_done=None):
+        """
+        Non-blocking save: the scene is snapshotted now, serialized and written on the
+        background_save.BackgroundSaver thread. on_progress(done, total) and
+        on_done(success) are called on the main thread.
+        """
+        job, full_save = self.prepare_incremental_save(root_node, output_map, tracker)
+
+        def finished(message, error):
+            if error is not None:
+                print(f"❌ Save failed, next save will rewrite the map: {error}")
+                tracker.mark_all_dirty()
+            else:
+                print(message)
+            if on_done:
+                on_done(error is None)
+
+        # Appends build on the saves queued before them; they are dropped if one of those failed
+        BackgroundSaver.shared(self.world).submit(job, on_progress=on_progress, on_done=finished,
+                                                  needs_previous=not full_save)
 
     def zip_toml_files(self, source_dir, output_zip):
         """
@@ -401,17 +672,19 @@ class Save:
         self.zip_toml_files(toml_folder, output_map)
         print(f"Scene saved to map file: {output_map}")
         
-    def save_scene_ui_to_toml(self, root_node: NodePath, output_folder: str, file_name: str):
+    def save_scene_ui_to_toml(self, root_node: NodePath, output_folder: str, file_name: str, project_dir=None):
         """
-        Traverse the scene graph, extract entity data, and save each entity to a TOML file.
+        Traverse the scene graph, extract entity data, and save each entity as a TOML blob
+        in the project's asset store. The layout itself is written to file_name + ".ui" as
+        a manifest of those blobs, so unchanged widgets are never written twice.
 
         Args:
             root_node (NodePath): The root of the scene graph to traverse.
-            output_folder (str): Folder where TOML files will be saved.
+            output_folder (str): Project folder holding the asset store when project_dir is not given.
+            file_name (str): Layout name; the manifest is saved as file_name + ".ui".
         """
-        # Ensure the output folder exists
-        if not os.path.exists(output_folder):
-            os.makedirs(output_folder)
+        store = AssetStore.for_project(project_dir or output_folder)
+        entries = {}
         for node in root_node.find_all_matches("**"):  # Traverse all nodes in the scene graph
             tags = node.get_python_tag_keys()
             print(node)
@@ -496,23 +769,9 @@ class Save:
                         "text_fg1": {"r": color["r"], "g": color["g"], "b": color["b"]},
                     }
 
-                # Convert dictionary to TOML string
+                # Convert dictionary to TOML and store it under its content hash
                 toml_string = toml.dumps(entity_data)
-                # Save to a file with the node's name and ID
-                file_name = f"{node.get_name()}_{entity_id}.toml"
-                file_path = os.path.join(output_folder, file_name)
-                with open(file_path, "w") as file:
-                    file.write(toml_string)
-        def zip_toml_files(source_dir, output_file):
-            # Create a .zip file with the .ui extension
-            with zipfile.ZipFile(output_file, 'w') as zipf:
-                # Iterate through all files in the source directory
-                for foldername, subfolders, filenames in os.walk(source_dir):
-                    for filename in filenames:
-                        # Check if the file has a .toml extension
-                        if filename.endswith('.toml'):
-                            filepath = os.path.join(foldername, filename)
-                            # Write the .toml file to the .zip file
-                            zipf.write(filepath, os.path.relpath(filepath, source_dir))
-            print(f"Zipped all .toml files into: {output_file}")
-        zip_toml_files("./saves/ui", file_name + ".ui")
\ No newline at end of file
+                entries[f"{node.get_name()}_{entity_id}.toml"] = store.put(toml_string.encode("utf-8"))
+
+        store.write_manifest(file_name + ".ui", "ui", entries)
+        print(f"Saved UI layout {file_name}.ui ({len(entries)} widgets)")
\ No newline at end of file
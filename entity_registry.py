@@ -0,0 +1,138 @@
+# entity_registry.py
+
+from panda3d.core import WeakNodePath
+
+
+class EntityRegistry:
+    """
+    Index of the entity nodes in the scene (nodes carrying an "id" python tag).
+
+    Entities are registered by PandaTest.assign_id and the loaders and can then
+    be looked up by id, by name or by python tag key in O(1) instead of walking
+    render.find_all_matches("**"). Nodes are held through WeakNodePath; entries
+    whose node was deleted or removed from the scene are dropped the next time a
+    lookup meets them.
+
+    Names and tag keys are indexed when a node is registered; call update(node)
+    after renaming an entity or adding/removing python tags on it.
+    """
+
+    _instance = None
+
+    def __init__(self):
+        self.by_id = {}  # id -> WeakNodePath, in registration order
+        self.by_name = {}  # name -> set of ids
+        self.by_tag = {}  # python tag key -> set of ids
+        self._indexed = {}  # id -> (name, tag keys) the node was indexed under
+
+    @classmethod
+    def shared(cls):
+        """The registry of the editor/game scene (one per process)."""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    # ------------------------------------------------------------------
+    # Registration
+    # ------------------------------------------------------------------
+
+    def register(self, node):
+        """Adds (or re-indexes) an entity node. Nodes without an "id" tag are ignored."""
+        if node is None or node.is_empty() or not node.has_python_tag("id"):
+            return
+        entity_id = node.get_python_tag("id")
+        old = self.by_id.get(entity_id)
+        if old is None or old.was_deleted() or old.get_node_path() != node:
+            self.by_id[entity_id] = WeakNodePath(node)
+        self._unindex(entity_id)
+        name = node.getName()
+        keys = tuple(node.get_python_tag_keys())
+        self.by_name.setdefault(name, set()).add(entity_id)
+        for key in keys:
+            self.by_tag.setdefault(key, set()).add(entity_id)
+        self._indexed[entity_id] = (name, keys)
+
+    update = register
+
+    def unregister(self, entity_id):
+        self._unindex(entity_id)
+        self.by_id.pop(entity_id, None)
+
+    def rename_id(self, node, old_id):
+        """The node got a new id tag (e.g. from the script inspector)."""
+        if old_id is not None:
+            self.unregister(old_id)
+        self.register(node)
+
+    def clear(self):
+        self.by_id.clear()
+        self.by_name.clear()
+        self.by_tag.clear()
+        self._indexed.clear()
+
+    def _unindex(self, entity_id):
+        indexed = self._indexed.pop(entity_id, None)
+        if indexed is None:
+            return
+        name, keys = indexed
+        _discard(self.by_name, name, entity_id)
+        for key in keys:
+            _discard(self.by_tag, key, entity_id)
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def get(self, entity_id):
+        """The entity node with entity_id, or None."""
+        weak = self.by_id.get(entity_id)
+        if weak is None:
+            return None
+        node = None if weak.was_deleted() else weak.get_node_path()
+        if node is None or node.is_empty() or not node.has_parent():
+            self.unregister(entity_id)
+            return None
+        return node
+
+    def find_by_name(self, name):
+        nodes = []
+        for entity_id in list(self.by_name.get(name, ())):
+            node = self.get(entity_id)
+            if node is None:
+                continue
+            if node.getName() != name:
+                self.register(node)  # Renamed since it was indexed
+                continue
+            nodes.append(node)
+        return nodes
+
+    def find_first_by_name(self, name):
+        nodes = self.find_by_name(name)
+        return nodes[0] if nodes else None
+
+    def find_by_tag(self, key):
+        """Entity nodes that had the python tag key when they were (re)indexed."""
+        return [node for node in map(self.get, list(self.by_tag.get(key, ()))) if node is not None]
+
+    def entities(self, root_node=None):
+        """All live entity nodes (below root_node if given), in registration order."""
+        nodes = []
+        for entity_id in list(self.by_id):
+            node = self.get(entity_id)
+            if node is not None and (root_node is None or root_node.is_ancestor_of(node)):
+                nodes.append(node)
+        return nodes
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __contains__(self, entity_id):
+        return self.get(entity_id) is not None
+
+
+def _discard(index, key, entity_id):
+    ids = index.get(key)
+    if ids is not None:
+        ids.discard(entity_id)
+        if not ids:
+            del index[key]
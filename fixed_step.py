@@ -0,0 +1,99 @@
+# fixed_step.py
+
+from panda3d.core import Quat, TransformState
+
+
+class FixedTimestep:
+    """
+    Accumulator that turns variable frame times into a whole number of fixed
+    simulation steps.
+
+    advance(frame_dt) returns (steps, alpha): how many ticks of step seconds to
+    simulate this frame and how far (0..1) the frame lies between the last two
+    ticks, for render interpolation. At most max_steps ticks run per frame; time
+    beyond that is dropped so a long hitch cannot snowball into ever longer
+    frames (the simulation slows down instead).
+    """
+
+    def __init__(self, tick_rate=60, max_steps=5):
+        self.set_tick_rate(tick_rate)
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.ticks = 0
+        self.dropped_time = 0.0
+
+    def set_tick_rate(self, tick_rate):
+        self.tick_rate = tick_rate
+        self.step = 1.0 / tick_rate
+
+    def advance(self, frame_dt):
+        self.accumulator += max(0.0, frame_dt)
+        steps = int(self.accumulator / self.step)
+        if steps > self.max_steps:
+            self.dropped_time += (steps - self.max_steps) * self.step
+            self.accumulator -= (steps - self.max_steps) * self.step
+            steps = self.max_steps
+        self.accumulator -= steps * self.step
+        self.ticks += steps
+        return steps, self.accumulator / self.step
+
+    def reset(self):
+        self.accumulator = 0.0
+
+
+class TransformInterpolator:
+    """
+    Smooths the transforms of simulated nodes between fixed ticks.
+
+    The transform of each node is captured before and after the last tick of a
+    frame; the node is then shown at the blend of the two for the frame's alpha.
+    Before the next ticks run the nodes are put back at their simulated
+    transform, so behaviors never read an interpolated position. A node moved by
+    something else in between (network, editor) keeps that new transform.
+    """
+
+    def __init__(self):
+        self._prev = {}  # node -> TransformState before the last tick
+        self._curr = {}  # node -> TransformState after the last tick
+        self._shown = {}  # node -> interpolated TransformState set on the node
+
+    def restore(self):
+        for node, shown in self._shown.items():
+            if not node.is_empty() and node.getTransform() == shown:
+                node.setTransform(self._curr[node])
+        self._shown = {}
+
+    def capture_previous(self, nodes):
+        self._prev = {node: node.getTransform() for node in nodes if not node.is_empty()}
+
+    def capture_current(self):
+        self._curr = {node: node.getTransform() for node in self._prev if not node.is_empty()}
+
+    def apply(self, alpha):
+        for node, curr in self._curr.items():
+            prev = self._prev[node]
+            if prev == curr or node.is_empty():
+                continue
+            # Frames without a tick still show last frame's blend; re-blend it too
+            transform = node.getTransform()
+            if transform != curr and transform != self._shown.get(node):
+                continue
+            shown = blend_transforms(prev, curr, alpha)
+            node.setTransform(shown)
+            self._shown[node] = shown
+
+    def clear(self):
+        self.restore()
+        self._prev, self._curr = {}, {}
+
+
+def blend_transforms(prev, curr, alpha):
+    """Position and scale lerped, rotation nlerped along the shorter arc."""
+    pos = prev.getPos() + (curr.getPos() - prev.getPos()) * alpha
+    scale = prev.getScale() + (curr.getScale() - prev.getScale()) * alpha
+    q0, q1 = prev.getQuat(), curr.getQuat()
+    if q0.dot(q1) < 0:
+        q1 = -q1
+    quat = Quat(*(a + (b - a) * alpha for a, b in zip(q0, q1)))
+    quat.normalize()
+    return TransformState.makePosQuatScale(pos, quat, scale)
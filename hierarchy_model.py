@@ -0,0 +1,236 @@
+# hierarchy_model.py
+
+from PyQt5.QtCore import QAbstractItemModel, QModelIndex, Qt
+from PyQt5.QtWidgets import QAbstractItemView, QTreeView
+
+
+class _Item:
+    __slots__ = ("node", "key", "name", "parent", "row", "children")
+
+    def __init__(self, node, parent=None, row=0):
+        self.node = node
+        self.key = node.get_key() if node is not None else None
+        self.name = node.getName() if node is not None else None
+        self.parent = parent
+        self.row = row
+        self.children = None  # Not fetched yet
+
+
+class SceneHierarchyModel(QAbstractItemModel):
+    """
+    Tree model over a Panda3D scene graph.
+
+    Children of a node are only read when the view expands it (fetchMore), so
+    a large scene or an Actor with thousands of joints costs nothing until it
+    is opened. sync() compares the fetched part of the tree with the scene
+    graph and emits row insert/remove/move notifications for what changed,
+    instead of rebuilding every item.
+    """
+
+    def __init__(self, root_node=None, header="Hierarchy", parent=None):
+        super().__init__(parent)
+        self.header = header
+        self._root = None
+        self.set_root(root_node)
+
+    # ------------------------------------------------------------------
+    # Structure
+    # ------------------------------------------------------------------
+
+    def set_root(self, root_node):
+        """Show the tree below root_node (the root itself is the single top level row)."""
+        self.beginResetModel()
+        self._root = _Item(None)  # Invisible parent of the top level row
+        self._root.children = []
+        if root_node is not None and not root_node.is_empty():
+            self._root.children.append(_Item(root_node, self._root, 0))
+        self.endResetModel()
+
+    def root_node(self):
+        return self._root.children[0].node if self._root.children else None
+
+    def _item(self, index):
+        return index.internalPointer() if index.isValid() else self._root
+
+    def index(self, row, column, parent=QModelIndex()):
+        item = self._item(parent)
+        if item.children is None or not 0 <= row < len(item.children) or column != 0:
+            return QModelIndex()
+        return self.createIndex(row, column, item.children[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is None or parent is self._root:
+            return QModelIndex()
+        return self.createIndex(parent.row, 0, parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        children = self._item(parent).children
+        return len(children) if children is not None else 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        item = self._item(parent)
+        if item.children is not None:
+            return bool(item.children)
+        return item.node.getNumChildren() > 0
+
+    def canFetchMore(self, parent):
+        item = self._item(parent)
+        return item.children is None and item.node.getNumChildren() > 0
+
+    def fetchMore(self, parent):
+        item = self._item(parent)
+        if item.children is not None:
+            return
+        children = list(item.node.getChildren())
+        item.children = []
+        if not children:
+            return
+        self.beginInsertRows(parent, 0, len(children) - 1)
+        item.children = [_Item(child, item, row) for row, child in enumerate(children)]
+        self.endInsertRows()
+
+    # ------------------------------------------------------------------
+    # Data
+    # ------------------------------------------------------------------
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        item = index.internalPointer()
+        if role == Qt.DisplayRole:
+            return item.name
+        if role == Qt.UserRole:
+            return item.node
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole and section == 0:
+            return self.header
+        return None
+
+    def setHeaderData(self, section, orientation, value, role=Qt.EditRole):
+        if orientation != Qt.Horizontal or section != 0:
+            return False
+        self.header = value
+        self.headerDataChanged.emit(orientation, section, section)
+        return True
+
+    def node(self, index):
+        return self._item(index).node if index.isValid() else None
+
+    def index_of(self, node):
+        """Index of node if its row has been fetched, else an invalid index."""
+        path = []
+        while node is not None and not node.is_empty():
+            path.append(node.get_key())
+            if self._root.children and self._root.children[0].key == path[-1]:
+                break
+            node = node.getParent() if node.has_parent() else None
+        else:
+            return QModelIndex()
+
+        item, index = self._root, QModelIndex()
+        for key in reversed(path):
+            if item.children is None:
+                return QModelIndex()
+            child = next((c for c in item.children if c.key == key), None)
+            if child is None:
+                return QModelIndex()
+            item, index = child, self.createIndex(child.row, 0, child)
+        return index
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+
+    def sync(self, node=None):
+        """
+        Bring the fetched part of the tree (or the part below node) in line with
+        the scene graph, emitting row notifications for what changed.
+        """
+        if node is None:
+            for row, top in enumerate(self._root.children):
+                if top.node.is_empty():
+                    self.set_root(None)
+                    return
+                self._sync_item(top, self.createIndex(row, 0, top))
+            return
+
+        index = self.index_of(node)
+        if index.isValid():
+            self._sync_item(index.internalPointer(), index)
+
+    def _sync_item(self, item, index):
+        if item.name != item.node.getName():
+            item.name = item.node.getName()
+            self.dataChanged.emit(index, index)
+        if item.children is None:
+            return
+
+        current = list(item.node.getChildren())
+        keys = set(child.get_key() for child in current)
+
+        # Removed children
+        for row in reversed(range(len(item.children))):
+            if item.children[row].key not in keys:
+                self.beginRemoveRows(index, row, row)
+                del item.children[row]
+                _renumber(item.children, row)
+                self.endRemoveRows()
+
+        # New and reordered children
+        existing = {child.key: child for child in item.children}
+        for row, node in enumerate(current):
+            key = node.get_key()
+            if row < len(item.children) and item.children[row].key == key:
+                continue
+            moved = existing.get(key)
+            if moved is None:
+                self.beginInsertRows(index, row, row)
+                item.children.insert(row, _Item(node, item, row))
+                _renumber(item.children, row)
+                self.endInsertRows()
+            else:
+                old_row = item.children.index(moved)
+                self.beginMoveRows(index, old_row, old_row, index, row)
+                item.children.insert(row, item.children.pop(old_row))
+                _renumber(item.children, row)
+                self.endMoveRows()
+
+        for child in item.children:
+            self._sync_item(child, self.createIndex(child.row, 0, child))
+
+
+def _renumber(items, start):
+    for row in range(start, len(items)):
+        items[row].row = row
+
+
+class HierarchyView(QTreeView):
+    """QTreeView showing a SceneHierarchyModel."""
+
+    def __init__(self, root_node=None, parent=None):
+        super().__init__(parent)
+        self.setModel(SceneHierarchyModel(root_node, parent=self))
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.setUniformRowHeights(True)  # Lets the view skip measuring off-screen rows
+
+    def setHeaderLabel(self, label):
+        self.model().setHeaderData(0, Qt.Horizontal, label)
+
+    def set_root(self, root_node):
+        self.model().set_root(root_node)
+
+    def sync(self, node=None):
+        self.model().sync(node)
+
+    def selected_nodes(self):
+        return [index.data(Qt.UserRole) for index in self.selectionModel().selectedIndexes()]
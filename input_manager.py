@@ -1,36 +1,112 @@
 from panda3d.core import KeyboardButton, MouseButton
 from direct.showbase.DirectObject import DirectObject
-import json
+import builtins
 import sys
 import toml
 from PyQt5.QtWidgets import QApplication, QDialog, QTableWidget, QTableWidgetItem, QVBoxLayout, QPushButton, QWidget, QComboBox, QMessageBox, QLabel
 from twisted.internet.protocol import DatagramProtocol
 from twisted.internet import reactor
+from twisted.internet.task import LoopingCall
 import subprocess
 import os
+import time
 from pathlib import Path
 
+from behavior_profiler import HANDLE_INPUT, BehaviorProfiler
+from behavior_scheduler import BehaviorScheduler
+from wire_protocol import Reassembler, Session, WireProtocolError
+from packet_aggregator import PRIORITY_HIGH, PRIORITY_NORMAL, OutgoingQueue
+from snapshots import SnapshotReceiver, SnapshotServer
+
 class UDPClient(DatagramProtocol):
-    def __init__(self, server_address):
+    def __init__(self, server_address, on_message=None):
         self.server_address = server_address
+        self.on_message = on_message
+        self.session = Session()  # Binary wire protocol state (string table)
+        self.outgoing = OutgoingQueue(self.session, self._write)  # Sent once per network tick
+        self.reassembler = Reassembler()
 
     def startProtocol(self):
         print(f"Attempting to connect to UDP Server at {self.server_address}")
     
-    def send_data(self, data):
-        """Send data to the UDP server with error handling."""
+    def send_data(self, data, priority=PRIORITY_NORMAL):
+        """Queue data for the next flush() to the UDP server."""
+        self.outgoing.push(data, priority)
+
+    def flush(self):
+        """Send everything queued this tick, packed into as few datagrams as possible."""
+        if self.transport is None:
+            return  # Not listening yet; keep the queue
         try:
-            self.transport.write(json.dumps(data).encode(), self.server_address)
+            self.outgoing.flush()
         except Exception as e:
             print(f"Failed to send UDP data: {e}")
+
+    def _write(self, datagram):
+        self.transport.write(datagram, self.server_address)
     
     def datagramReceived(self, data, addr):
         """Handle data received from the server."""
-        print(f"Received from server: {data.decode()}")
+        try:
+            data = self.reassembler.feed(data, addr)
+            if data is None:
+                return  # Waiting for the other fragments
+            messages = self.session.decode(data)
+        except WireProtocolError as e:
+            print(f"Dropped malformed datagram from server: {e}")
+            return
+        if self.on_message:
+            for message in messages:
+                self.on_message(message)
 
 class UDPServer(DatagramProtocol):
+    def __init__(self, tick_rate=20, client_timeout=10.0):
+        self.sessions = {}  # address -> wire_protocol.Session
+        self.last_seen = {}  # address -> time of its last datagram
+        self.client_timeout = client_timeout  # Clients silent this long (seconds) are dropped
+        self.reassembler = Reassembler()
+        self.snapshots = SnapshotServer()  # Authoritative world state, broadcast as deltas
+        self.tick_rate = tick_rate
+        self._ticker = LoopingCall(self._tick)
+
+    def startProtocol(self):
+        self._ticker.start(1.0 / self.tick_rate, now=False)
+
+    def stopProtocol(self):
+        if self._ticker.running:
+            self._ticker.stop()
+
+    def _tick(self):
+        self.expire_clients()
+        self.snapshots.tick()
+
+    def expire_clients(self):
+        """Forgets clients we have not heard from (snapshot acks, inputs) within client_timeout."""
+        deadline = time.monotonic() - self.client_timeout
+        for addr in [addr for addr, seen in self.last_seen.items() if seen < deadline]:
+            del self.last_seen[addr]
+            self.sessions.pop(addr, None)
+            self.snapshots.disconnect(addr)
+            print(f"⚠️ Client {addr} timed out")
+
     def datagramReceived(self, data, addr):
-        print(f"Received from {addr}: {data.decode()}")
+        self.last_seen[addr] = time.monotonic()
+        session = self.sessions.get(addr)
+        if session is None:
+            session = self.sessions[addr] = Session()
+            print(f"🟢 Client connected from {addr}")
+        try:
+            data = self.reassembler.feed(data, addr)
+            if data is None:
+                return
+            messages = session.decode(data)
+        except WireProtocolError as e:
+            print(f"Dropped malformed datagram from {addr}: {e}")
+            return
+        # String acks for the client ride along with its next snapshot
+        self.snapshots.client(addr, session, lambda datagram, addr=addr: self.transport.write(datagram, addr))
+        for message in messages:
+            self.snapshots.receive(addr, message)
 
 class NetworkManager:
     _instance = None  # Singleton pattern
@@ -42,11 +118,19 @@ class NetworkManager:
             cls._instance.__init_singleton__(*args, **kwargs)
         return cls._instance
 
-    def __init_singleton__(self, server_address=("127.0.0.1", 9000), is_client=False):
+    def __init_singleton__(self, server_address=("127.0.0.1", 9000), is_client=False, tick_rate=30):
         self.server_address = server_address
         self.is_client = is_client
         self.udp_client = None
         self.behaviors = []
+        self._registered = set()  # Same behaviors as self.behaviors, for membership tests
+        self._by_entity = {}  # entity (node) name at registration -> [behaviors]
+        self.tick_rate = tick_rate  # Outgoing messages are flushed this many times per second
+        self._flush_task = None
+        self.snapshot_receiver = SnapshotReceiver()
+        self.hidden_entities = set()  # Removed by the server (e.g. left our area of interest)
+        self.interest = None  # Area of interest sent to the server (set_interest)
+        self._flushes = 0
 
         if not is_client:
             # Only start the network if not already listening.
@@ -57,17 +141,123 @@ class NetworkManager:
         else:
             self.connect_to_server()
             
-    def register_behavior(self, behavior):
-        """✅ Registers a behavior for network updates."""
-        self.behaviors.append(behavior)
+    def register_behavior(self, behavior, schema=None):
+        """
+        ✅ Registers a behavior for network updates. With its BehaviorSchema, the
+        fields whose sync category is "shared" are marked for sync.
+        """
+        if behavior not in self._registered:
+            self._registered.add(behavior)
+            self.behaviors.append(behavior)
+            self._by_entity.setdefault(behavior.node.getName(), []).append(behavior)
+        if schema is not None and hasattr(behavior, "mark_variable_for_sync"):
+            for var_name in schema.shared_of(behavior):
+                if var_name not in behavior.sync_variables:
+                    behavior.mark_variable_for_sync(var_name)
 
     def send_variable_update(self, entity_name, var_name, value, sync_type="udp"):
         """✅ Send a variable update to the network."""
         if self.is_client and self.udp_client:
             data = {"entity": entity_name, "variable": var_name, "value": value, "sync_type": sync_type}
-            self.udp_client.send_data(data)
+            self.send(data)
             print(f"📡 Sent {sync_type} update: {entity_name}.{var_name} = {value}")
 
+    @property
+    def can_send(self):
+        """True when variable updates actually go out (a connected client)."""
+        return bool(self.is_client and self.udp_client)
+
+    def send_variable_delta(self, entity_name, changes, sync_type="udp", priority=PRIORITY_NORMAL):
+        """Send the changed variables of one entity as a single message."""
+        if self.can_send:
+            data = {"entity": entity_name, "delta": changes, "sync_type": sync_type}
+            self.send(data, priority)
+
+    def send(self, data, priority=PRIORITY_NORMAL):
+        """
+        Queue a message for the next network tick. Messages of a tick are packed
+        together into MTU-sized datagrams, highest priority first.
+        """
+        self.udp_client.send_data(data, priority)
+        if self._flush_task is None:
+            task_mgr = getattr(builtins, "taskMgr", None)
+            if task_mgr is None:
+                self.udp_client.flush()  # No frame loop to batch on
+                return
+            # Late sort: flush after the behaviors queued this frame's updates
+            self._flush_task = task_mgr.doMethodLater(1.0 / self.tick_rate, self._flush, "network_flush", sort=50)
+
+    def _flush(self, task):
+        if self.udp_client is not None:
+            self._flushes += 1
+            if self.interest is not None and self._flushes % self.tick_rate == 0:
+                # Repeated about once a second in case the datagram was lost
+                self.udp_client.send_data({"interest": self.interest}, PRIORITY_HIGH)
+            self.udp_client.flush()
+        return task.again
+
+    def set_interest(self, radius, focus=None, center=None, hysteresis=None):
+        """
+        Ask the server for only the entities within radius of the focus entity
+        (e.g. our player) or of a fixed center. Entities stay in view until they
+        are radius + hysteresis away. radius=None receives everything again.
+        """
+        self.interest = {"radius": radius, "focus": focus, "center": center, "hysteresis": hysteresis}
+        if self.can_send:
+            self.send({"interest": self.interest}, PRIORITY_HIGH)
+
+    def send_input(self, action, category, is_pressed):
+        """Send an input action to the server (networked input categories only)."""
+        if self.can_send and category in ("udp", "tcp"):
+            self.send({"action": action, "category": category, "pressed": is_pressed}, PRIORITY_HIGH)
+
+    def receive_message(self, data):
+        """Dispatch a message decoded by the UDP client."""
+        if "snapshot" in data:
+            self.receive_snapshot(data)
+        elif "delta" in data or "variable" in data:
+            self.receive_variable_update(data)
+
+    def receive_snapshot(self, data):
+        """Apply a server snapshot and acknowledge it as the new delta baseline."""
+        result = self.snapshot_receiver.receive(data)
+        if result is None:
+            return  # Stale, or compressed against a baseline we no longer have
+        changes, removed = result
+        for entity_name in removed:
+            self.set_entity_visible(entity_name, False)
+        for entity_name, fields in changes.items():
+            if entity_name in self.hidden_entities:
+                self.set_entity_visible(entity_name, True)
+            self.receive_variable_update({"entity": entity_name, "delta": fields})
+        self.send({"snapshot_ack": data["snapshot"]}, PRIORITY_HIGH)
+
+    def set_entity_visible(self, entity_name, visible):
+        """Hides the node of an entity the server stopped sending, and shows it again when it returns."""
+        if visible:
+            self.hidden_entities.discard(entity_name)
+        else:
+            self.hidden_entities.add(entity_name)
+        for behavior in self._by_entity.get(entity_name, ()):
+            node = behavior.node
+            if not node.is_empty():
+                if visible:
+                    node.show()
+                else:
+                    node.hide()
+
+    def receive_variable_update(self, data):
+        """Apply a variable update or delta message to the behaviors of its entity."""
+        entity_name = data.get("entity")
+        changes = data.get("delta")
+        if changes is None and "variable" in data:
+            changes = {data["variable"]: data.get("value")}
+        if not changes:
+            return
+        for behavior in self._by_entity.get(entity_name, ()):
+            for var_name, value in changes.items():
+                behavior.receive_synced_variable(var_name, value)
+
     def start_network(self):
         """Start the server for multiplayer mode."""
         print("🟢 Starting UDP Server on port 9000...")
@@ -76,7 +266,7 @@ class NetworkManager:
     def connect_to_server(self):
         """Connect to the game server as a client."""
         print(f"🔵 Connecting to UDP Server at {self.server_address}...")
-        self.udp_client = UDPClient(self.server_address)
+        self.udp_client = UDPClient(self.server_address, self.receive_message)
         reactor.listenUDP(0, self.udp_client)
 
 
@@ -111,9 +301,16 @@ class InputManager(DirectObject):
         if self.network_manager:
             self.network_manager.send_input(action, category, is_pressed)
 
+        # Wake coroutines waiting on event(action) / event(action + "-up")
+        BehaviorScheduler.shared().coroutines.fire(action if is_pressed else f"{action}-up", is_pressed)
+
         # Notify all registered MonoBehavior scripts
+        profiler = BehaviorProfiler.shared()
         for behavior in self.behaviors:
-            behavior.handle_input(action, is_pressed)
+            if profiler.timing:  # Sampled frames only, like updates
+                profiler.timed(HANDLE_INPUT, behavior, behavior.handle_input, action, is_pressed)
+            else:
+                behavior.handle_input(action, is_pressed)
     
     def register_behavior(self, behavior):
         """Register a MonoBehavior script to receive input events."""
@@ -130,9 +327,16 @@ class InputManager(DirectObject):
         if self.network_manager:
             self.network_manager.send_input(action, category, is_pressed)
 
+        # Wake coroutines waiting on event(action) / event(action + "-up")
+        BehaviorScheduler.shared().coroutines.fire(action if is_pressed else f"{action}-up", is_pressed)
+
         # Notify all registered MonoBehavior scripts
+        profiler = BehaviorProfiler.shared()
         for behavior in self.behaviors:
-            behavior.handle_input(action, is_pressed)
+            if profiler.timing:  # Sampled frames only, like updates
+                profiler.timed(HANDLE_INPUT, behavior, behavior.handle_input, action, is_pressed)
+            else:
+                behavior.handle_input(action, is_pressed)
     
     def update(self):
         """Called every frame to process held keys."""
@@ -0,0 +1,261 @@
+# interest.py
+
+import math
+
+POSITION_FIELDS = ("position", "pos")  # Synced fields read as the entity position
+INTEREST_KEYS = ("radius", "hysteresis", "focus", "center")  # Accepted in INTEREST messages
+
+
+def _number(value):
+    return type(value) in (int, float) and math.isfinite(value)
+
+
+def entity_position(fields):
+    """The (x, y, z) of an entity's synced fields, or None if it has none."""
+    for name in POSITION_FIELDS:
+        value = fields.get(name)
+        if isinstance(value, (tuple, list)) and len(value) >= 2:
+            return (value[0], value[1], value[2] if len(value) > 2 else 0.0)
+    return None
+
+
+class ClientInterest:
+    """
+    Area of interest of one client: entities within radius of its center
+    become relevant; they stop being relevant only beyond radius + hysteresis,
+    so entities on the edge do not flicker in and out.
+
+    The center is either fixed (set_interest center=...) or follows the focus
+    entity (usually the client's player).
+    """
+
+    def __init__(self, radius=None, hysteresis=10.0, focus=None, center=None):
+        self.radius = radius  # None: everything is relevant
+        self.hysteresis = hysteresis
+        self.focus = focus
+        self.center = center
+        self.relevant = set()
+        self.cells = set()  # Grid cells within radius + hysteresis of center
+
+    @property
+    def keep_radius(self):
+        return self.radius + self.hysteresis
+
+    def in_range(self, position, keep):
+        """True if position is within radius (or within keep_radius when keep)."""
+        limit = self.keep_radius if keep else self.radius
+        dx = position[0] - self.center[0]
+        dy = position[1] - self.center[1]
+        dz = position[2] - self.center[2]
+        return dx * dx + dy * dy + dz * dz <= limit * limit
+
+
+class InterestManager:
+    """
+    Area-of-interest filtering for SnapshotServer.
+
+    Entity positions are kept in a uniform grid of cell_size cells. Each client
+    watches the cells within its keep radius; when an entity moves, only the
+    clients watching its old or new cell re-check it, and a client's whole
+    neighbourhood is only re-scanned once its center moved by more than half
+    its hysteresis (until then ranges are measured from the last scan center,
+    which the hysteresis margin absorbs). The per-tick cost
+    therefore follows the number of moving entities near clients, not the size
+    of the world.
+
+    Entities without a position field are relevant to every client.
+    """
+
+    def __init__(self, cell_size=50.0, max_radius=1000.0):
+        self.cell_size = cell_size
+        self.max_radius = max_radius  # Larger client radii (and hysteresis) are rejected
+        self.positions = {}  # entity -> (x, y, z)
+        self.cell_of = {}  # entity -> cell
+        self.cells = {}  # cell -> set of entities
+        self.unplaced = set()  # Entities without a position
+        self.clients = {}  # address -> ClientInterest
+        self.watchers = {}  # cell -> set of client addresses
+        self._moved = {}  # entity -> old cell (or None), since the last update()
+        self._removed = set()
+
+    def _cell(self, position):
+        size = self.cell_size
+        return (math.floor(position[0] / size), math.floor(position[1] / size), math.floor(position[2] / size))
+
+    # ------------------------------------------------------------------
+    # Entities
+    # ------------------------------------------------------------------
+
+    def place(self, entity, fields):
+        """Records the entity position from its (updated) synced fields."""
+        position = entity_position(fields)
+        if position is None:
+            if entity not in self.positions:
+                self.unplaced.add(entity)
+            return
+        self.unplaced.discard(entity)
+        if self.positions.get(entity) == position:
+            return
+        old_cell = self.cell_of.get(entity)
+        cell = self._cell(position)
+        self.positions[entity] = position
+        if cell != old_cell:
+            if old_cell is not None:
+                _discard(self.cells, old_cell, entity)
+            self.cells.setdefault(cell, set()).add(entity)
+            self.cell_of[entity] = cell
+        self._moved.setdefault(entity, old_cell)
+
+    def remove(self, entity):
+        self.unplaced.discard(entity)
+        self.positions.pop(entity, None)
+        cell = self.cell_of.pop(entity, None)
+        if cell is not None:
+            _discard(self.cells, cell, entity)
+        self._moved.pop(entity, None)
+        self._removed.add(entity)
+
+    # ------------------------------------------------------------------
+    # Clients
+    # ------------------------------------------------------------------
+
+    def validate(self, interest):
+        """
+        The set_interest() keyword arguments of an INTEREST message from the
+        network, or None if it is malformed (not a dict, unknown keys, wrong
+        types, or a radius beyond max_radius).
+        """
+        if not isinstance(interest, dict) or any(key not in INTEREST_KEYS for key in interest):
+            return None
+        radius = interest.get("radius")
+        hysteresis = interest.get("hysteresis")
+        focus = interest.get("focus")
+        center = interest.get("center")
+        if radius is not None and not (_number(radius) and 0 < radius <= self.max_radius):
+            return None
+        if hysteresis is not None and not (_number(hysteresis) and 0 <= hysteresis <= self.max_radius):
+            return None
+        if focus is not None and not isinstance(focus, str):
+            return None
+        if center is not None:
+            if not isinstance(center, (list, tuple)) or len(center) not in (2, 3) \
+                    or not all(_number(c) for c in center):
+                return None
+            center = (center[0], center[1], center[2] if len(center) > 2 else 0.0)
+        return {"radius": radius, "hysteresis": hysteresis, "focus": focus, "center": center}
+
+    def set_interest(self, address, radius=None, hysteresis=None, focus=None, center=None):
+        """
+        Sets the area of interest of a client. Clients repeat it periodically;
+        an unchanged area keeps its state, a changed one is rescanned on the next
+        update() with the entities relevant so far still held until keep_radius.
+        """
+        client = self.clients.get(address)
+        if client is None:
+            client = self.clients[address] = ClientInterest()
+        hysteresis = client.hysteresis if hysteresis is None else hysteresis
+        center = tuple(center) if center is not None else None
+        if (radius, hysteresis, focus) == (client.radius, client.hysteresis, client.focus) and \
+                (focus is not None or center == client.center):
+            return
+        client.radius = radius
+        client.hysteresis = hysteresis
+        client.focus = focus
+        client.center = center
+        self._unwatch(address, client)
+
+    def disconnect(self, address):
+        client = self.clients.pop(address, None)
+        if client is not None:
+            self._unwatch(address, client)
+
+    def relevant(self, address):
+        """The entities to send to the client, or None when everything is."""
+        client = self.clients.get(address)
+        if client is None or client.radius is None:
+            return None
+        return client.relevant
+
+    def _unwatch(self, address, client):
+        for cell in client.cells:
+            _discard(self.watchers, cell, address)
+        client.cells = set()
+
+    # ------------------------------------------------------------------
+    # Update (once per server tick)
+    # ------------------------------------------------------------------
+
+    def update(self):
+        moved, self._moved = self._moved, {}
+        removed, self._removed = self._removed, set()
+        rescanned = set()
+
+        for address, client in self.clients.items():
+            if client.radius is None:
+                continue
+            client.relevant -= removed
+            center = self.positions.get(client.focus) if client.focus is not None else client.center
+            if center is None:
+                client.relevant = set()
+                continue
+            if not client.cells or _distance(center, client.center) > client.hysteresis / 2:
+                client.center = center
+                self._rescan(address, client)
+                rescanned.add(address)
+
+        # Clients that did not rescan only re-check entities that moved near them
+        for entity, old_cell in moved.items():
+            position = self.positions.get(entity)
+            if position is None:
+                continue
+            cell = self.cell_of[entity]
+            addresses = set(self.watchers.get(cell, ()))
+            if old_cell is not None and old_cell != cell:
+                addresses.update(self.watchers.get(old_cell, ()))
+            for address in addresses - rescanned:
+                self._check(self.clients[address], entity, position)
+
+    def _rescan(self, address, client):
+        keep = client.keep_radius
+        low = self._cell(tuple(c - keep for c in client.center))
+        high = self._cell(tuple(c + keep for c in client.center))
+        cells = {
+            (x, y, z)
+            for x in range(low[0], high[0] + 1)
+            for y in range(low[1], high[1] + 1)
+            for z in range(low[2], high[2] + 1)
+        }
+        for cell in client.cells - cells:
+            _discard(self.watchers, cell, address)
+        for cell in cells - client.cells:
+            self.watchers.setdefault(cell, set()).add(address)
+        client.cells = cells
+
+        relevant = set()
+        previous = client.relevant
+        for cell in cells:
+            for entity in self.cells.get(cell, ()):
+                if client.in_range(self.positions[entity], keep=entity in previous):
+                    relevant.add(entity)
+        client.relevant = relevant
+
+    def _check(self, client, entity, position):
+        if entity in client.relevant:
+            if not client.in_range(position, keep=True):
+                client.relevant.discard(entity)
+        elif client.in_range(position, keep=False):
+            client.relevant.add(entity)
+
+
+def _distance(a, b):
+    if b is None:
+        return math.inf
+    return math.sqrt((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2)
+
+
+def _discard(index, key, value):
+    values = index.get(key)
+    if values is not None:
+        values.discard(value)
+        if not values:
+            del index[key]
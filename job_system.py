@@ -0,0 +1,209 @@
+# job_system.py
+
+import builtins
+import os
+import queue
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from direct.task import Task
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class Job:
+    """
+    Handle for work submitted through JobSystem.submit.
+
+    The state only changes on the main thread: a job finished by a worker is
+    picked up at the start of the next frame, before any behavior update()
+    runs, so update() can simply poll job.done.
+    """
+
+    __slots__ = ("owner", "future", "state", "value", "error", "_callbacks")
+
+    def __init__(self, owner, future=None):
+        self.owner = owner
+        self.future = future
+        self.state = PENDING
+        self.value = None
+        self.error = None
+        self._callbacks = []
+
+    @property
+    def done(self):
+        """True once the job finished, failed or was cancelled."""
+        return self.state != PENDING
+
+    @property
+    def ok(self):
+        return self.state == DONE
+
+    @property
+    def cancelled(self):
+        return self.state == CANCELLED
+
+    def result(self, default=None):
+        """The return value of the job, default while pending. Re-raises a job error."""
+        if self.state == FAILED:
+            raise self.error
+        return self.value if self.state == DONE else default
+
+    def then(self, callback):
+        """Calls callback(job) on the main thread when the job completes (not when cancelled)."""
+        if self.state in (DONE, FAILED):
+            callback(self)
+        elif self.state == PENDING:
+            self._callbacks.append(callback)
+        return self
+
+    def cancel(self):
+        """Drops the job. A job already running finishes, but its result is discarded."""
+        if self.state != PENDING:
+            return False
+        self.state = CANCELLED
+        self._callbacks = []
+        if self.future is not None:
+            self.future.cancel()
+        return True
+
+
+class JobSystem:
+    """
+    Runs expensive script work (AI, pathfinding, procedural generation) off the
+    main thread.
+
+    Work goes to a thread pool by default, or to a process pool with
+    process=True for pure-Python CPU work that would otherwise hold the GIL; the
+    function and its arguments must then be picklable. Finished futures are
+    handed back to the main thread through a completion queue drained by a task
+    that runs before the BehaviorScheduler, the same way scene_streamer and
+    background_save report back.
+
+    Each frame the owners of pending jobs are checked too: when an owner's node
+    has been removed from the scene, its jobs are cancelled.
+    """
+
+    _instance = None
+
+    def __init__(self, task_mgr=None, max_workers=None, task_sort=-10):
+        self.task_mgr = task_mgr or builtins.taskMgr
+        self.max_workers = max_workers or max(2, (os.cpu_count() or 2) - 1)
+        self.threads = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="script_job")
+        self._processes = None  # Created on first use; spawning workers is slow
+        self._completed = queue.Queue()  # Filled by worker threads
+        self._pending = {}  # owner -> list of pending jobs
+        self.task = self.task_mgr.add(self._tick, "script_jobs", sort=task_sort)
+
+    @classmethod
+    def shared(cls):
+        """The job system of the running ShowBase (one per process)."""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    @property
+    def processes(self):
+        if self._processes is None:
+            self._processes = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._processes
+
+    def __len__(self):
+        return sum(len(jobs) for jobs in self._pending.values())
+
+    def submit(self, owner, fn, *args, process=False, **kwargs):
+        """Runs fn(*args, **kwargs) on a worker for owner. Returns a Job."""
+        executor = self.processes if process else self.threads
+        job = Job(owner)
+        self._pending.setdefault(owner, []).append(job)
+        job.future = executor.submit(fn, *args, **kwargs)
+        job.future.add_done_callback(lambda future, job=job: self._completed.put(job))
+        return job
+
+    def cancel_owner(self, owner):
+        """Cancels every pending job of owner (e.g. a destroyed behavior)."""
+        for job in self._pending.pop(owner, ()):
+            job.cancel()
+
+    def shutdown(self):
+        for owner in list(self._pending):
+            self.cancel_owner(owner)
+        self.threads.shutdown(wait=False)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False)
+        self.task_mgr.remove(self.task)
+
+    # ------------------------------------------------------------------
+    # Frame
+    # ------------------------------------------------------------------
+
+    def _tick(self, task):
+        if not self._pending:
+            return Task.cont
+
+        for owner in [o for o in self._pending if not _owner_alive(o)]:
+            self.cancel_owner(owner)
+
+        while True:
+            try:
+                job = self._completed.get_nowait()
+            except queue.Empty:
+                break
+            self._complete(job)
+        return Task.cont
+
+    def _complete(self, job):
+        jobs = self._pending.get(job.owner)
+        if jobs is not None and job in jobs:
+            jobs.remove(job)
+            if not jobs:
+                del self._pending[job.owner]
+        if job.state != PENDING:
+            return  # Cancelled while it was running
+        future = job.future
+        if future.cancelled():
+            job.state = CANCELLED
+            return
+        error = future.exception()
+        if error is None:
+            job.state, job.value = DONE, future.result()
+        else:
+            job.state, job.error = FAILED, error
+            if not job._callbacks:
+                print(f"❌ Job of {type(job.owner).__name__} on '{_owner_name(job.owner)}' raised {error!r}")
+        callbacks, job._callbacks = job._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(job)
+            except Exception as e:
+                print(f"❌ Job callback of {type(job.owner).__name__} raised {e!r}")
+
+
+class BehaviorJobs:
+    """The self.jobs of a MonoBehavior: JobSystem.submit bound to that behavior."""
+
+    __slots__ = ("owner", "system")
+
+    def __init__(self, owner, system=None):
+        self.owner = owner
+        self.system = system or JobSystem.shared()
+
+    def submit(self, fn, *args, process=False, **kwargs):
+        return self.system.submit(self.owner, fn, *args, process=process, **kwargs)
+
+    def cancel_all(self):
+        self.system.cancel_owner(self.owner)
+
+
+def _owner_alive(owner):
+    node = getattr(owner, "node", None)
+    if node is None:
+        return True  # Not tied to a node; lives until cancelled explicitly
+    return not node.is_empty() and node.has_parent()
+
+
+def _owner_name(owner):
+    node = getattr(owner, "node", None)
+    return node.getName() if node is not None and not node.is_empty() else "?"
@@ -35,6 +35,12 @@ import raycasting
 import Preview_build
 from terrain_control_widget import TerrainControlWidget
 import gizmos
+from dirty_tracker import DirtyTracker
+from hierarchy_model import HierarchyView
+from entity_registry import EntityRegistry
+from script_loader import watch_scripts
+from profiler_panel import ProfilerPanel
+import static_batching
 
 class PandaTest(Panda3DWorld):
     def __init__(self, width=1024, height=768, script_inspector=None):
@@ -45,6 +51,8 @@ class PandaTest(Panda3DWorld):
         global input_manager_c
         self.network_manager = network_manager
         self.input_manager = input_manager_c
+        self.dirty_tracker = DirtyTracker()
+        watch_scripts(self.taskMgr)  # Hot reload behavior scripts when they are saved
         
         self.animator_tab = sequenceEditorTab.SequenceEditorTab(self)
         
@@ -131,8 +139,8 @@ class PandaTest(Panda3DWorld):
     def recreate_button(self, text, frameColor, text_fg, scale, pos, parent):
         return uiEditor_inst.button(text, scale, pos, parent, frameColor, text_fg)
     def make_hierarchy(self):
-        self.hierarchy_tree = QTreeWidget()
-        self.hierarchy_tree1 = QTreeWidget()
+        self.hierarchy_tree = HierarchyView(render)
+        self.hierarchy_tree1 = HierarchyView(self.render2d)
         
     
     def make_ray_caster(self):
@@ -143,6 +151,7 @@ class PandaTest(Panda3DWorld):
         nodepath.set_python_tag("script_paths", [])
         nodepath.set_python_tag("script_properties", [])
         nodepath.set_python_tag("id", str(uuid.uuid4())[:8])
+        EntityRegistry.shared().register(nodepath)
 
     def jump(self):
         self.jump_seq.start()
@@ -151,33 +160,26 @@ class PandaTest(Panda3DWorld):
         self.roll_seq.start()
         
     def refresh(self):
-        self.hierarchy_tree.clear()
+        # Only the expanded part of each tree is compared with the scene graph.
         self.populate_hierarchy(self.hierarchy_tree, render)
-        self.hierarchy_tree1.clear()
         self.populate_hierarchy(self.hierarchy_tree1, self.render2d)
 
     def add_model(self, model):
 
 
-        self.hierarchy_tree.clear()
-        self.populate_hierarchy(self.hierarchy_tree, render)
-        self.hierarchy_tree1.clear()
-        self.populate_hierarchy(self.hierarchy_tree1, self.render2d)
+        self.refresh()
         world.selected_node = model
         self.assign_id(model)
+        self.dirty_tracker.mark_dirty(model, DirtyTracker.TAGS)
 
     def make_terrain(self):
 
 
-        self.hierarchy_tree.clear()
-        self.hierarchy_tree1.clear()
-
         self.terrain_generate = terrainEditor.TerrainPainterApp(world, pandaWidget)
 
         world.selected_node = self.terrain_generate.terrain_node
         
-        self.populate_hierarchy(self.hierarchy_tree, render)
-        self.populate_hierarchy(self.hierarchy_tree1, self.render2d)
+        self.refresh()
 
         selected_node = self.terrain_generate.terrain_node
     #def ui_editor_script_to_canvas(self):
@@ -198,6 +200,8 @@ class PandaTest(Panda3DWorld):
 
         # Detach the old render node (optional)
         old_render.detach_node()
+        self.dirty_tracker.reset()
+        EntityRegistry.shared().clear()
 
         #self.camera_controls = FlyingCamera(self)
         self.cam.setPos(0, -58, 30)
@@ -206,22 +210,19 @@ class PandaTest(Panda3DWorld):
         self.win.setClearColor(VBase4(0, 0, 0, 1))
         self.cam.node().getDisplayRegion(0).setSort(20)
 
-        self.hierarchy_tree.clear()
-        self.hierarchy_tree1.clear()
-        
-        self.populate_hierarchy(self.hierarchy_tree, render)
-        self.populate_hierarchy(self.hierarchy_tree1, self.render2d)
+        self.refresh()
     #TODO make each object from toml load up with a function that runs on load
 
 
-    def populate_hierarchy(self, hierarchy_widget, node, parent_item=None):
-
-        # Create a new item for the current node
-        item = QTreeWidgetItem(parent_item or hierarchy_widget, [node.getName()])
-        item.setData(0, Qt.UserRole, node)  # Store the NodePath in the item data
-        # Recursively add child nodes
-        for child in node.getChildren():
-            self.populate_hierarchy(hierarchy_widget, child, item)
+    def populate_hierarchy(self, hierarchy_widget, node):
+        """
+        Show the scene below node in a HierarchyView. Rows are created lazily as the
+        user expands them; if node is already shown, only the changes are applied.
+        """
+        if hierarchy_widget.model().root_node() != node:
+            hierarchy_widget.set_root(node)
+        else:
+            hierarchy_widget.sync()
 
 
 
@@ -253,6 +254,7 @@ class properties:
             scale = list(world.selected_node.getScale())
             scale[coord[1]] = value
             world.selected_node.setScale(*scale)
+        world.dirty_tracker.mark_dirty(world.selected_node, DirtyTracker.TRANSFORM)
 class properties_ui_editor:
     def __init__():
         pass
@@ -282,9 +284,9 @@ class properties_ui_editor:
             scale[coord[1]] = value
             world.selected_node.setScale(*scale)
 
-def on_item_clicked(item, column):
+def on_item_clicked(index):
     #global selected_node
-    node = item.data(0, Qt.UserRole)  # Retrieve the NodePath stored in the item
+    node = index.data(Qt.UserRole)  # Retrieve the NodePath shown in the row
 
     if node:
         world.selected_node = node
@@ -322,9 +324,9 @@ def on_item_clicked(item, column):
         #    inspector.scripts = {}  # Initialize script storage for the node
     else:
         print("No node selected.")
-def on_item_clicked1(item, column):
+def on_item_clicked1(index):
     #global selected_node
-    node = item.data(0, Qt.UserRole)  # Retrieve the NodePath stored in the item
+    node = index.data(Qt.UserRole)  # Retrieve the NodePath shown in the row
 
     if node:
         world.selected_node = node
@@ -489,7 +491,7 @@ class StartupWindow(QWidget):
         map_path = os.path.abspath(map_path)
         print(f"Opening map file: {map_path}")
         self.hide()
-        ml = entity_editor.MapLoader(world)
+        ml = entity_editor.MapLoader(world, on_progress=show_load_progress, on_done=lambda entities: world.refresh())
         ml.load_map(map_path)
         opened_map = os.path.basename(map_path)
         QMessageBox.information(self, "Project Loaded", f"Project loaded from {map_path}")
@@ -506,19 +508,16 @@ class StartupWindow(QWidget):
             QMessageBox.warning(self, "Invalid Name", "Please enter a valid project name.")
             return
         base_dir = os.path.abspath(os.path.join(os.getcwd(), "saves"))
-        base1_dir = os.path.abspath(os.path.join(os.getcwd(), "toml_loader"))
         project_path = os.path.join(base_dir, project_name)
         if os.path.exists(project_path):
             QMessageBox.warning(self, "Project Exists", "A project with this name already exists.")
             return
         os.makedirs(project_path)
         print(f"📂 Created new project: {project_path}")
-        # Save scene data into a folder inside the project.
-        output_toml = os.path.join(base1_dir, project_name)  # e.g., ./saves/tttttt/tttttt
+        # Save scene data into a single binary map inside the project.
         output_map = os.path.join(project_path, f"{project_name}.map")  # e.g., ./saves/tttttt/tttttt.map
         saver = entity_editor.Save(world)
-        saver.save_scene_to_toml(world.render, output_toml)
-        saver.save_scene_to_map(output_toml, output_map)
+        saver.save_scene_to_binary_map(world.render, output_map)
         # Save preferences indicating the map file location.
         main_map = {"main_map": output_map}
         with open(os.path.join(project_path, "preferences.toml"), "w") as pref:
@@ -565,7 +564,8 @@ class Save_ui(QInputDialog):
         # Get the input text and display it in the label
         user_input = self.input_field.text()
         ent_editor = entity_editor.Save(world)
-        ent_editor.save_scene_ui_to_toml(world.render2d, project_name + "/saves/ui/", user_input)
+        project_dir = os.path.join(os.getcwd(), "saves", project_name)
+        ent_editor.save_scene_ui_to_toml(world.render2d, project_name + "/saves/ui/", user_input, project_dir=project_dir)
         
 class Save_map(QInputDialog):
     def __init__(self):
@@ -618,7 +618,7 @@ class Load_ui(QWidget):
             for file in files:
                 if file.endswith(".ui"):  # Check file extension
                     matching_files.append(os.path.join(root, file))
-                    self.mesh_select.addItem(file)
+                    self.mesh_select.addItem(file, os.path.join(root, file))
         
         
         
@@ -634,7 +634,8 @@ class Load_ui(QWidget):
         self.setLayout(layout)
         
     def set_selected(self):
-        self.selected_text = self.mesh_select.currentText()
+        # Full path of the layout; UI manifests point at the project's asset store relative to it.
+        self.selected_text = self.mesh_select.currentData() or self.mesh_select.currentText()
 
     
     def process_input(self):
@@ -813,44 +814,46 @@ def startup_w():
 
 
 
+def show_load_progress(loaded, total):
+    """Progress callback for scenes streaming in (see scene_streamer.SceneStreamer)."""
+    appw.statusBar().showMessage(f"Loading scene... {loaded}/{total} entities", 2000)
+
+
 def save_map(map_name):
     global world, project_name
     
-    world.refresh()
-    world.reset_render()
-    # Define the base directories for the TOML and MAP files.
-    # (Here we use os.getcwd() to get the current working directory.
-    #  Adjust this as needed for your project structure.)
-    toml_base_dir = os.path.join(os.getcwd(), "toml_loader", project_name)
+    # The map is a single binary scene file (see scene_format) inside the project folder,
+    # e.g. if map_name is "Level1" the path becomes .../saves/MyProject/Level1.map
     map_base_dir  = os.path.join(os.getcwd(), "saves", project_name)
-    
-    # Ensure these directories exist
-    os.makedirs(toml_base_dir, exist_ok=True)
     os.makedirs(map_base_dir, exist_ok=True)
-    
-    # Build the full file paths.
-    # For example, if map_name is "Level1", the paths become:
-    #   .../toml_loader/MyProject/Level1.toml
-    #   .../saves/MyProject/Level1.map
-    toml_file_path = os.path.join(toml_base_dir, map_name)
     map_file_path  = os.path.join(map_base_dir, map_name + ".map")
-    
-    # Save the scene.
-    # (Note: In your create_project function you used the toml path as the first
-    #  parameter for save_scene_to_map; we follow that pattern here.)
+
+    # Only entities the dirty tracker recorded since the last save/load are written;
+    # they are appended to the existing map instead of re-serializing the whole scene.
+    # The scene is snapshotted here and written on a worker thread, so the editor keeps running.
     saver = entity_editor.Save(world)
-    saver.save_scene_to_toml(world.render, toml_file_path)
-    saver.save_scene_to_map(toml_file_path, map_file_path)
+    saver.save_scene_in_background(
+        world.render, map_file_path, world.dirty_tracker,
+        on_progress=show_save_progress, on_done=show_save_done,
+    )
+
+
+def show_save_progress(saved, total):
+    """Progress callback for background saves (see background_save.BackgroundSaver)."""
+    appw.statusBar().showMessage(f"Saving map... {saved}/{total} entities", 2000)
+
+
+def show_save_done(success):
+    appw.statusBar().showMessage("Map saved" if success else "Saving the map failed, see the console", 3000)
 
 def delete_selection():
     global world
-    selected_items = world.hierarchy_tree.selectedItems()
-    if not selected_items:
+    selected_nodes = world.hierarchy_tree.selected_nodes()
+    if not selected_nodes:
         print("No item selected.")
         return
 
-    item = selected_items[0]
-    node = item.data(0, Qt.UserRole)
+    node = selected_nodes[0]
     
     if not node:
         print("Selected item has no associated node.")
@@ -865,12 +868,27 @@ def delete_selection():
     node_name = node.getName()
 
     # Proceed with deletion if not the main render
+    world.dirty_tracker.mark_removed(node)
     node.removeNode()
     world.refresh()
     world.selected_node = None
     print(f"Node '{node_name}' deleted successfully.")
 
 
+def toggle_static_selection():
+    """Marks the selected entity static (merged into a static batch in preview/builds) or dynamic again."""
+    global world
+    node = world.selected_node
+    if node is None or node.is_empty() or not node.has_python_tag("id"):
+        print("No entity selected.")
+        return
+    is_static = not node.get_python_tag(static_batching.STATIC_PROPERTY)
+    node.set_python_tag(static_batching.STATIC_PROPERTY, is_static)
+    EntityRegistry.shared().update(node)
+    world.dirty_tracker.mark_dirty(node, DirtyTracker.TAGS)
+    print(f"Entity '{node.getName()}' is now {'static' if is_static else 'dynamic'}.")
+
+
 def build_project():
     os.system("python build.py")
 
@@ -944,6 +962,10 @@ if __name__ == "__main__":
     save_map_w = QAction("save map", appw)
     save_map_w.triggered.connect(lambda: save_map_func())
     edit_tool_type_menu.addAction(save_map_w)
+
+    toggle_static = QAction("toggle static", appw)
+    toggle_static.triggered.connect(toggle_static_selection)
+    edit_tool_type_menu.addAction(toggle_static)
     
     action3 = QAction("Exit", appw)
     action3.triggered.connect(exit)
@@ -1117,13 +1139,14 @@ if __name__ == "__main__":
     world.populate_hierarchy(world.hierarchy_tree, render)  # This will populate the hierarchy panel
     world.populate_hierarchy(world.hierarchy_tree1, world.render2d)  # This will populate the hierarchy panel
 
-    world.hierarchy_tree.itemClicked.connect(lambda item, column: on_item_clicked(item, column))
-    world.hierarchy_tree1.itemClicked.connect(lambda item, column: on_item_clicked1(item, column))
+    world.hierarchy_tree.clicked.connect(on_item_clicked)
+    world.hierarchy_tree1.clicked.connect(on_item_clicked1)
     
     #world.ui_editor_script_to_canvas()
     
     
     tab_widget.addTab(world.animator_tab, "Animator") 
+    tab_widget.addTab(ProfilerPanel(), "Profiler")
 
     prop = properties
     prop_ui_e = properties_ui_editor
@@ -0,0 +1,89 @@
+# map_archive.py
+
+import mmap
+import os
+import struct
+import zipfile
+
+from parse_cache import parse_toml_bytes
+
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_LOCAL_HEADER_MAGIC = b"PK\003\004"
+
+LIGHTS_ENTRY = "lights/lights.toml"
+
+
+class MapArchive:
+    """
+    Read-only view of a legacy .map file (a ZIP archive of TOML files).
+
+    Entries are read straight from the archive instead of being extracted to
+    disk. Stored (uncompressed) entries are sliced out of a memory map of the
+    file; compressed entries are inflated in memory. Reads are safe from
+    worker threads.
+    """
+
+    def __init__(self, map_file):
+        self.path = os.path.abspath(os.path.normpath(map_file))
+        self._zip = zipfile.ZipFile(self.path, "r")
+        self._file = open(self.path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._map = None
+        self._infos = {info.filename: info for info in self._zip.infolist()}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._zip.close()
+
+    def names(self):
+        return list(self._infos.keys())
+
+    def entity_entries(self):
+        """Entity TOML entries at the top of the archive (lights live in their own folder)."""
+        return [
+            name for name in self._infos
+            if name.endswith(".toml") and "/" not in name and name != "lights.toml"
+        ]
+
+    def read_bytes(self, name):
+        info = self._infos[name]
+        if info.compress_type == zipfile.ZIP_STORED and self._map is not None:
+            data_at = self._stored_data_offset(info)
+            if data_at is not None:
+                return self._map[data_at:data_at + info.file_size]
+        return self._zip.read(info)
+
+    def _stored_data_offset(self, info):
+        header_at = info.header_offset
+        if header_at + _LOCAL_HEADER.size > len(self._map):
+            return None
+        fields = _LOCAL_HEADER.unpack_from(self._map, header_at)
+        if fields[0] != _LOCAL_HEADER_MAGIC:
+            return None
+        name_length, extra_length = fields[-2], fields[-1]
+        return header_at + _LOCAL_HEADER.size + name_length + extra_length
+
+    def read_toml(self, name):
+        return parse_toml_bytes(self.read_bytes(name))
+
+    def lights(self):
+        if LIGHTS_ENTRY in self._infos:
+            return self.read_toml(LIGHTS_ENTRY)
+        return {}
+
+
+def is_map_archive(map_file):
+    return zipfile.is_zipfile(map_file)
@@ -0,0 +1,188 @@
+# model_cache.py
+
+import os
+from collections import OrderedDict
+
+from panda3d.core import Filename, NodePath, VirtualFileSystem, getModelPath
+
+
+class _CacheEntry:
+    __slots__ = ("key", "prototype", "size_bytes", "base_refs", "instances")
+
+    def __init__(self, key, prototype, size_bytes):
+        self.key = key
+        self.prototype = prototype
+        self.size_bytes = size_bytes
+        # References held by the prototype NodePath itself; anything above this
+        # means some entity in the scene still instances the model.
+        self.base_refs = prototype.node().getRefCount()
+        self.instances = 0
+
+
+class ModelCache:
+    """
+    Shares loaded models between entities that use the same file.
+
+    The first load of a model is kept (detached) as a prototype. Every later
+    request gets a fresh entity node with the prototype instanced under it, so
+    transforms and tags stay per entity while geometry, textures and state are
+    shared. Entries are keyed by resolved path and modification time, so editing
+    a model on disk yields a fresh load.
+
+    Unreferenced prototypes are evicted least-recently-used first once the
+    estimated memory of all prototypes passes max_bytes.
+    """
+
+    _instance = None
+
+    def __init__(self, loader, max_bytes=256 * 1024 * 1024):
+        self.loader = loader
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> _CacheEntry, oldest first
+        self.current_keys = {}  # resolved path -> newest key
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._resolved = {}
+
+    @classmethod
+    def shared(cls, loader):
+        """The cache used by the entity loaders (one per process)."""
+        if cls._instance is None:
+            cls._instance = cls(loader)
+        return cls._instance
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    def resolve(self, model_path):
+        """Returns the cache key (resolved path, mtime) for a model path."""
+        resolved = self._resolved.get(model_path)
+        if resolved is None:
+            resolved = self._resolve_path(model_path)
+            self._resolved[model_path] = resolved
+        try:
+            mtime = os.path.getmtime(resolved)
+        except OSError:
+            mtime = 0  # Found through the model-path/VFS (e.g. "panda") or missing
+        return resolved, mtime
+
+    def _resolve_path(self, model_path):
+        if os.path.exists(model_path):
+            return os.path.realpath(model_path)
+        filename = Filename.from_os_specific(model_path)
+        vfs = VirtualFileSystem.get_global_ptr()
+        for extension in ("bam", "egg"):
+            candidate = Filename(filename)
+            if vfs.resolve_filename(candidate, getModelPath().get_value(), extension):
+                return candidate.to_os_specific()
+        return model_path
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def contains(self, model_path):
+        return self.resolve(model_path) in self.entries
+
+    def get(self, model_path):
+        """
+        Returns a new entity node for model_path (loading the model the first time),
+        or None if the model could not be loaded.
+        """
+        key = self.resolve(model_path)
+        if key not in self.entries:
+            prototype = self.loader.loadModel(os.path.relpath(model_path) if os.path.exists(model_path) else model_path)
+            if prototype is None:
+                return None
+            self.add(model_path, prototype)
+        else:
+            self.hits += 1
+        return self.instance(model_path)
+
+    def add(self, model_path, prototype):
+        """Stores an already loaded model (e.g. from an async load) as the prototype for model_path."""
+        key = self.resolve(model_path)
+        if key in self.entries:
+            return
+        self.misses += 1
+        prototype.detachNode()
+
+        # A newer version of the same file replaces the old one.
+        old_key = self.current_keys.get(key[0])
+        if old_key is not None and old_key != key and self._is_unreferenced(self.entries.get(old_key)):
+            self._evict(old_key)
+        self.current_keys[key[0]] = key
+
+        entry = _CacheEntry(key, prototype, estimate_model_bytes(prototype))
+        self.entries[key] = entry
+        self.total_bytes += entry.size_bytes
+        # Not the new model itself: it has no instances yet but is about to be used
+        self.evict(keep=key)
+
+    def instance(self, model_path):
+        """Returns a new node with the cached prototype for model_path instanced under it."""
+        key = self.resolve(model_path)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.entries.move_to_end(key)
+        entry.instances += 1
+        node = NodePath(entry.prototype.getName())
+        entry.prototype.instanceTo(node)
+        return node
+
+    # ------------------------------------------------------------------
+    # Eviction
+    # ------------------------------------------------------------------
+
+    def _is_unreferenced(self, entry):
+        return entry is not None and entry.prototype.node().getRefCount() <= entry.base_refs
+
+    def evict(self, target_bytes=None, keep=None):
+        """Drops unreferenced prototypes (except key keep), oldest first, until total_bytes <= target_bytes."""
+        target_bytes = self.max_bytes if target_bytes is None else target_bytes
+        for key in list(self.entries.keys()):
+            if self.total_bytes <= target_bytes:
+                break
+            if key != keep and self._is_unreferenced(self.entries[key]):
+                self._evict(key)
+
+    def _evict(self, key):
+        entry = self.entries.pop(key)
+        self.total_bytes -= entry.size_bytes
+        if self.current_keys.get(key[0]) == key:
+            del self.current_keys[key[0]]
+        self.loader.unloadModel(entry.prototype)
+        entry.prototype.removeNode()
+
+    def clear_unused(self):
+        self.evict(target_bytes=0)
+
+    def stats(self):
+        referenced = sum(1 for entry in self.entries.values() if not self._is_unreferenced(entry))
+        return {
+            "entries": len(self.entries),
+            "referenced": referenced,
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def estimate_model_bytes(model):
+    """Rough memory footprint of a model: vertex and index buffers plus texture images."""
+    total = 0
+    for geom_np in model.findAllMatches("**/+GeomNode"):
+        geom_node = geom_np.node()
+        for i in range(geom_node.getNumGeoms()):
+            geom = geom_node.getGeom(i)
+            vertex_data = geom.getVertexData()
+            for j in range(vertex_data.getNumArrays()):
+                total += vertex_data.getArray(j).getDataSizeBytes()
+            for j in range(geom.getNumPrimitives()):
+                total += geom.getPrimitive(j).getDataSizeBytes()
+    for texture in model.findAllTextures():
+        total += texture.estimateTextureMemory()
+    return total
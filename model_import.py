@@ -0,0 +1,191 @@
+# model_import.py
+
+import hashlib
+import json
+import os
+import queue
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+CONVERTIBLE_EXTENSIONS = (".egg", ".obj", ".gltf", ".glb", ".fbx", ".dae", ".x")
+
+
+class BamCache:
+    """
+    Cache of imported models converted to .bam, keyed by a hash of the source file.
+
+    Converted files live in <cache_dir>/<sha1>.bam. An index of source path ->
+    (size, mtime, sha1) lets lookup() find the conversion of an unchanged source
+    without reading it again.
+    """
+
+    _instance = None
+
+    def __init__(self, cache_dir):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.index_path = os.path.join(self.cache_dir, "index.json")
+        try:
+            with open(self.index_path, "r") as file:
+                self.index = json.load(file)
+        except (OSError, ValueError):
+            self.index = {}
+
+    @classmethod
+    def shared(cls):
+        """The cache of the current project (./.cache/models, next to ./saves)."""
+        if cls._instance is None:
+            cls._instance = cls(os.path.join(os.getcwd(), ".cache", "models"))
+        return cls._instance
+
+    def bam_path(self, digest):
+        return os.path.join(self.cache_dir, digest + ".bam")
+
+    def lookup(self, source_path):
+        """Path of the converted .bam for source_path, or None if it was not converted yet."""
+        try:
+            stat = os.stat(source_path)
+        except OSError:
+            return None
+        entry = self.index.get(os.path.realpath(source_path))
+        if entry is None or entry["size"] != stat.st_size or entry["mtime"] != stat.st_mtime:
+            return None
+        bam_path = self.bam_path(entry["digest"])
+        return bam_path if os.path.exists(bam_path) else None
+
+    def record(self, source_path, digest):
+        """Remembers that source_path (with its current size and mtime) converts to digest."""
+        stat = os.stat(source_path)
+        self.index[os.path.realpath(source_path)] = {
+            "size": stat.st_size, "mtime": stat.st_mtime, "digest": digest,
+        }
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as file:
+            json.dump(self.index, file)
+        os.replace(temp_path, self.index_path)
+
+
+def source_digest(source_path):
+    sha1 = hashlib.sha1()
+    with open(source_path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def needs_conversion(model_path):
+    return os.path.splitext(model_path)[1].lower() in CONVERTIBLE_EXTENSIONS
+
+
+def resolve_converted(model_path):
+    """The cached .bam for model_path when one exists, otherwise model_path itself."""
+    if model_path and needs_conversion(model_path):
+        return BamCache.shared().lookup(model_path) or model_path
+    return model_path
+
+
+class ModelImporter:
+    """
+    Converts imported models to .bam in the background.
+
+    The source is hashed and, unless the cache already holds its conversion, a
+    separate Python process loads it and writes the .bam (text formats such as
+    .egg and .obj are slow to parse, the editor should not pay that twice).
+    on_ready(bam_path) is called on the main thread once the conversion exists,
+    from a task draining the completion queue.
+    """
+
+    _instance = None
+
+    def __init__(self, base, cache=None):
+        self.base = base
+        self.cache = cache or BamCache.shared()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model_import")
+        self.pending = 0
+        self._finished = queue.Queue()  # Filled by the worker thread
+        self._task_name = f"model_importer_{id(self)}"
+        self._task = None
+
+    @classmethod
+    def shared(cls, base):
+        if cls._instance is None:
+            cls._instance = cls(base)
+        return cls._instance
+
+    def import_model(self, source_path, on_ready=None):
+        """
+        Returns the cached .bam for source_path if it is already converted; otherwise
+        schedules the conversion and returns None.
+        """
+        bam_path = self.cache.lookup(source_path)
+        if bam_path is not None or not needs_conversion(source_path):
+            return bam_path
+
+        def convert():
+            digest = source_digest(source_path)
+            target = self.cache.bam_path(digest)
+            if not os.path.exists(target):
+                os.makedirs(self.cache.cache_dir, exist_ok=True)
+                result = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), source_path, target],
+                    capture_output=True, text=True,
+                )
+                if result.returncode != 0:
+                    raise RuntimeError(result.stderr.strip() or f"converter exited with {result.returncode}")
+            return digest, target
+
+        def done(future):
+            try:
+                self._finished.put((source_path, future.result(), None, on_ready))
+            except Exception as e:
+                self._finished.put((source_path, None, e, on_ready))
+
+        self.pending += 1
+        self.executor.submit(convert).add_done_callback(done)
+        if self._task is None:
+            self._task = self.base.taskMgr.add(self._finish_task, self._task_name)
+        return None
+
+    def _finish_task(self, task):
+        while True:
+            try:
+                source_path, result, error, on_ready = self._finished.get_nowait()
+            except queue.Empty:
+                break
+            self.pending -= 1
+            if error is not None:
+                print(f"⚠️ Model conversion failed, keeping the source file: {error}")
+                continue
+            digest, bam_path = result
+            self.cache.record(source_path, digest)
+            print(f"✅ Converted {source_path} -> {bam_path}")
+            if on_ready:
+                on_ready(bam_path)
+
+        if not self.pending:
+            self._task = None
+            return task.done
+        return task.cont
+
+
+def convert_to_bam(source_path, target_path):
+    """Loads source_path with Panda3D's loader and writes it to target_path as .bam."""
+    from panda3d.core import Filename, Loader, LoaderOptions, NodePath
+
+    node = Loader.get_global_ptr().load_sync(
+        Filename.from_os_specific(os.path.abspath(source_path)),
+        LoaderOptions(LoaderOptions.LF_no_cache),
+    )
+    if node is None:
+        raise RuntimeError(f"Could not load {source_path}")
+
+    temp_path = f"{target_path}.{os.getpid()}.tmp.bam"
+    if not NodePath(node).write_bam_file(Filename.from_os_specific(temp_path)):
+        raise RuntimeError(f"Could not write {target_path}")
+    os.replace(temp_path, target_path)
+
+
+if __name__ == "__main__":
+    # Worker process entry point: python model_import.py <source> <target.bam>
+    convert_to_bam(sys.argv[1], sys.argv[2])
@@ -1,11 +1,19 @@
 from direct.task import Task
 from global_registry import GlobalRegistry
+from behavior_scheduler import BehaviorScheduler
+from job_system import BehaviorJobs
+from sync_delta import DeltaTracker
+from packet_aggregator import PRIORITY_NORMAL
+from coroutines import wait, next_frame, event  # For scripts: from monobehavior import wait
 
 class MonoBehavior:
+    priority = 0  # Update order: behaviors with a lower priority update first
+    sync_priority = PRIORITY_NORMAL  # Send order of synced variables when bandwidth is short
+
     def __init__(self, node, network_manager, input_manager=None):
         """
         Initialize the MonoBehavior with a reference to the node it's attached to.
-        Registers the update task with Panda3D's task manager.
+        Registers with the shared BehaviorScheduler, which calls start() and update(dt).
         """
         self.network_manager = network_manager
         self.input_manager = input_manager  # ✅ Allow InputManager to manage inputs
@@ -13,27 +21,41 @@ class MonoBehavior:
         self.started = False
         self.__builtin__ = False 
         self.sync_variables = {}  # Stores variables marked for syncing
-        taskMgr.add(self._update_task, f"update_{id(self)}")
+        self.sync_state = DeltaTracker()  # Last sent values, per-variable epsilon
+        self._jobs = None
+        BehaviorScheduler.shared().add(self, self.priority)
         network_manager.register_behavior(self)
         
         if self.input_manager:
             self.input_manager.register_behavior(self)  # ✅ Register for input events
 
-    def mark_variable_for_sync(self, var_name, sync_type="udp"):
-        """Mark a variable to be synced over the network."""
+    def mark_variable_for_sync(self, var_name, sync_type="udp", epsilon=None):
+        """
+        Mark a variable to be synced over the network. With an epsilon, float and
+        vector values are only sent once they moved by more than epsilon.
+        """
         self.sync_variables[var_name] = sync_type
+        if epsilon is not None:
+            self.sync_state.set_epsilon(var_name, epsilon)
+        self.sync_state.forget(var_name)
 
     def send_synced_variables(self):
-        """Send only changed variables over the network."""
-        for var_name, sync_type in self.sync_variables.items():
-            value = getattr(self, var_name, None)
-            if value is not None:
-                self.network_manager.send_variable_update(self.node.getName(), var_name, value, sync_type)
+        """Send only changed variables over the network, one message per sync type."""
+        if not self.sync_variables or not self.network_manager.can_send:
+            return
+        changes = self.sync_state.changes(self, self.sync_variables)
+        for sync_type, delta in changes.items():
+            self.network_manager.send_variable_delta(self.node.getName(), delta, sync_type, self.sync_priority)
+
+    def resync(self):
+        """Send every synced variable again on the next update (e.g. for a new peer)."""
+        self.sync_state.forget()
     
     def receive_synced_variable(self, var_name, value):
         """Update a synced variable when received from the network."""
         if var_name in self.sync_variables:
             setattr(self, var_name, value)
+            self.sync_state.received(var_name, value)
             
     def handle_input(self, action, is_pressed):
         """Called when an input event occurs."""
@@ -45,17 +67,52 @@ class MonoBehavior:
             
     
     def start(self):
-        """Called once before the first update."""
+        """
+        Called once before the first update. May be written as a generator or
+        async def, in which case it runs as a coroutine (see start_coroutine).
+        """
         pass
 
     def update(self, dt):
         """Called every frame with delta time since last frame."""
         self.send_synced_variables()  # ✅ Ensure variables are sent to the network
 
-    def _update_task(self, task):
-        dt = globalClock.getDt()
-        if not self.started:
-            self.start()
-            self.started = True
-        self.update(dt)
-        return Task.cont
+    @property
+    def jobs(self):
+        """
+        Background work for this behavior: self.jobs.submit(fn, *args) returns a
+        Job whose result is ready (job.done) at the start of a later frame.
+        Pending jobs are cancelled when the node is removed or on destroy().
+        """
+        if self._jobs is None:
+            self._jobs = BehaviorJobs(self)
+        return self._jobs
+
+    def start_coroutine(self, body):
+        """
+        Runs a generator or coroutine object alongside update(). It is only
+        resumed when what it waits for happened, e.g.
+        yield wait(1.5), await next_frame() or await event("jump").
+        Returns a handle whose stop() ends it.
+        """
+        return BehaviorScheduler.shared().coroutines.start(self, body)
+
+    def stop_coroutine(self, coroutine):
+        coroutine.stop()
+
+    def emit(self, name, value=None):
+        """Fires event name, waking coroutines that wait for it on the next frame."""
+        BehaviorScheduler.shared().coroutines.fire(name, value)
+
+    def pause(self):
+        """Stop receiving update() calls until resume()."""
+        BehaviorScheduler.shared().pause(self)
+
+    def resume(self):
+        BehaviorScheduler.shared().resume(self)
+
+    def destroy(self):
+        """Unschedule this behavior for good (e.g. when its node is removed)."""
+        BehaviorScheduler.shared().remove(self)
+        if self._jobs is not None:
+            self._jobs.cancel_all()
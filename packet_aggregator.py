@@ -0,0 +1,132 @@
+# packet_aggregator.py
+
+from wire_protocol import HEADER_SIZE, MAX_MESSAGES, fragment
+
+PRIORITY_LOW = 0
+PRIORITY_NORMAL = 1
+PRIORITY_HIGH = 2  # Inputs
+
+DEFAULT_MTU = 1200  # Safe UDP payload on the internet (no IP fragmentation)
+
+
+class _Pending:
+    __slots__ = ("message", "priority", "age", "order")
+
+    def __init__(self, message, priority, order):
+        self.message = message
+        self.priority = priority
+        self.age = 0  # Flushes this message was deferred by the send budget
+        self.order = order
+
+
+class OutgoingQueue:
+    """
+    Collects the messages of one network tick and sends them together.
+
+    flush() packs queued messages, highest priority first, into as few
+    datagrams of at most mtu bytes as possible; a single message too large for
+    one datagram is fragmented (wire_protocol.fragment). With a budget (bytes per
+    flush), messages that do not fit wait for the next flush; each flush they
+    wait raises their effective priority, so low priority data is late but never
+    starved.
+
+    Variable deltas queued for the same entity and sync type before a flush are
+    merged into one message, newest values winning, so a deferred entity never
+    piles up messages.
+    """
+
+    def __init__(self, session, write, mtu=DEFAULT_MTU, budget=None):
+        self.session = session
+        self.write = write  # write(datagram)
+        self.mtu = mtu
+        self.budget = budget
+        self._pending = []
+        self._deltas = {}  # (entity, sync type) -> _Pending holding its merged delta
+        self._order = 0
+        self._group = 0
+        self.datagrams_sent = 0
+        self.bytes_sent = 0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def push(self, message, priority=PRIORITY_NORMAL):
+        if "delta" in message:
+            key = (message["entity"], message.get("sync_type", "udp"))
+            pending = self._deltas.get(key)
+            if pending is not None:
+                pending.message["delta"].update(message["delta"])
+                pending.priority = max(pending.priority, priority)
+                return
+            message = dict(message, delta=dict(message["delta"]))  # Merged into later; keep the caller's dict
+        pending = _Pending(message, priority, self._order)
+        self._order += 1
+        self._pending.append(pending)
+        if "delta" in message:
+            self._deltas[key] = pending
+
+    def flush(self):
+        """Sends what the budget allows. Returns the number of datagrams written."""
+        session = self.session
+        acks = session.take_acks()
+        if not self._pending and not acks:
+            return 0
+
+        queue = sorted(self._pending, key=lambda p: (-(p.priority + p.age), p.order))
+        budget = self.budget
+        sent_bytes = 0
+        datagrams = 0
+        deferred = []
+
+        body = bytearray(acks)
+        count = 1 if acks else 0
+        defines = {}
+        size = HEADER_SIZE + len(body)  # Of the datagram being filled
+
+        for index, pending in enumerate(queue):
+            message_defines = {}
+            message_body = session.encode_body(pending.message, message_defines)
+            new_defines = [define for key, define in message_defines.items() if key not in defines]
+            added = len(message_body) + sum(map(len, new_defines))
+
+            if budget is not None and (count or sent_bytes) and sent_bytes + size + added > budget:
+                deferred = queue[index:]
+                break
+
+            if count and (size + added > self.mtu or count + len(defines) + 1 + len(new_defines) > MAX_MESSAGES):
+                datagrams, sent_bytes = self._send(count, defines, body, datagrams, sent_bytes)
+                body, count, defines = bytearray(), 0, {}
+                added = len(message_body) + sum(map(len, message_defines.values()))
+                size = HEADER_SIZE
+
+            for key, define in message_defines.items():
+                defines.setdefault(key, define)
+            body += message_body
+            count += 1
+            size += added
+
+        if count:
+            datagrams, sent_bytes = self._send(count, defines, body, datagrams, sent_bytes)
+
+        for pending in deferred:
+            pending.age += 1
+        self._pending = deferred
+        if deferred:
+            waiting = set(deferred)
+            self._deltas = {key: p for key, p in self._deltas.items() if p in waiting}
+        else:
+            self._deltas = {}
+        return datagrams
+
+    def _send(self, count, defines, body, datagrams, sent_bytes):
+        packet = self.session.pack(count, defines, body)
+        if len(packet) <= self.mtu:
+            pieces = [packet]
+        else:
+            self._group = (self._group + 1) & 0xFFFF
+            pieces = fragment(packet, self.mtu, self._group)
+        for piece in pieces:
+            self.write(piece)
+        self.datagrams_sent += len(pieces)
+        self.bytes_sent += len(packet)
+        return datagrams + len(pieces), sent_bytes + len(packet)
@@ -0,0 +1,173 @@
+# parse_cache.py
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+
+import toml
+
+try:
+    import tomllib  # Python 3.11+
+except ImportError:
+    tomllib = None
+
+CACHE_DIR_NAME = ".cache"
+CACHE_VERSION = b"parsed-v1"
+
+
+def parse_toml_bytes(data):
+    """
+    Parses TOML with the stdlib parser when available. Files written by the toml
+    package are not always spec compliant, so anything tomllib rejects is handed
+    to the toml package instead.
+    """
+    text = data.decode("utf-8")
+    if tomllib is not None:
+        try:
+            return tomllib.loads(text)
+        except tomllib.TOMLDecodeError:
+            pass
+    return toml.loads(text)
+
+
+class ParseCache:
+    """
+    Persistent cache of parsed entity files, stored in <project>/.cache/.
+
+    Entries are keyed by a hash of the file contents, so an edited file simply
+    misses and is parsed again. An index of file path -> content hash lets the
+    entry of a file's previous contents be deleted once nothing refers to it.
+    load() is safe to call from worker threads; call flush() when done to
+    persist the index.
+    """
+
+    _caches = {}
+    _caches_lock = threading.Lock()
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.objects_dir = os.path.join(cache_dir, "parsed")
+        self.index_path = os.path.join(cache_dir, "parsed_index.json")
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._index_dirty = False
+        self.index = self._read_index()  # absolute file path -> content hash
+
+    @classmethod
+    def for_folder(cls, folder_path):
+        """The cache for a project folder (one instance per folder and process)."""
+        cache_dir = os.path.join(os.path.abspath(folder_path), CACHE_DIR_NAME)
+        with cls._caches_lock:
+            cache = cls._caches.get(cache_dir)
+            if cache is None:
+                cache = cls._caches[cache_dir] = cls(cache_dir)
+            return cache
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def load(self, file_path):
+        """Returns the parsed contents of a TOML file, from the cache when possible."""
+        with open(file_path, "rb") as file:
+            data = file.read()
+        digest = hashlib.sha1(CACHE_VERSION + data).hexdigest()
+        entry_path = self._entry_path(digest)
+
+        record = self._read_entry(entry_path)
+        if record is None:
+            record = parse_toml_bytes(data)
+            self._write_entry(entry_path, record)
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        self._remember(file_path, digest)
+        return record
+
+    def _entry_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest + ".pickle")
+
+    def _read_entry(self, entry_path):
+        try:
+            with open(entry_path, "rb") as file:
+                return pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️ Discarding corrupt parse cache entry {entry_path}: {e}")
+            return None
+
+    def _write_entry(self, entry_path, record):
+        # Written under a temporary name and renamed, so readers never see half an entry.
+        temp_path = f"{entry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+            with open(temp_path, "wb") as file:
+                pickle.dump(record, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, entry_path)
+        except OSError as e:
+            print(f"⚠️ Could not write parse cache entry: {e}")
+
+    # ------------------------------------------------------------------
+    # Invalidation
+    # ------------------------------------------------------------------
+
+    def _remember(self, file_path, digest):
+        key = os.path.abspath(file_path)
+        with self._lock:
+            old_digest = self.index.get(key)
+            if old_digest == digest:
+                return
+            self.index[key] = digest
+            self._index_dirty = True
+            if old_digest is not None and old_digest not in self.index.values():
+                self._remove_entry(old_digest)
+
+    def _remove_entry(self, digest):
+        try:
+            os.remove(self._entry_path(digest))
+        except OSError:
+            pass
+
+    def prune(self):
+        """Drops index entries (and their cached records) for files that no longer exist."""
+        with self._lock:
+            for key in [key for key in self.index if not os.path.exists(key)]:
+                digest = self.index.pop(key)
+                self._index_dirty = True
+                if digest not in self.index.values():
+                    self._remove_entry(digest)
+
+    def _read_index(self):
+        try:
+            with open(self.index_path, "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def flush(self):
+        """Writes the path index to disk if it changed."""
+        with self._lock:
+            if not self._index_dirty:
+                return
+            temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with open(temp_path, "w") as file:
+                    json.dump(self.index, file)
+                os.replace(temp_path, self.index_path)
+                self._index_dirty = False
+            except OSError as e:
+                print(f"⚠️ Could not write parse cache index: {e}")
+
+    def stats(self):
+        return {"entries": len(set(self.index.values())), "hits": self.hits, "misses": self.misses}
+
+
+def load_toml_cached(file_path):
+    """Parses file_path through the cache of the folder that contains it."""
+    return ParseCache.for_folder(os.path.dirname(os.path.abspath(file_path))).load(file_path)
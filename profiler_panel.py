@@ -0,0 +1,112 @@
+# profiler_panel.py
+
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtWidgets import (QCheckBox, QComboBox, QDoubleSpinBox, QHBoxLayout, QLabel, QPushButton,
+                             QSpinBox, QTableWidget, QTableWidgetItem, QVBoxLayout, QWidget)
+
+from behavior_profiler import BehaviorProfiler
+
+COLUMNS = ["Call", "Entity", "Script", "Calls", "Total ms", "Mean ms", "Max ms", "ms / frame"]
+
+
+class _NumberItem(QTableWidgetItem):
+    """Table item that sorts by its numeric value instead of its text."""
+
+    def __init__(self, value, decimals=3):
+        super().__init__(f"{value:.{decimals}f}" if isinstance(value, float) else str(value))
+        self.value = value
+        self.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+
+    def __lt__(self, other):
+        if isinstance(other, _NumberItem):
+            return self.value < other.value
+        return super().__lt__(other)
+
+
+class ProfilerPanel(QWidget):
+    """
+    Editor panel for the BehaviorProfiler: enable/sampling/budget controls and
+    a sortable table of script timings, per script class or per entity.
+    """
+
+    def __init__(self, profiler=None, parent=None):
+        super().__init__(parent)
+        self.profiler = profiler or BehaviorProfiler.shared()
+
+        self.layout = QVBoxLayout(self)
+        controls = QHBoxLayout()
+
+        self.enabled_box = QCheckBox("Profile scripts")
+        self.enabled_box.toggled.connect(self.set_enabled)
+        controls.addWidget(self.enabled_box)
+
+        controls.addWidget(QLabel("Sample 1 frame in"))
+        self.sample_box = QSpinBox()
+        self.sample_box.setRange(1, 1000)
+        self.sample_box.setValue(self.profiler.sample_every)
+        self.sample_box.valueChanged.connect(lambda value: setattr(self.profiler, "sample_every", value))
+        controls.addWidget(self.sample_box)
+
+        controls.addWidget(QLabel("Frame budget (ms, 0 = off)"))
+        self.budget_box = QDoubleSpinBox()
+        self.budget_box.setRange(0.0, 1000.0)
+        self.budget_box.setDecimals(2)
+        self.budget_box.setValue((self.profiler.frame_budget or 0.0) * 1000)
+        self.budget_box.valueChanged.connect(self.set_budget)
+        controls.addWidget(self.budget_box)
+
+        self.group_box = QComboBox()
+        self.group_box.addItems(["Per script", "Per entity"])
+        self.group_box.currentIndexChanged.connect(self.refresh)
+        controls.addWidget(self.group_box)
+
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(self.reset)
+        controls.addWidget(reset_button)
+        self.layout.addLayout(controls)
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(4, Qt.DescendingOrder)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.layout.addWidget(self.table)
+
+        self.summary = QLabel()
+        self.layout.addWidget(self.summary)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(500)
+
+    def set_enabled(self, enabled):
+        if enabled:
+            self.profiler.enable(self.sample_box.value())
+        else:
+            self.profiler.disable()
+
+    def set_budget(self, budget_ms):
+        self.profiler.frame_budget = budget_ms / 1000 if budget_ms > 0 else None
+
+    def reset(self):
+        self.profiler.reset()
+        self.refresh()
+
+    def refresh(self):
+        if not self.isVisible():
+            return
+        rows = self.profiler.rows(per_entity=self.group_box.currentIndex() == 1)
+        self.table.setSortingEnabled(False)  # Keep rows in place while they are filled
+        self.table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                if isinstance(value, (int, float)):
+                    item = _NumberItem(value)
+                else:
+                    item = QTableWidgetItem(value)
+                self.table.setItem(row, column, item)
+        self.table.setSortingEnabled(True)
+        self.summary.setText(
+            f"{self.profiler.sampled_frames} sampled frames, "
+            f"{self.profiler.over_budget_frames} over budget"
+        )
@@ -0,0 +1,484 @@
+# scene_format.py
+
+"""
+Binary single-file scene container used for .map files.
+
+Layout (all integers little endian):
+
+    header      magic, version, entity count and the offsets of every section
+    strings     string table: count, (count + 1) uint32 offsets, utf-8 bytes
+    index       one fixed size record per entity (string ids + blob location)
+    transforms  packed float32 array, 9 floats per entity (pos, hpr, scale)
+    blobs       per-entity properties encoded as JSON
+    lights      JSON blob with the scene lights
+    log         optional append log segments written by incremental saves
+
+Opening a file only maps it into memory and reads the header.  Index records,
+strings and property blobs are decoded on first access, so opening a scene
+costs the same no matter how many entities it holds.
+
+Incremental saves never touch the base sections.  They append a log segment
+holding the changed entity records and the ids of removed entities; readers
+replay the log on open.  Once the log grows past the size of the base data the
+saver rewrites the whole file (compaction).
+"""
+
+import json
+import mmap
+import os
+import struct
+from array import array
+
+MAGIC = b"P3DSCENE"
+VERSION = 1
+
+_HEADER = struct.Struct("<8sHHIQQQQQQ")
+_INDEX_RECORD = struct.Struct("<IIIIQI")
+_UINT32 = struct.Struct("<I")
+_LOG_SEGMENT = struct.Struct("<4sII")
+_LOG_RECORD = struct.Struct("<BI")
+_TRANSFORM_FLOATS = 9
+_TRANSFORM_SIZE = _TRANSFORM_FLOATS * 4
+_PROGRESS_INTERVAL = 256
+
+NO_STRING = 0xFFFFFFFF
+
+_RECORD_KEYS = ("name", "id", "entity_model", "type", "transform", "properties")
+
+LOG_MAGIC = b"SLOG"
+LOG_ADD = 1
+LOG_REPLACE = 2
+LOG_REMOVE = 3
+LOG_LIGHTS = 4
+
+
+class SceneFormatError(Exception):
+    """Raised when a file is not a valid binary scene container."""
+
+
+def _json_default(value):
+    """Mirror what toml.dump does with values it does not know about."""
+    if hasattr(value, "__iter__") and not isinstance(value, (str, bytes)):
+        return list(value)
+    return str(value)
+
+
+def freeze_value(value):
+    """
+    Copies a property value into plain containers, applying the same conversions
+    as the encoder. Used to snapshot entity state that is serialized later, on
+    another thread, while the editor keeps modifying the live python tags.
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, dict):
+        return {str(key): freeze_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [freeze_value(item) for item in value]
+    return freeze_value(_json_default(value))
+
+
+def encode_properties(properties):
+    return json.dumps(properties, default=_json_default, separators=(",", ":")).encode("utf-8")
+
+
+def is_scene_file(path):
+    """Returns True if the file starts with the binary scene magic."""
+    try:
+        with open(path, "rb") as file:
+            return file.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class _StringTableBuilder:
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def add(self, value):
+        if value is None:
+            return NO_STRING
+        value = str(value)
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.ids[value] = string_id
+            self.strings.append(value)
+        return string_id
+
+    def to_bytes(self):
+        encoded = [s.encode("utf-8") for s in self.strings]
+        offsets = array("I", [0])
+        total = 0
+        for data in encoded:
+            total += len(data)
+            offsets.append(total)
+        return _UINT32.pack(len(encoded)) + offsets.tobytes() + b"".join(encoded)
+
+
+def _transform_values(transform):
+    position = transform.get("position", {})
+    rotation = transform.get("rotation", {})
+    scale = transform.get("scale", {})
+    return (
+        position.get("x", 0.0), position.get("y", 0.0), position.get("z", 0.0),
+        rotation.get("h", 0.0), rotation.get("p", 0.0), rotation.get("r", 0.0),
+        scale.get("x", 1.0), scale.get("y", 1.0), scale.get("z", 1.0),
+    )
+
+
+def write_scene(path, entities, lights=None, on_progress=None):
+    """
+    Writes entity records (the same dicts the TOML saver produces) and the
+    lights dict into a binary scene file.
+
+    The file is written under a temporary name and renamed over path, so a
+    crash never leaves a half written map behind. on_progress(done, total) is
+    called while the records are encoded.
+    """
+    strings = _StringTableBuilder()
+    index = bytearray()
+    transforms = array("f")
+    blobs = bytearray()
+    total = len(entities)
+
+    for i, entity_data in enumerate(entities):
+        if on_progress and i % _PROGRESS_INTERVAL == 0:
+            on_progress(i, total)
+        blob = encode_properties(entity_data.get("properties", {}))
+        index += _INDEX_RECORD.pack(
+            strings.add(entity_data.get("name", "Unnamed")),
+            strings.add(entity_data.get("id")),
+            strings.add(entity_data.get("entity_model")),
+            strings.add(entity_data.get("type")),
+            len(blobs),
+            len(blob),
+        )
+        blobs += blob
+        transforms.extend(_transform_values(entity_data.get("transform", {})))
+
+    string_bytes = strings.to_bytes()
+    lights_bytes = encode_properties(lights or {})
+
+    strings_offset = _HEADER.size
+    index_offset = strings_offset + len(string_bytes)
+    transforms_offset = index_offset + len(index)
+    blobs_offset = transforms_offset + len(transforms) * 4
+    lights_offset = blobs_offset + len(blobs)
+    data_end = lights_offset + len(lights_bytes)
+
+    header = _HEADER.pack(
+        MAGIC, VERSION, 0, len(entities),
+        strings_offset, index_offset, transforms_offset,
+        blobs_offset, lights_offset, data_end,
+    )
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "wb") as file:
+            file.write(header)
+            file.write(string_bytes)
+            file.write(index)
+            file.write(transforms.tobytes())
+            file.write(blobs)
+            file.write(lights_bytes)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    if on_progress:
+        on_progress(total, total)
+
+
+def append_changes(path, added=(), replaced=(), removed_ids=(), lights=None):
+    """
+    Appends one log segment to an existing binary scene file.
+
+    added/replaced are entity records (same dicts write_scene takes), removed_ids
+    are entity ids.  The segment is written with a single write so a crash can at
+    worst leave a truncated trailing segment, which readers ignore.
+    """
+    records = bytearray()
+    count = 0
+
+    def add_record(op, data):
+        nonlocal count
+        records.extend(_LOG_RECORD.pack(op, len(data)))
+        records.extend(data)
+        count += 1
+
+    for entity_data in added:
+        add_record(LOG_ADD, encode_properties(entity_data))
+    for entity_data in replaced:
+        add_record(LOG_REPLACE, encode_properties(entity_data))
+    for entity_id in removed_ids:
+        add_record(LOG_REMOVE, str(entity_id).encode("utf-8"))
+    if lights is not None:
+        add_record(LOG_LIGHTS, encode_properties(lights))
+
+    if not count:
+        return 0
+
+    segment = _LOG_SEGMENT.pack(LOG_MAGIC, count, len(records)) + records
+    with open(path, "r+b") as file:
+        file.seek(_valid_log_end(file))
+        file.write(segment)
+        file.truncate()
+    return count
+
+
+def compact_scene(path, on_progress=None):
+    """Rewrites a scene file with its append log folded into the base sections."""
+    with open_scene(path) as reader:
+        entities = [entity.to_dict() if isinstance(entity, SceneEntity) else entity for entity in reader]
+        lights = reader.lights()
+    write_scene(path, entities, lights, on_progress=on_progress)
+    return len(entities)
+
+
+def _valid_log_end(file):
+    """Offset just past the last complete log segment (drops a torn trailing write)."""
+    header = file.read(_HEADER.size)
+    if len(header) < _HEADER.size or header[:len(MAGIC)] != MAGIC:
+        raise SceneFormatError("Not a binary scene file")
+    pos = _HEADER.unpack(header)[-1]
+    end = file.seek(0, os.SEEK_END)
+    while pos + _LOG_SEGMENT.size <= end:
+        file.seek(pos)
+        magic, _, length = _LOG_SEGMENT.unpack(file.read(_LOG_SEGMENT.size))
+        if magic != LOG_MAGIC or pos + _LOG_SEGMENT.size + length > end:
+            break
+        pos += _LOG_SEGMENT.size + length
+    return pos
+
+
+class SceneEntity:
+    """
+    A lazily decoded entity record.  The transform comes straight out of the
+    packed array; properties are only parsed when first requested.
+    """
+
+    __slots__ = ("_reader", "_index", "name", "id", "entity_model", "type", "_properties")
+
+    def __init__(self, reader, index, name, entity_id, entity_model, entity_type):
+        self._reader = reader
+        self._index = index
+        self.name = name
+        self.id = entity_id
+        self.entity_model = entity_model
+        self.type = entity_type
+        self._properties = None
+
+    @property
+    def transform(self):
+        x, y, z, h, p, r, sx, sy, sz = self._reader.transform_values(self._index)
+        return {
+            "position": {"x": x, "y": y, "z": z},
+            "rotation": {"h": h, "p": p, "r": r},
+            "scale": {"x": sx, "y": sy, "z": sz},
+        }
+
+    @property
+    def properties(self):
+        if self._properties is None:
+            self._properties = self._reader.entity_properties(self._index)
+        return self._properties
+
+    def get(self, key, default=None):
+        """dict-style access so records can be used where TOML dicts were."""
+        if key not in _RECORD_KEYS:
+            return default
+        value = getattr(self, key)
+        return default if value is None else value
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "id": self.id,
+            "entity_model": self.entity_model,
+            "type": self.type,
+            "transform": self.transform,
+            "properties": self.properties,
+        }
+
+
+class SceneReader:
+    """
+    Memory maps a binary scene file.  Only the header is parsed up front.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise SceneFormatError(f"Empty scene file: {path}")
+
+        if len(self._map) < _HEADER.size:
+            self.close()
+            raise SceneFormatError(f"Truncated scene file: {path}")
+
+        (magic, version, self.flags, self.entity_count,
+         self._strings_offset, self._index_offset, self._transforms_offset,
+         self._blobs_offset, self._lights_offset, self.data_end) = _HEADER.unpack_from(self._map, 0)
+
+        if magic != MAGIC:
+            self.close()
+            raise SceneFormatError(f"Not a binary scene file: {path}")
+        if version > VERSION:
+            self.close()
+            raise SceneFormatError(f"Unsupported scene version {version} in {path}")
+
+        self.version = version
+        self._string_count = _UINT32.unpack_from(self._map, self._strings_offset)[0]
+        self._string_offsets_at = self._strings_offset + 4
+        self._string_data_at = self._string_offsets_at + (self._string_count + 1) * 4
+        self._string_cache = {}
+        self._entity_cache = {}
+        self._read_log()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _read_log(self):
+        """Replays the append log that follows the base sections."""
+        self._log_entities = {}
+        self._added_ids = {}
+        self._removed_ids = set()
+        self._lights_override = None
+        self.log_segments = 0
+
+        pos = self.data_end
+        end = len(self._map)
+        while pos + _LOG_SEGMENT.size <= end:
+            magic, count, length = _LOG_SEGMENT.unpack_from(self._map, pos)
+            payload_at = pos + _LOG_SEGMENT.size
+            if magic != LOG_MAGIC or payload_at + length > end:
+                break  # Truncated or foreign trailing data.
+
+            at = payload_at
+            for _ in range(count):
+                op, size = _LOG_RECORD.unpack_from(self._map, at)
+                at += _LOG_RECORD.size
+                data = self._map[at:at + size]
+                at += size
+                self._apply_log_record(op, data)
+
+            pos = payload_at + length
+            self.log_segments += 1
+
+        self.log_end = pos
+
+    def _apply_log_record(self, op, data):
+        if op == LOG_REMOVE:
+            entity_id = data.decode("utf-8")
+            self._log_entities.pop(entity_id, None)
+            if entity_id in self._added_ids:
+                del self._added_ids[entity_id]
+            else:
+                self._removed_ids.add(entity_id)
+        elif op == LOG_LIGHTS:
+            self._lights_override = json.loads(data)
+        else:
+            entity_data = json.loads(data)
+            entity_id = entity_data.get("id")
+            self._log_entities[entity_id] = entity_data
+            if op == LOG_ADD:
+                self._added_ids[entity_id] = True
+                self._removed_ids.discard(entity_id)
+
+    @property
+    def log_size(self):
+        """Bytes of append log following the base sections."""
+        return self.log_end - self.data_end
+
+    def __len__(self):
+        return self.entity_count - len(self._removed_ids) + len(self._added_ids)
+
+    def __iter__(self):
+        """Yields the live entity records: base records with the log applied."""
+        if not self._log_entities and not self._removed_ids:
+            for i in range(self.entity_count):
+                yield self[i]
+            return
+
+        seen = set()
+        for i in range(self.entity_count):
+            entity = self[i]
+            if entity.id in self._removed_ids:
+                continue
+            override = self._log_entities.get(entity.id)
+            if override is not None:
+                seen.add(entity.id)
+                yield override
+            else:
+                yield entity
+        for entity_id, entity_data in self._log_entities.items():
+            if entity_id not in seen:
+                yield entity_data
+
+    def __getitem__(self, i):
+        """Returns the base record stored in slot i (the append log is not applied)."""
+        if i < 0:
+            i += self.entity_count
+        if not 0 <= i < self.entity_count:
+            raise IndexError(i)
+        entity = self._entity_cache.get(i)
+        if entity is None:
+            name_id, entity_id, model_id, type_id, _, _ = self._index_record(i)
+            entity = SceneEntity(
+                self, i,
+                self.string(name_id),
+                self.string(entity_id),
+                self.string(model_id),
+                self.string(type_id),
+            )
+            self._entity_cache[i] = entity
+        return entity
+
+    def _index_record(self, i):
+        return _INDEX_RECORD.unpack_from(self._map, self._index_offset + i * _INDEX_RECORD.size)
+
+    def string(self, string_id):
+        if string_id == NO_STRING:
+            return None
+        value = self._string_cache.get(string_id)
+        if value is None:
+            start, end = struct.unpack_from("<II", self._map, self._string_offsets_at + string_id * 4)
+            value = self._map[self._string_data_at + start:self._string_data_at + end].decode("utf-8")
+            self._string_cache[string_id] = value
+        return value
+
+    def transform_values(self, i):
+        return struct.unpack_from("<9f", self._map, self._transforms_offset + i * _TRANSFORM_SIZE)
+
+    def entity_properties(self, i):
+        offset, length = self._index_record(i)[4:6]
+        start = self._blobs_offset + offset
+        return json.loads(self._map[start:start + length])
+
+    def lights(self):
+        if self._lights_override is not None:
+            return self._lights_override
+        return json.loads(self._map[self._lights_offset:self.data_end])
+
+
+def open_scene(path):
+    return SceneReader(os.path.abspath(os.path.normpath(path)))
@@ -0,0 +1,223 @@
+# scene_streamer.py
+
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+from parse_cache import ParseCache, parse_toml_bytes
+from model_import import resolve_converted
+
+
+class SceneStreamer:
+    """
+    Streams entities into the scene without blocking the frame.
+
+    Entity files are parsed on a thread pool, models are requested through
+    Panda3D's asynchronous loader, and a task attaches finished entities in
+    batches of at most batch_size per frame.
+
+    build_entity(entity_data, model) runs on the main thread and returns the
+    created object (or None); model is None when the record has no model or it
+    failed to load.
+
+    With a model_cache (see model_cache.ModelCache) each distinct model file is
+    requested once; every entity using it gets an instance of the cached prototype.
+
+    Entity files are parsed through the project's parse_cache.ParseCache unless
+    use_parse_cache is False.
+    """
+
+    def __init__(self, base, build_entity, batch_size=32, max_workers=None,
+                 on_progress=None, on_done=None, resolve_model_path=None, model_cache=None,
+                 use_parse_cache=True):
+        self.base = base
+        self.model_cache = model_cache
+        self.build_entity = build_entity
+        self.batch_size = batch_size
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.resolve_model_path = resolve_model_path or _resolve_model_path
+        self.use_parse_cache = use_parse_cache
+        self._parse_caches = set()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or min(8, (os.cpu_count() or 2)))
+
+        self.total = 0
+        self.loaded = 0
+        self.results = []
+        self.errors = []
+        self.cancelled = False
+
+        self._parsed = queue.Queue()  # Filled by worker threads
+        self._pending_models = 0
+        self._waiting_for_model = {}  # model path -> entity records waiting on one async load
+        self._ready = []  # (entity_data, model) waiting to be attached
+        self._task_name = f"scene_streamer_{id(self)}"
+        self._task = None
+
+    # ------------------------------------------------------------------
+    # Input
+    # ------------------------------------------------------------------
+
+    def load_files(self, file_paths):
+        """Parse TOML entity files on the pool and stream the entities in."""
+        file_paths = list(file_paths)
+        self.total += len(file_paths)
+        for file_path in file_paths:
+            if self.use_parse_cache:
+                cache = ParseCache.for_folder(os.path.dirname(os.path.abspath(file_path)))
+                self._parse_caches.add(cache)
+                future = self.executor.submit(cache.load, file_path)
+            else:
+                future = self.executor.submit(_parse_toml, file_path)
+            future.add_done_callback(lambda f, path=file_path: self._on_parsed(path, f))
+        self._start()
+        return self
+
+    def load_archive(self, archive, names=None):
+        """Parse entity entries straight out of a map_archive.MapArchive on the pool."""
+        names = archive.entity_entries() if names is None else list(names)
+        self.total += len(names)
+        for name in names:
+            future = self.executor.submit(archive.read_toml, name)
+            future.add_done_callback(lambda f, path=f"{archive.path}:{name}": self._on_parsed(path, f))
+        self._start()
+        return self
+
+    def load_records(self, records):
+        """Stream already parsed records (e.g. from scene_format.SceneReader)."""
+        records = list(records)
+        self.total += len(records)
+        for entity_data in records:
+            self._parsed.put((entity_data, None))
+        self._start()
+        return self
+
+    def cancel(self):
+        self.cancelled = True
+        self.executor.shutdown(wait=False)
+        self.base.taskMgr.remove(self._task_name)
+
+    @property
+    def done(self):
+        return self.loaded >= self.total
+
+    # ------------------------------------------------------------------
+    # Pipeline
+    # ------------------------------------------------------------------
+
+    def _on_parsed(self, file_path, future):
+        # Worker thread: only hand the result over to the main thread.
+        try:
+            self._parsed.put((future.result(), None))
+        except Exception as e:
+            self._parsed.put((None, f"Error parsing '{file_path}': {e}"))
+
+    def _start(self):
+        if self._task is None:
+            self._task = self.base.taskMgr.add(self._stream_task, self._task_name)
+
+    def _request_model(self, entity_data):
+        model_path = self.resolve_model_path(entity_data.get("entity_model"))
+        if not model_path:
+            self._ready.append((entity_data, None))
+            return
+
+        if self.model_cache is None:
+            def on_model_loaded(model, entity_data=entity_data):
+                self._pending_models -= 1
+                if model is None:
+                    print(f"⚠️ Model failed to load for {entity_data.get('name', 'Unnamed')}: {model_path}")
+                self._ready.append((entity_data, model))
+
+            self._pending_models += 1
+            self.base.loader.loadModel(model_path, callback=on_model_loaded)
+            return
+
+        if self.model_cache.contains(model_path):
+            self._ready.append((entity_data, self.model_cache.instance(model_path)))
+            return
+
+        waiting = self._waiting_for_model.get(model_path)
+        if waiting is not None:
+            waiting.append(entity_data)
+            return
+
+        def on_prototype_loaded(model):
+            self._pending_models -= 1
+            waiting = self._waiting_for_model.pop(model_path)
+            if model is None:
+                print(f"⚠️ Model failed to load: {model_path}")
+            else:
+                self.model_cache.add(model_path, model)
+            for entity_data in waiting:
+                instance = self.model_cache.instance(model_path) if model is not None else None
+                self._ready.append((entity_data, instance))
+
+        self._waiting_for_model[model_path] = [entity_data]
+        self._pending_models += 1
+        self.base.loader.loadModel(model_path, callback=on_prototype_loaded)
+
+    def _stream_task(self, task):
+        if self.cancelled:
+            return task.done
+
+        # Issue async model requests for everything parsed since last frame.
+        while True:
+            try:
+                entity_data, error = self._parsed.get_nowait()
+            except queue.Empty:
+                break
+            if error:
+                print(f"❌ {error}")
+                self.errors.append(error)
+                self.loaded += 1
+                continue
+            self._request_model(entity_data)
+
+        # Attach a bounded batch of finished entities.
+        batch, self._ready = self._ready[:self.batch_size], self._ready[self.batch_size:]
+        for entity_data, model in batch:
+            try:
+                result = self.build_entity(entity_data, model)
+                if result is not None:
+                    self.results.append(result)
+            except Exception as e:
+                error = f"Error building entity '{entity_data.get('name', 'Unnamed')}': {e}"
+                print(f"❌ {error}")
+                self.errors.append(error)
+            self.loaded += 1
+
+        if batch and self.on_progress:
+            self.on_progress(self.loaded, self.total)
+
+        if self.done and not self._ready and not self._pending_models:
+            self.executor.shutdown(wait=False)
+            self._task = None
+            for cache in self._parse_caches:
+                cache.flush()
+            print(f"✅ Streamed {len(self.results)} entities")
+            if self.on_done:
+                self.on_done(self.results)
+            return task.done
+        return task.cont
+
+
+def _parse_toml(file_path):
+    with open(file_path, "rb") as file:
+        return parse_toml_bytes(file.read())
+
+
+def _resolve_model_path(model_path):
+    """Same rule the synchronous loaders use: only load models that exist on disk."""
+    if model_path and os.path.exists(model_path):
+        return os.path.relpath(resolve_converted(model_path))
+    return None
+
+
+def entity_files_in_folder(folder_path):
+    """All entity TOML files directly inside folder_path (lights are stored separately)."""
+    return [
+        os.path.join(folder_path, file_name)
+        for file_name in os.listdir(folder_path)
+        if file_name.endswith(".toml") and file_name != "lights.toml"
+    ]
@@ -7,7 +7,11 @@ from direct.showbase.DirectObject import DirectObject
 import os
 import importlib
 import uuid
-from script_loader import load_script
+from script_loader import load_script, register_instance
+from dirty_tracker import DirtyTracker
+from entity_registry import EntityRegistry
+from behavior_schema import (BOOL, INPUTS, NODEPATH, TEXTURE, VEC3, VECTOR_KINDS,
+                             schema_for)
 import ui_editor
 
 class ScriptInspector(QWidget):
@@ -183,25 +187,13 @@ class ScriptInspector(QWidget):
         if isCanvas:
             def make_label():
                 ui_editor.Drag_and_drop_ui_editor.label(instance, text1="Label 1", parent1=w.render2d)
-                w.hierarchy_tree.clear()
-                w.hierarchy_tree1.clear()
-
-                w.populate_hierarchy(w.hierarchy_tree, w.render)
-                w.populate_hierarchy(w.hierarchy_tree1, w.render2d)
+                w.refresh()
             def make_button():
                 ui_editor.Drag_and_drop_ui_editor.button(instance, text="Button 1", parent=w.render2d)
-                w.hierarchy_tree.clear()
-                w.hierarchy_tree1.clear()
-
-                w.populate_hierarchy(w.hierarchy_tree, w.render)
-                w.populate_hierarchy(w.hierarchy_tree1, w.render2d)
+                w.refresh()
             def make_image():
                 ui_editor.Drag_and_drop_ui_editor.Frame(instance, image="./python_img.png", parent1=w.render2d)
-                w.hierarchy_tree.clear()
-                w.hierarchy_tree1.clear()
-
-                w.populate_hierarchy(w.hierarchy_tree, w.render)
-                w.populate_hierarchy(w.hierarchy_tree1, w.render2d)
+                w.refresh()
 
             create_label = QPushButton("Create Label")
             create_button = QPushButton("Create button")
@@ -456,10 +448,8 @@ class ScriptInspector(QWidget):
         Load a script, create an instance, and display its properties in a new box.
         """
         try:
-            # Load and execute the script
-            spec = importlib.util.spec_from_file_location("script", path)
-            script_module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(script_module)
+            # Load the script (executed once per change, shared by every node using it)
+            script_module = load_script(path)
             node.set_python_tag("type", "1")
 
 
@@ -478,12 +468,16 @@ class ScriptInspector(QWidget):
                         instance = behavior_class()
                         if hasattr(instance, 'node'):
                             instance.node = self.node
+                    register_instance(path, instance)
                     self.scripts.setdefault(node, {})[path] = instance
+                    old_id = node.get_python_tag("id")
                     node.set_python_tag("scripts", self.scripts[node])
                     node.set_python_tag("script_paths", self.scripts[node])
                     data = node.get_python_tag("script_properties") or {os.path.basename(path)}
                     node.set_python_tag("script_properties", data)
                     node.set_python_tag("id", str(uuid.uuid4())[:8])
+                    self.world.dirty_tracker.rename_id(node, old_id)
+                    EntityRegistry.shared().rename_id(node, old_id)
                     if prop:
                         self.prop[node] = prop
                         # Create a new group box for the script
@@ -592,13 +586,13 @@ class ScriptInspector(QWidget):
                 return widget
             else:
                 print(f"NodePath '{extra_value}' not found. Searching for tags instead.")
-                for potential_node in self.world.render.find_all_matches("**"):
-                    if potential_node.has_python_tag("id") and potential_node.get_python_tag("id") == extra_value:
-                        print(f"Found NodePath by tag: {potential_node.get_name()}")
-                        widget = Label(f"{attr}:", potential_node.get_name())
-                        widget.setMaximumHeight(max_height)
-                        widget.textChanged.connect(lambda text, attr=attr: self.update(attr, text, nodepath, path))
-                        return widget
+                potential_node = EntityRegistry.shared().get(extra_value)
+                if potential_node is not None:
+                    print(f"Found NodePath by tag: {potential_node.get_name()}")
+                    widget = Label(f"{attr}:", potential_node.get_name())
+                    widget.setMaximumHeight(max_height)
+                    widget.textChanged.connect(lambda text, attr=attr: self.update(attr, text, nodepath, path))
+                    return widget
                 print(f"No NodePath found for '{extra_value}' by name or tag.")
                 return None
 
@@ -674,35 +668,36 @@ class ScriptInspector(QWidget):
         # -------------------------------------------------------------------------
         # Process the script_instance Attributes
         # -------------------------------------------------------------------------
-        attributes = vars(script_instance)
+        # Field types and widget kinds are reflected once per script class
+        schema = schema_for(script_instance)
         isBuiltIn = False
 
         if isLoadScript and path != "":
-            for attr, value in attributes.items():
+            for attr, value, kind in schema.items(script_instance):
                 # Mark built-in scripts if needed.
                 if attr == "__builtin__" and value:
                     isBuiltIn = True
 
                 # Check for Vec3-like properties.
-                if ((isinstance(value, Vec3)) or (isinstance(value, (list, tuple)) and len(value) == 3)):
+                if kind == VEC3:
                     script_layout.addWidget(create_vec3_widget(attr, value))
                     continue
 
                 # For built-in scripts with boolean properties.
-                if isBuiltIn and isinstance(value, bool):
+                if isBuiltIn and kind == BOOL:
                     script_layout.addWidget(create_bool_widget(attr, value))
                     continue
 
                 # Process extra properties from self.prop, if any.
                 for prop_dict in self.prop.values():
                     for extra_value in prop_dict.values():
-                        if isinstance(value, bool):
+                        if kind == BOOL:
                             script_layout.addWidget(create_bool_widget(attr, value))
-                        elif isinstance(value, NodePath):
+                        elif kind == NODEPATH:
                             widget = create_nodepath_widget_from_extra(attr, extra_value)
                             if widget:
                                 script_layout.addWidget(widget)
-                        elif hasattr(value, "get_name") and "Texture" in str(type(value)):
+                        elif kind == TEXTURE:
                             script_layout.addWidget(create_texture_widget(attr, value, extra_value))
                         else:
                             # Default: label + input field.
@@ -713,24 +708,20 @@ class ScriptInspector(QWidget):
                             field_value = extra_value if extra_value else value
                             script_layout.addWidget(create_input_widget(attr, field_value))
         else:
-            for attr, value in attributes.items():
+            for attr, value, kind in schema.items(script_instance):
                 print(attr, value)
                 if attr == "__builtin__" and value:
                     print("True")
                 # Special case for an INPUTS dictionary.
-                if attr == "INPUTS" and isinstance(value, dict):
+                if kind == INPUTS:
                     for name, val in value.items():
                         if name == "Text":
                             script_layout.addWidget(create_input_widget(name, val))
-                elif ((isinstance(value, Vec3)) or (isinstance(value, (list, tuple)) and len(value) == 3)):
-                    script_layout.addWidget(create_vec3_widget(attr, value))
-                elif ((isinstance(value, LPoint3f)) or (isinstance(value, (list, tuple)) and len(value) == 3)):
-                    script_layout.addWidget(create_vec3_widget(attr, value))
-                elif ((isinstance(value, LVecBase4f)) or (isinstance(value, (list, tuple)) and len(value) == 3)):
+                elif kind in VECTOR_KINDS:
                     script_layout.addWidget(create_vec3_widget(attr, value))
-                elif isinstance(value, NodePath):
+                elif kind == NODEPATH:
                     script_layout.addWidget(create_nodepath_widget(attr, value))
-                elif hasattr(value, "get_name") and "Texture" in str(type(value)):
+                elif kind == TEXTURE:
                     script_layout.addWidget(create_texture_widget(attr, value))
                 else:
                     lbl = QLabel(attr)
@@ -762,6 +753,7 @@ class ScriptInspector(QWidget):
 
         # Save the updated dictionary back to the node
         node1.set_python_tag("script_properties", script_properties)
+        self.world.dirty_tracker.mark_dirty(node1, DirtyTracker.SCRIPT_PROPERTIES)
 
         print(f"Updated script_properties for {node1.get_name()} - {script_name}: {script_properties}")
 
@@ -790,7 +782,11 @@ class ScriptInspector(QWidget):
     def get_node_by_name(self, name):
         """
         Retrieve a NodePath by name from the scene graph.
+        Entities come straight from the registry; other nodes still need a search.
         """
+        entity = EntityRegistry.shared().find_first_by_name(name)
+        if entity is not None:
+            return entity
         for node in self.world.render.find_all_matches("**"):  # Search in the scene graph
             if node.get_name() == name:
                 return node
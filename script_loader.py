@@ -2,12 +2,19 @@
 
 import importlib.util
 import os
+import weakref
 
-def load_script(script_path):
-    """
-    Dynamically load a Python module from a given file path.
-    Returns the loaded module.
-    """
+# realpath -> (mtime, module). Each script file runs once per change, not once per entity.
+_modules = {}
+# realpath -> live behavior instances created from that script
+_instances = {}
+
+
+def _key(script_path):
+    return os.path.realpath(script_path)
+
+
+def _exec_script(script_path):
     module_name = os.path.splitext(os.path.basename(script_path))[0]
     spec = importlib.util.spec_from_file_location(module_name, script_path)
     if spec and spec.loader:
@@ -16,3 +23,88 @@ def load_script(script_path):
         return module
     else:
         raise ImportError(f"Could not load script: {script_path}")
+
+
+def load_script(script_path):
+    """
+    Dynamically load a Python module from a given file path.
+    Returns the loaded module. The module is cached by path and modification
+    time; a changed file is executed again and its live instances are moved
+    over to the new classes (see reload_script).
+    """
+    key = _key(script_path)
+    mtime = os.path.getmtime(script_path)
+    cached = _modules.get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    if cached is not None:
+        return reload_script(script_path)
+
+    module = _exec_script(script_path)
+    _modules[key] = (mtime, module)
+    return module
+
+
+def register_instance(script_path, instance):
+    """Track a behavior instance so hot reloads can update its class."""
+    _instances.setdefault(_key(script_path), weakref.WeakSet()).add(instance)
+    return instance
+
+
+def reload_script(script_path):
+    """
+    Executes script_path again and points every live instance created from it
+    at the class of the same name in the new module. Instance fields live in
+    __dict__ and are kept as they are. If the new version fails to run, the old
+    module stays in use.
+    """
+    key = _key(script_path)
+    mtime = os.path.getmtime(script_path)
+    old = _modules.get(key)
+    try:
+        module = _exec_script(script_path)
+    except Exception as e:
+        print(f"❌ Reloading '{script_path}' failed, keeping the previous version: {e}")
+        if old is not None:
+            _modules[key] = (mtime, old[1])  # Do not retry until the file changes again
+            return old[1]
+        raise
+    _modules[key] = (mtime, module)
+
+    swapped = 0
+    for instance in list(_instances.get(key, ())):
+        new_class = getattr(module, type(instance).__name__, None)
+        if not isinstance(new_class, type):
+            continue
+        try:
+            instance.__class__ = new_class
+            swapped += 1
+        except TypeError as e:
+            print(f"⚠️ Could not update {type(instance).__name__} instance: {e}")
+    print(f"🔄 Reloaded {os.path.basename(script_path)} ({swapped} live instances updated)")
+    return module
+
+
+def changed_scripts():
+    """Paths of loaded scripts whose file changed since they were loaded."""
+    changed = []
+    for key, (mtime, _) in _modules.items():
+        try:
+            if os.path.getmtime(key) != mtime:
+                changed.append(key)
+        except OSError:
+            pass  # Deleted or being rewritten; check again later
+    return changed
+
+
+def watch_scripts(task_mgr, interval=1.0):
+    """
+    Polls the loaded scripts every interval seconds and hot reloads the ones
+    that changed on disk. Returns the task.
+    """
+    def poll(task):
+        for script_path in changed_scripts():
+            reload_script(script_path)
+        return task.again
+
+    return task_mgr.doMethodLater(interval, poll, "script_watcher")
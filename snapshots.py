@@ -0,0 +1,229 @@
+# snapshots.py
+
+from interest import POSITION_FIELDS, InterestManager
+from packet_aggregator import PRIORITY_HIGH, OutgoingQueue
+from sync_delta import snapshot_value
+
+_MISSING = object()
+
+
+class SnapshotBuffer:
+    """
+    Ring buffer of the last size world snapshots, by tick.
+
+    A snapshot is a dict entity name -> fields dict. Field dicts are never
+    modified once stored (WorldState replaces the dict of an entity when it
+    changes), so consecutive snapshots share every unchanged entity and
+    "did this entity change" is an identity check.
+    """
+
+    def __init__(self, size=32):
+        self.size = size
+        self._ticks = [None] * size
+        self._snapshots = [None] * size
+
+    def store(self, tick, snapshot):
+        index = tick % self.size
+        self._ticks[index] = tick
+        self._snapshots[index] = snapshot
+
+    def get(self, tick):
+        """The snapshot of tick, or None if it was never stored or has been overwritten."""
+        if tick is None:
+            return None
+        index = tick % self.size
+        return self._snapshots[index] if self._ticks[index] == tick else None
+
+
+class WorldState:
+    """Entity fields as the server knows them, copied on write."""
+
+    def __init__(self):
+        self.entities = {}  # name -> fields dict (replaced, never mutated)
+
+    def apply(self, entity_name, changes):
+        fields = self.entities.get(entity_name)
+        updated = dict(fields) if fields is not None else {}
+        changed = fields is None
+        for var_name, value in changes.items():
+            value = snapshot_value(value)
+            if updated.get(var_name, _MISSING) != value:
+                updated[var_name] = value
+                changed = True
+        if changed:
+            self.entities[entity_name] = updated
+
+    def remove(self, entity_name):
+        self.entities.pop(entity_name, None)
+
+    def snapshot(self):
+        return dict(self.entities)  # Shallow: shares the field dicts
+
+
+def diff_snapshots(baseline, current):
+    """({entity: changed fields}, [removed entities]) going from baseline to current."""
+    changed = {}
+    for name, fields in current.items():
+        base_fields = baseline.get(name)
+        if base_fields is fields:
+            continue
+        if base_fields is None:
+            changed[name] = fields
+            continue
+        delta = {key: value for key, value in fields.items() if base_fields.get(key, _MISSING) != value}
+        if delta:
+            changed[name] = delta
+    removed = [name for name in baseline if name not in current]
+    return changed, removed
+
+
+class SnapshotClient:
+    """
+    Per-client state on the server: its wire session, send queue, acked
+    baseline and the views (world filtered to its area of interest) it was sent.
+    """
+
+    def __init__(self, address, session, write, mtu, buffer_size):
+        self.address = address
+        self.session = session
+        self.outgoing = OutgoingQueue(session, write, mtu)
+        self.views = SnapshotBuffer(buffer_size)
+        self.acked = None  # Newest tick the client acknowledged
+
+    def ack(self, tick):
+        if self.acked is None or tick > self.acked:
+            self.acked = tick
+
+
+class SnapshotServer:
+    """
+    Server-authoritative world snapshots with delta compression.
+
+    Client variable updates are applied to the WorldState. Every tick each
+    client's view of the world (the entities in its area of interest, see
+    interest.InterestManager) is stored in its SnapshotBuffer ring and the
+    client receives one SNAPSHOT message holding only the fields that changed
+    since the newest view it acknowledged (its baseline). Entities that left
+    its area are sent as removed; entities that enter it arrive in full. A
+    client that has not acked anything yet, or whose baseline fell out of the
+    ring buffer, gets a full snapshot. Lost snapshots need no resend: the next
+    one is still relative to the last acked baseline and so carries everything
+    that is missing.
+    """
+
+    def __init__(self, buffer_size=32, mtu=1200, cell_size=50.0):
+        self.world = WorldState()
+        self.interest = InterestManager(cell_size)
+        self.buffer_size = buffer_size
+        self.clients = {}  # address -> SnapshotClient
+        self.mtu = mtu
+        self.tick_count = 0
+
+    def client(self, address, session, write):
+        client = self.clients.get(address)
+        if client is None:
+            client = self.clients[address] = SnapshotClient(address, session, write, self.mtu, self.buffer_size)
+        return client
+
+    def disconnect(self, address):
+        self.clients.pop(address, None)
+        self.interest.disconnect(address)
+
+    def receive(self, address, message):
+        """Applies a decoded client message (variable update, interest or snapshot ack)."""
+        if "snapshot_ack" in message:
+            client = self.clients.get(address)
+            if client is not None:
+                client.ack(message["snapshot_ack"])
+            return
+        if "interest" in message:
+            interest = self.interest.validate(message["interest"])
+            if interest is None:
+                print(f"⚠️ Ignored malformed interest from {address}: {message['interest']!r}")
+            else:
+                self.interest.set_interest(address, **interest)
+            return
+        changes = message.get("delta")
+        if changes is None and "variable" in message:
+            changes = {message["variable"]: message.get("value")}
+        entity_name = message.get("entity")
+        if changes and entity_name is not None:
+            is_new = entity_name not in self.world.entities
+            self.world.apply(entity_name, changes)
+            if is_new or any(name in changes for name in POSITION_FIELDS):
+                self.interest.place(entity_name, self.world.entities[entity_name])
+
+    def remove_entity(self, entity_name):
+        self.world.remove(entity_name)
+        self.interest.remove(entity_name)
+
+    def tick(self):
+        """Sends every client the delta of its view since its acked baseline."""
+        self.tick_count += 1
+        self.interest.update()
+        current = self.world.snapshot()
+        for address, client in self.clients.items():
+            relevant = self.interest.relevant(address)
+            if relevant is None:
+                view = current
+            else:
+                view = {name: current[name] for name in relevant if name in current}
+                for name in self.interest.unplaced:
+                    if name in current:
+                        view[name] = current[name]
+            client.views.store(self.tick_count, view)
+            self.send_snapshot(client, view)
+
+    def send_snapshot(self, client, current):
+        baseline = client.views.get(client.acked)
+        if baseline is None:
+            entities, removed, baseline_tick = current, [], None
+        else:
+            entities, removed = diff_snapshots(baseline, current)
+            baseline_tick = client.acked
+        client.outgoing.push({
+            "snapshot": self.tick_count,
+            "baseline": baseline_tick,
+            "entities": entities,
+            "removed": removed,
+        }, PRIORITY_HIGH)
+        client.outgoing.flush()
+
+
+class SnapshotReceiver:
+    """
+    Client side: rebuilds each snapshot from the baseline it was compressed
+    against and reports what changed compared to the snapshot applied last.
+    """
+
+    def __init__(self, buffer_size=32):
+        self.buffer = SnapshotBuffer(buffer_size)
+        self.applied_tick = None
+        self.applied = {}
+
+    def receive(self, message):
+        """
+        Returns ({entity: changed fields}, [removed entities]) to apply, or None
+        if the snapshot is stale or its baseline is unknown. The caller acks
+        message["snapshot"] when the result is not None.
+        """
+        tick = message["snapshot"]
+        if self.applied_tick is not None and tick <= self.applied_tick:
+            return None  # Out of order; a newer snapshot was applied already
+        baseline_tick = message.get("baseline")
+        if baseline_tick is None:
+            baseline = {}
+        else:
+            baseline = self.buffer.get(baseline_tick)
+            if baseline is None:
+                return None
+        state = dict(baseline)
+        for name, delta in message.get("entities", {}).items():
+            fields = state.get(name)
+            state[name] = dict(fields, **delta) if fields is not None else dict(delta)
+        for name in message.get("removed", ()):
+            state.pop(name, None)
+        self.buffer.store(tick, state)
+        changes, removed = diff_snapshots(self.applied, state)
+        self.applied, self.applied_tick = state, tick
+        return changes, removed
@@ -0,0 +1,88 @@
+# static_batching.py
+
+import math
+
+STATIC_PROPERTY = "static"
+
+
+def is_static(entity):
+    """
+    An entity can be batched when its properties mark it static and it has no
+    behaviors (scripts usually move or toggle their node).
+    """
+    return bool(entity.properties.get(STATIC_PROPERTY, False)) and not entity.behavior_instances
+
+
+class StaticBatcher:
+    """
+    Merges static entities into one node per spatial cell.
+
+    Static entities are grouped by the cell (cell_size x cell_size on the
+    ground plane) their position falls in, reparented under a batch node for
+    that cell and the batch is flattened with flattenStrong, so a dense cell
+    costs a handful of draw calls instead of one per entity. Cells keep the
+    batches small enough for view frustum culling to stay useful.
+
+    Entity nodes do not survive flattening; batch_for(entity_id) returns the
+    batch an entity was merged into (picking), and every batch carries the
+    ids it holds in its "entity_ids" python tag.
+    """
+
+    def __init__(self, root, cell_size=64.0):
+        self.root = root
+        self.cell_size = cell_size
+        self.batches = {}  # cell -> batch NodePath
+        self.entity_batches = {}  # entity id -> batch NodePath
+
+    def cell_of(self, node):
+        pos = node.getPos(self.root)
+        return math.floor(pos.x / self.cell_size), math.floor(pos.y / self.cell_size)
+
+    def build(self, entities):
+        """
+        Batches every static entity in entities and returns the ones that were
+        batched. Their node attribute is cleared, since the node was merged away.
+        """
+        cells = {}
+        for entity in entities:
+            if entity.node is None or entity.node.is_empty() or not is_static(entity):
+                continue
+            cells.setdefault(self.cell_of(entity.node), []).append(entity)
+
+        batched = []
+        for cell, members in cells.items():
+            if len(members) < 2:
+                continue  # Nothing to merge with
+            batch = self.batches.get(cell)
+            if batch is None:
+                batch = self.root.attachNewNode(f"static_batch_{cell[0]}_{cell[1]}")
+                batch.set_python_tag("entity_ids", [])
+                self.batches[cell] = batch
+
+            entity_ids = batch.get_python_tag("entity_ids")
+            for entity in members:
+                entity.node.wrtReparentTo(batch)
+                # Tagged nodes are kept apart by the flattener, so drop the tags first.
+                entity.node.clear_python_tag("id")
+                entity.node.clear_python_tag("scripts")
+                entity_ids.append(entity.entity_id)
+                self.entity_batches[entity.entity_id] = batch
+                entity.node = None
+                batched.append(entity)
+
+            # Instanced (model cache) geometry is copied by the flattener, the
+            # shared prototypes are left untouched.
+            batch.flattenStrong()
+
+        if batched:
+            print(f"✅ Batched {len(batched)} static entities into {len(self.batches)} cells")
+        return batched
+
+    def batch_for(self, entity_id):
+        return self.entity_batches.get(entity_id)
+
+    def clear(self):
+        for batch in self.batches.values():
+            batch.removeNode()
+        self.batches.clear()
+        self.entity_batches.clear()
@@ -0,0 +1,97 @@
+# sync_delta.py
+
+_MISSING = object()
+
+
+def snapshot_value(value):
+    """
+    Plain, comparable copy of a synced value: numbers, strings, bools and None
+    as they are, vectors/points/quaternions and other sequences as tuples, and
+    dicts as dicts. The copy is what gets compared next frame and what is sent,
+    so it must not share state with the live value.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, dict):
+        return {key: snapshot_value(item) for key, item in value.items()}
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    try:
+        return tuple(snapshot_value(item) for item in value)  # LVecBase*, LQuaternion, lists...
+    except TypeError:
+        return value
+
+
+def has_changed(old, new, epsilon=0.0):
+    """
+    True if snapshot new differs from snapshot old. With an epsilon, numbers and
+    numeric sequences only count as changed once a component moved by more
+    than epsilon.
+    """
+    if old is _MISSING:
+        return True
+    if not epsilon:
+        return old != new
+    if _is_number(old) and _is_number(new):
+        return abs(new - old) > epsilon
+    if isinstance(old, tuple) and isinstance(new, tuple) and len(old) == len(new):
+        for a, b in zip(old, new):
+            if _is_number(a) and _is_number(b):
+                if abs(b - a) > epsilon:
+                    return True
+            elif a != b:
+                return True
+        return False
+    return old != new
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class DeltaTracker:
+    """
+    Remembers the last value sent for each synced variable of one behavior and
+    reports only the ones that changed since, grouped by sync type.
+    """
+
+    __slots__ = ("sent", "epsilon")
+
+    def __init__(self):
+        self.sent = {}  # var name -> snapshot last sent (or received)
+        self.epsilon = {}  # var name -> change threshold
+
+    def set_epsilon(self, var_name, epsilon):
+        if epsilon:
+            self.epsilon[var_name] = epsilon
+        else:
+            self.epsilon.pop(var_name, None)
+
+    def changes(self, owner, sync_variables):
+        """
+        {sync_type: {var name: snapshot}} for the variables of owner that changed
+        since they were last sent, and records them as sent. None values are not
+        synced, as before.
+        """
+        changes = {}
+        sent = self.sent
+        for var_name, sync_type in sync_variables.items():
+            value = getattr(owner, var_name, None)
+            if value is None:
+                continue
+            snapshot = snapshot_value(value)
+            if has_changed(sent.get(var_name, _MISSING), snapshot, self.epsilon.get(var_name, 0.0)):
+                sent[var_name] = snapshot
+                changes.setdefault(sync_type, {})[var_name] = snapshot
+        return changes
+
+    def received(self, var_name, value):
+        """A value applied from the network is already in sync; do not echo it back."""
+        self.sent[var_name] = snapshot_value(value)
+
+    def forget(self, var_name=None):
+        """Send var_name (or every variable) again next frame, e.g. for a new peer."""
+        if var_name is None:
+            self.sent.clear()
+        else:
+            self.sent.pop(var_name, None)
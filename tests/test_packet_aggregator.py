@@ -0,0 +1,165 @@
+# test_packet_aggregator.py
+
+import pytest
+
+from packet_aggregator import PRIORITY_HIGH, PRIORITY_LOW, OutgoingQueue
+from wire_protocol import FRAGMENT_MAGIC, MAGIC, Reassembler, Session, WireProtocolError, fragment
+
+
+def delta(entity, **changes):
+    return {"entity": entity, "delta": changes, "sync_type": "udp"}
+
+
+def make_queue(mtu=1200, budget=None):
+    datagrams = []
+    return OutgoingQueue(Session(), datagrams.append, mtu, budget), datagrams
+
+
+def receive(datagrams, session=None, reassembler=None):
+    session = session or Session()
+    reassembler = reassembler or Reassembler()
+    messages = []
+    for datagram in datagrams:
+        packet = reassembler.feed(datagram, "peer")
+        if packet is not None:
+            messages.extend(session.decode(packet))
+    return messages
+
+
+# ----------------------------------------------------------------------
+# fragment / Reassembler
+# ----------------------------------------------------------------------
+
+def test_fragments_fit_mtu_and_reassemble():
+    packet = MAGIC + bytes(range(256)) * 20
+    pieces = fragment(packet, 500, group=7)
+    assert len(pieces) > 1
+    assert all(len(piece) <= 500 and piece[:2] == FRAGMENT_MAGIC for piece in pieces)
+    reassembler = Reassembler()
+    assert [reassembler.feed(piece, "peer") for piece in pieces[:-1]] == [None] * (len(pieces) - 1)
+    assert reassembler.feed(pieces[-1], "peer") == packet
+    assert not reassembler.groups
+
+
+def test_fragments_in_any_order():
+    packet = MAGIC + bytes(3000)
+    pieces = fragment(packet, 400, group=1)
+    reassembler = Reassembler()
+    results = [reassembler.feed(piece, "peer") for piece in reversed(pieces)]
+    assert results[-1] == packet and results[:-1] == [None] * (len(pieces) - 1)
+
+
+def test_fragment_groups_are_kept_per_address():
+    pieces_a = fragment(MAGIC + b"a" * 1000, 400, group=1)
+    pieces_b = fragment(MAGIC + b"b" * 1000, 400, group=1)
+    reassembler = Reassembler()
+    for piece_a, piece_b in zip(pieces_a[:-1], pieces_b[:-1]):
+        reassembler.feed(piece_a, "a")
+        reassembler.feed(piece_b, "b")
+    assert reassembler.feed(pieces_a[-1], "a") == MAGIC + b"a" * 1000
+    assert reassembler.feed(pieces_b[-1], "b") == MAGIC + b"b" * 1000
+
+
+def test_incomplete_group_expires():
+    pieces = fragment(MAGIC + bytes(1000), 400, group=3)
+    reassembler = Reassembler(timeout=0.0)
+    reassembler.feed(pieces[0], "peer")
+    # The timed out group starts over, so the remaining pieces never complete it
+    assert all(reassembler.feed(piece, "peer") is None for piece in pieces[1:])
+
+
+def test_unfragmented_datagrams_pass_through():
+    assert Reassembler().feed(b"P3\x01\x00", "peer") == b"P3\x01\x00"
+
+
+@pytest.mark.parametrize("datagram", [FRAGMENT_MAGIC + b"\x01", FRAGMENT_MAGIC + b"\x01\x00\x00\x02\x02"])
+def test_bad_fragments_raise(datagram):
+    with pytest.raises(WireProtocolError):
+        Reassembler().feed(datagram, "peer")
+
+
+def test_too_many_fragments_raise():
+    with pytest.raises(WireProtocolError):
+        fragment(bytes(256 * 100), 100, group=0)
+
+
+# ----------------------------------------------------------------------
+# OutgoingQueue
+# ----------------------------------------------------------------------
+
+def test_messages_share_a_datagram():
+    queue, datagrams = make_queue()
+    for i in range(10):
+        queue.push(delta(f"Enemy_{i}", hp=i))
+    assert queue.flush() == 1
+    assert [m["entity"] for m in receive(datagrams)] == [f"Enemy_{i}" for i in range(10)]
+
+
+def test_datagrams_respect_mtu():
+    queue, datagrams = make_queue(mtu=200)
+    messages = [delta(f"Enemy_{i:03d}", position=(float(i), 2.0, 3.0), state="chasing") for i in range(60)]
+    for message in messages:
+        queue.push(message)
+    queue.flush()
+    assert len(datagrams) > 1
+    assert all(len(datagram) <= 200 for datagram in datagrams)
+    assert all(datagram[:2] == MAGIC for datagram in datagrams)  # Split, not fragmented
+    assert receive(datagrams) == messages
+
+
+def test_oversized_message_is_fragmented():
+    queue, datagrams = make_queue(mtu=300)
+    message = delta("Boss", blob=bytes(2000))
+    queue.push(message)
+    queue.flush()
+    assert len(datagrams) > 1 and all(len(datagram) <= 300 for datagram in datagrams)
+    assert receive(datagrams) == [message]
+
+
+def test_deltas_merge_per_entity():
+    queue, datagrams = make_queue()
+    queue.push(delta("Player", hp=1, ammo=5))
+    queue.push(delta("Player", hp=2))
+    assert len(queue) == 1
+    queue.flush()
+    assert receive(datagrams) == [delta("Player", hp=2, ammo=5)]
+
+
+def test_merge_keeps_callers_dict():
+    queue, _ = make_queue()
+    first = delta("Player", hp=1)
+    queue.push(first)
+    queue.push(delta("Player", hp=2))
+    assert first["delta"] == {"hp": 1}
+
+
+def test_high_priority_first():
+    queue, datagrams = make_queue()
+    queue.push(delta("Tree", sway=0.5), PRIORITY_LOW)
+    queue.push({"action": "jump", "category": "local", "pressed": True}, PRIORITY_HIGH)
+    queue.flush()
+    assert [m.get("action", m.get("entity")) for m in receive(datagrams)] == ["jump", "Tree"]
+
+
+def test_budget_defers_low_priority_without_starving_it():
+    queue, datagrams = make_queue(budget=120)
+    queue.push(delta("Scenery", colors=list(range(40))), PRIORITY_LOW)
+    session, reassembler = Session(), Reassembler()
+    flushes = []
+    for _ in range(4):
+        for i in range(3):
+            queue.push(delta(f"Enemy_{i}", position=(1.0, 2.0, 3.0)), PRIORITY_HIGH)
+        queue.flush()
+        flushes.append([m["entity"] for m in receive(datagrams, session, reassembler)])
+        datagrams.clear()
+    assert flushes[0] == ["Enemy_0", "Enemy_1", "Enemy_2"]
+    assert any("Scenery" in entities for entities in flushes[1:])
+
+
+def test_string_acks_flush_alone():
+    queue, datagrams = make_queue()
+    peer = Session()
+    queue.session.decode(peer.encode([delta("Player", hp=1)]))
+    assert queue.flush() == 1
+    peer.decode(datagrams[0])
+    assert b"Player" not in peer.encode([delta("Player", hp=2)])
@@ -0,0 +1,177 @@
+# test_wire_protocol.py
+
+import json
+import struct
+
+import pytest
+
+from wire_protocol import (
+    HEADER_SIZE,
+    MAGIC,
+    MAX_TABLE_STRING,
+    Session,
+    WireProtocolError,
+)
+
+
+def roundtrip(messages, sender=None, receiver=None):
+    sender = sender or Session()
+    receiver = receiver or Session()
+    return receiver.decode(sender.encode(messages))
+
+
+def delta(value, name="value"):
+    return {"entity": "Player", "delta": {name: value}, "sync_type": "udp"}
+
+
+@pytest.mark.parametrize("value", [
+    None, True, False,
+    0, 127, -128,  # int8
+    128, -129, 2 ** 31 - 1, -2 ** 31,  # int32
+    2 ** 31, -2 ** 63,  # int64
+    0.5, -1024.25,  # float32, exact
+    1e7 + 0.125,  # float64 beyond FLOAT32_RANGE
+    "idle",  # string table
+    "x" * (MAX_TABLE_STRING + 1),  # inline string
+    "héllo ✅",
+    b"\x00\x01\xff",
+    [1, "two", None, [3.5]],
+    {"hp": 10, "tags": ["a", "b"], "nested": {"ok": True}},
+    [],
+])
+def test_values_roundtrip(value):
+    (message,) = roundtrip([delta(value)])
+    assert message == delta(value)
+
+
+@pytest.mark.parametrize("vector", [(1.5, 2.0), (1.5, -2.0, 3.25), (0.0, 0.25, 0.5, 1.0)])
+def test_float_vectors_roundtrip_as_tuples(vector):
+    (message,) = roundtrip([delta(vector)])
+    assert message["delta"]["value"] == vector
+
+
+def test_float32_precision():
+    (message,) = roundtrip([delta(0.1)])
+    assert message["delta"]["value"] == pytest.approx(0.1, rel=1e-6)
+
+
+def test_mixed_list_is_not_a_vector():
+    (message,) = roundtrip([delta([1.0, 2, 3.0])])
+    assert message["delta"]["value"] == [1.0, 2, 3.0]
+
+
+def test_message_kinds_roundtrip():
+    messages = [
+        {"entity": "Enemy_01", "delta": {"position": (1.0, 2.0, 3.0), "state": "chasing"}, "sync_type": "tcp"},
+        {"action": "jump", "category": "local", "pressed": True},
+        {"snapshot": 42, "baseline": None, "entities": {"Enemy_01": {"hp": 3}}, "removed": []},
+        {"snapshot": 43, "baseline": 42, "entities": {}, "removed": ["Enemy_02"]},
+        {"snapshot_ack": 43},
+        {"interest": {"radius": 50.0, "focus": "Player", "center": None, "hysteresis": 5.0}},
+    ]
+    assert roundtrip(messages) == messages
+
+
+def test_variable_update_decodes_as_delta():
+    (message,) = roundtrip([{"entity": "Player", "variable": "hp", "value": 3}])
+    assert message == {"entity": "Player", "delta": {"hp": 3}, "sync_type": "udp"}
+
+
+def test_two_byte_string_ids():
+    sender, receiver = Session(), Session()
+    names = [f"var_{i}" for i in range(300)]
+    for batch in (names[:200], names[200:]):  # A packet holds at most 255 messages, DEFINEs included
+        (message,) = roundtrip([delta({name: 0 for name in batch}, "table")], sender, receiver)
+        assert list(message["delta"]["table"]) == batch
+    string_id, packed = sender.local_ids["var_299"]
+    assert string_id > 0x7F and packed == bytes((0x80 | string_id >> 8, string_id & 0xFF))
+    # Once acknowledged, ids above 127 are still resolved without a DEFINE
+    sender.decode(receiver.encode([]))
+    packet = sender.encode([delta(1, "var_200")])
+    assert b"var_200" not in packet
+    assert receiver.decode(packet) == [delta(1, "var_200")]
+
+
+def test_defines_stop_after_ack():
+    sender, receiver = Session(), Session()
+    first = sender.encode([delta(1)])
+    receiver.decode(first)
+    sender.decode(receiver.encode([]))  # Carries the STRING_ACK
+    second = sender.encode([delta(2)])
+    assert len(second) < len(first)
+    assert b"Player" not in second
+    assert receiver.decode(second) == [delta(2)]
+
+
+def test_defines_repeat_until_acked():
+    sender, receiver = Session(), Session()
+    receiver.decode(sender.encode([delta(1)]))
+    receiver.take_acks()  # The ack is lost
+    packet = sender.encode([delta(2)])
+    assert b"Player" in packet
+    # A fresh receiver (the first packet was lost too) can still read it
+    assert Session().decode(packet) == [delta(2)]
+    # And the repeated DEFINE is acknowledged again
+    receiver.decode(packet)
+    sender.decode(receiver.encode([]))
+    assert b"Player" not in sender.encode([delta(3)])
+
+
+def test_json_fallback():
+    message = {"entity": "Player", "variable": "hp", "value": 3}
+    assert Session().decode(json.dumps(message).encode("utf-8")) == [message]
+    assert Session().decode(json.dumps([message, message]).encode("utf-8")) == [message, message]
+
+
+def test_unknown_message_is_rejected_on_encode():
+    with pytest.raises(WireProtocolError):
+        Session().encode([{"nonsense": 1}])
+
+
+def test_too_many_changes_in_one_delta_is_rejected():
+    with pytest.raises(WireProtocolError):
+        Session().encode([{"entity": "Player", "delta": {f"var_{i}": i for i in range(256)}}])
+
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b"not json",
+    MAGIC,
+    MAGIC + b"\x02\x00",  # Unsupported version
+    MAGIC + b"\x01\x01",  # One message, no body
+    MAGIC + b"\x01\x01\x63",  # Unknown message type
+    MAGIC + b"\x01\x01\x02\x05\x05\x00",  # Delta referencing undefined strings
+])
+def test_malformed_packets_raise(data):
+    with pytest.raises(WireProtocolError):
+        Session().decode(data)
+
+
+def test_unknown_value_tag_raises():
+    packet = bytearray(Session().encode([delta(1)]))
+    assert packet[-2] == 3  # T_INT8 tag of the value
+    packet[-2] = 0x7F
+    with pytest.raises(WireProtocolError):
+        Session().decode(bytes(packet))
+
+
+@pytest.mark.parametrize("value", [1, 2 ** 40, 0.5, (1.0, 2.0, 3.0), "state", "x" * 100, b"raw", [1, 2],
+                                   {"a": 1}])
+@pytest.mark.parametrize("value_last", [False, True])
+def test_every_truncation_raises(value, value_last):
+    messages = [{"snapshot_ack": 7}, delta(value)] if value_last else [delta(value), {"snapshot_ack": 7}]
+    packet = Session().encode(messages)
+    for end in range(HEADER_SIZE, len(packet)):
+        with pytest.raises(WireProtocolError):
+            Session().decode(packet[:end])
+
+
+def test_trailing_bytes_raise():
+    with pytest.raises(WireProtocolError):
+        Session().decode(Session().encode([delta(1)]) + b"\x00")
+
+
+def test_header_count_includes_defines():
+    packet = Session().encode([delta(1), {"snapshot_ack": 1}])
+    _, _, count = struct.unpack_from("<2sBB", packet)
+    assert count == 2 + 3  # Two messages plus DEFINEs for "Player", "udp" and "value"
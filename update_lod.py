@@ -0,0 +1,105 @@
+# update_lod.py
+
+from panda3d.core import BoundingVolume
+
+SLEEP = 0  # Update interval of a sleeping behavior
+
+DEFAULT_TIERS = ((40.0, 1), (100.0, 4), (float("inf"), 16))
+
+
+class UpdateLOD:
+    """
+    Update-frequency tiers for behaviors, by distance to the camera and
+    visibility.
+
+    tiers is a list of (max distance, interval): a behavior whose node lies
+    within the first max distance updates every tick, the next tier every
+    interval-th tick, and so on. Skipped ticks are not lost: the behavior gets
+    the dt accumulated since its last update. Nodes outside the camera frustum
+    (or hidden) use offscreen_interval, the farthest tier by default; SLEEP (0)
+    stops updating them until they are back in view, and the time they slept
+    is dropped.
+
+    Behaviors are re-tiered every reclassify_every ticks, not every tick.
+    Scripts opt out per class with update_lod = False and then always update
+    every tick.
+    """
+
+    def __init__(self, camera, tiers=DEFAULT_TIERS, offscreen_interval=None, reclassify_every=8):
+        self.camera = camera
+        self.tiers = sorted(tiers)
+        self.offscreen_interval = self.tiers[-1][1] if offscreen_interval is None else offscreen_interval
+        self.reclassify_every = reclassify_every
+        self.intervals = {}  # behavior -> update interval (1 = every tick)
+        self.elapsed = {}  # behavior -> dt accumulated since its last update
+        self.tick = 0
+
+    def forget(self, behavior):
+        self.intervals.pop(behavior, None)
+        self.elapsed.pop(behavior, None)
+
+    def clear(self):
+        self.intervals.clear()
+        self.elapsed.clear()
+
+    def classify(self, behaviors):
+        camera = self.camera
+        if camera is None or camera.is_empty():
+            self.intervals.clear()
+            return
+        frustum = _camera_frustum(camera)
+        intervals = {}
+        for behavior in behaviors:
+            if not getattr(behavior, "update_lod", True):
+                continue
+            node = getattr(behavior, "node", None)
+            if node is None or node.is_empty():
+                continue
+            if node.isHidden() or (frustum is not None and not _in_frustum(node, camera, frustum)):
+                interval = self.offscreen_interval
+            else:
+                distance = node.getDistance(camera)
+                interval = self.tiers[-1][1]
+                for max_distance, tier_interval in self.tiers:
+                    if distance <= max_distance:
+                        interval = tier_interval
+                        break
+            if interval != 1:
+                intervals[behavior] = interval
+        # Behaviors leaving a tier start over with the dt they collected so far
+        for behavior in list(self.elapsed):
+            if behavior not in intervals:
+                del self.elapsed[behavior]
+        self.intervals = intervals
+
+    def due(self, behavior, dt):
+        """
+        The dt to pass to update() this tick, or None to skip it. Called once per
+        tick for every behavior that has an interval other than 1.
+        """
+        interval = self.intervals[behavior]
+        if interval == SLEEP:
+            self.elapsed.pop(behavior, None)
+            return None
+        elapsed = self.elapsed.get(behavior, 0.0) + dt
+        # Spread behaviors of the same tier over the ticks of the interval
+        if (self.tick + hash(behavior)) % interval:
+            self.elapsed[behavior] = elapsed
+            return None
+        self.elapsed.pop(behavior, None)
+        return elapsed
+
+
+def _camera_frustum(camera):
+    lens_node = camera.node()
+    lens = lens_node.getLens() if hasattr(lens_node, "getLens") else None
+    return lens.makeBounds() if lens is not None else None
+
+
+def _in_frustum(node, camera, frustum):
+    bounds = node.getBounds()
+    if bounds.isEmpty() or bounds.isInfinite():
+        return True  # No geometry to cull by; treat as visible
+    bounds = bounds.makeCopy()
+    bounds.xform(node.getMat(camera))  # Node space -> lens space
+    return frustum.contains(bounds) != BoundingVolume.IF_no_intersection
@@ -0,0 +1,490 @@
+# wire_protocol.py
+
+"""
+Binary datagram format used by NetworkManager instead of JSON.
+
+Layout (all integers little endian):
+
+    header      magic "P3", version, message count
+    messages    one type byte followed by the message body
+
+Server snapshots (see snapshots.py) are one SNAPSHOT message per client and
+tick: tick, baseline tick and the changed fields of every entity as a nested
+dict value; clients answer with SNAPSHOT_ACK and describe their area of
+interest with an INTEREST message.
+
+Entity, variable, action and sync type names are sent once per session as
+DEFINE messages and referenced by ids afterwards (one byte for the first 128
+strings, two bytes after that). A definition is
+repeated in every packet that uses it until the peer acknowledges it with a
+STRING_ACK (piggybacked on its next packet), so a lost datagram never leaves
+the peer unable to read later ones.
+
+Values are tagged: None/bools in the tag byte, small ints in one byte, floats
+as float32 (float64 beyond FLOAT32_RANGE), 2/3/4 float tuples (vectors,
+points, colors) as float32 arrays, short strings through the string table,
+and lists/dicts recursively.
+
+Packets larger than the MTU travel as FRAGMENT datagrams (magic "PF", group
+id, index, total) that Reassembler puts back together before decoding.
+
+Decoded messages have the same dict shape as the old JSON messages. Datagrams
+that do not start with the magic are decoded as JSON, so older peers still
+work.
+
+Run this module to compare the codec with the JSON path.
+"""
+
+import json
+import struct
+import time
+
+MAGIC = b"P3"
+VERSION = 1
+
+_HEADER = struct.Struct("<2sBB")
+_FRAGMENT = struct.Struct("<2sBHBB")
+_INT8 = struct.Struct("<Bb")
+_INT32 = struct.Struct("<Bi")
+_INT64 = struct.Struct("<Bq")
+_FLOAT32 = struct.Struct("<Bf")
+_FLOAT64 = struct.Struct("<Bd")
+_VEC2 = struct.Struct("<B2f")
+_VEC3 = struct.Struct("<B3f")
+_VEC4 = struct.Struct("<B4f")
+_SIZED = struct.Struct("<BH")
+_SNAPSHOT = struct.Struct("<BII")
+_SNAPSHOT_ACK = struct.Struct("<BI")
+
+MSG_DEFINE = 1
+MSG_VAR_DELTA = 2
+MSG_INPUT = 3
+MSG_STRING_ACK = 4
+MSG_SNAPSHOT = 5
+MSG_SNAPSHOT_ACK = 6
+MSG_INTEREST = 7
+
+NO_BASELINE = 0xFFFFFFFF
+
+T_NONE = 0
+T_FALSE = 1
+T_TRUE = 2
+T_INT8 = 3
+T_INT32 = 4
+T_INT64 = 5
+T_FLOAT32 = 6
+T_FLOAT64 = 7
+T_VEC2 = 8
+T_VEC3 = 9
+T_VEC4 = 10
+T_STRING_REF = 11
+T_STRING = 12
+T_BYTES = 13
+T_LIST = 14
+T_DICT = 15
+
+FRAGMENT_MAGIC = b"PF"
+HEADER_SIZE = _HEADER.size
+MAX_MESSAGES = 255
+MAX_TABLE_STRING = 64  # Longer string values are sent inline
+MAX_STRINGS = 0x8000
+FLOAT32_RANGE = 1e6  # Floats beyond this keep float64 precision
+
+_VECTORS = {2: _VEC2, 3: _VEC3, 4: _VEC4}
+_VECTOR_TAGS = {2: T_VEC2, 3: T_VEC3, 4: T_VEC4}
+_TAG_VECTORS = {T_VEC2: _VEC2, T_VEC3: _VEC3, T_VEC4: _VEC4}
+
+
+class WireProtocolError(Exception):
+    """Raised for datagrams that are neither valid packets nor JSON."""
+
+
+def _pack_id(string_id):
+    """String ids below 128 take one byte, the rest two (high bit set)."""
+    if string_id < 0x80:
+        return bytes((string_id,))
+    return bytes((0x80 | string_id >> 8, string_id & 0xFF))
+
+
+def _read_id(data, offset):
+    first = data[offset]
+    if first < 0x80:
+        return first, offset + 1
+    return (first & 0x7F) << 8 | data[offset + 1], offset + 2
+
+
+class Session:
+    """
+    Codec state of one peer: the strings each side defined and which of ours
+    the peer acknowledged.
+    """
+
+    def __init__(self):
+        self.local_ids = {}  # string -> (id, packed id) we assigned
+        self.local_strings = []
+        self.confirmed = set()  # Our ids the peer acknowledged
+        self.remote_strings = {}  # id -> string the peer defined
+        self.pending_acks = []  # Peer ids to acknowledge in our next packet
+
+    # ------------------------------------------------------------------
+    # Encoding
+    # ------------------------------------------------------------------
+
+    def encode(self, messages):
+        """Packs message dicts (variable deltas/updates, inputs) into one datagram."""
+        body = bytearray()
+        defines = {}  # string id -> DEFINE message, for strings the peer has not confirmed
+        count = len(messages)
+        acks = self.take_acks()
+        if acks:
+            body += acks
+            count += 1
+        for message in messages:
+            self._encode_message(message, body, defines)
+        return self.pack(count, defines, body)
+
+    def encode_body(self, message, defines):
+        """
+        One encoded message, without header. DEFINEs it needs are added to
+        defines, so callers building packets piece by piece (packet_aggregator)
+        can size each message before choosing its packet.
+        """
+        body = bytearray()
+        self._encode_message(message, body, defines)
+        return body
+
+    def take_acks(self):
+        """The STRING_ACK message for the strings the peer defined, or b"" if none."""
+        if not self.pending_acks:
+            return b""
+        acks, self.pending_acks = self.pending_acks[:255], self.pending_acks[255:]
+        out = bytearray((MSG_STRING_ACK, len(acks)))
+        for string_id in acks:
+            out += _pack_id(string_id)
+        return out
+
+    @staticmethod
+    def pack(count, defines, body):
+        """The datagram for count messages in body plus the DEFINEs in defines."""
+        count += len(defines)
+        if count > MAX_MESSAGES:
+            raise WireProtocolError(f"Too many messages for one packet: {count}")
+        return _HEADER.pack(MAGIC, VERSION, count) + b"".join(defines.values()) + body
+
+    def _encode_message(self, message, out, defines):
+        ref = self._ref
+        if "delta" in message or "variable" in message:
+            changes = message.get("delta")
+            if changes is None:
+                changes = {message["variable"]: message.get("value")}
+            if len(changes) > 255:
+                raise WireProtocolError(f"Too many changes in one delta: {len(changes)}")
+            out.append(MSG_VAR_DELTA)
+            out += ref(message["entity"], defines)
+            out += ref(message.get("sync_type", "udp"), defines)
+            out.append(len(changes))
+            for var_name, value in changes.items():
+                out += ref(var_name, defines)
+                self._encode_value(value, out, defines)
+        elif "snapshot" in message:
+            baseline = message.get("baseline")
+            out += _SNAPSHOT.pack(MSG_SNAPSHOT, message["snapshot"], NO_BASELINE if baseline is None else baseline)
+            self._encode_value(message.get("entities", {}), out, defines)
+            self._encode_value(list(message.get("removed", ())), out, defines)
+        elif "snapshot_ack" in message:
+            out += _SNAPSHOT_ACK.pack(MSG_SNAPSHOT_ACK, message["snapshot_ack"])
+        elif "interest" in message:
+            out.append(MSG_INTEREST)
+            self._encode_value(message["interest"], out, defines)
+        elif "action" in message:
+            out.append(MSG_INPUT)
+            out += ref(message["action"], defines)
+            out += ref(message.get("category", "local"), defines)
+            out.append(1 if message.get("pressed") else 0)
+        else:
+            raise WireProtocolError(f"Unknown message: {message!r}")
+
+    def _ref(self, string, defines):
+        """The packed id of string, queueing its DEFINE until the peer confirms it."""
+        entry = self.local_ids.get(string)
+        if entry is None:
+            string_id = len(self.local_strings)
+            if string_id >= MAX_STRINGS:
+                raise WireProtocolError("String table is full")
+            entry = self.local_ids[string] = (string_id, _pack_id(string_id))
+            self.local_strings.append(string)
+        string_id, packed = entry
+        if string_id not in self.confirmed and string_id not in defines:
+            data = string.encode("utf-8")[:255]
+            defines[string_id] = bytes((MSG_DEFINE,)) + packed + bytes((len(data),)) + data
+        return packed
+
+    def _encode_value(self, value, out, defines):
+        value_type = type(value)
+        if value is None:
+            out.append(T_NONE)
+        elif value_type is bool:
+            out.append(T_TRUE if value else T_FALSE)
+        elif value_type is int:
+            if -128 <= value < 128:
+                out += _INT8.pack(T_INT8, value)
+            elif -0x80000000 <= value < 0x80000000:
+                out += _INT32.pack(T_INT32, value)
+            else:
+                out += _INT64.pack(T_INT64, value)
+        elif value_type is float:
+            if -FLOAT32_RANGE < value < FLOAT32_RANGE:
+                out += _FLOAT32.pack(T_FLOAT32, value)
+            else:
+                out += _FLOAT64.pack(T_FLOAT64, value)
+        elif value_type is str:
+            if len(value) <= MAX_TABLE_STRING:
+                out.append(T_STRING_REF)
+                out += self._ref(value, defines)
+            else:
+                data = value.encode("utf-8")
+                out += _SIZED.pack(T_STRING, len(data))
+                out += data
+        elif value_type is tuple or value_type is list:
+            vector = _VECTORS.get(len(value))
+            if vector is not None and all(type(item) is float for item in value):
+                out += vector.pack(_VECTOR_TAGS[len(value)], *value)
+            else:
+                out += _SIZED.pack(T_LIST, len(value))
+                for item in value:
+                    self._encode_value(item, out, defines)
+        elif value_type is dict:
+            out += _SIZED.pack(T_DICT, len(value))
+            for key, item in value.items():
+                out += self._ref(str(key), defines)
+                self._encode_value(item, out, defines)
+        elif value_type is bytes or value_type is bytearray:
+            out += _SIZED.pack(T_BYTES, len(value))
+            out += value
+        else:
+            # Panda vectors and anything else iterable, like sync_delta.snapshot_value
+            try:
+                self._encode_value(tuple(value), out, defines)
+            except TypeError:
+                self._encode_value(str(value), out, defines)
+
+    # ------------------------------------------------------------------
+    # Decoding
+    # ------------------------------------------------------------------
+
+    def decode(self, data):
+        """List of message dicts in a datagram (binary or legacy JSON)."""
+        if data[:2] != MAGIC:
+            try:
+                message = json.loads(data)
+            except ValueError as e:
+                raise WireProtocolError(f"Not a packet: {e}") from e
+            return [message] if isinstance(message, dict) else list(message)
+        if len(data) < _HEADER.size:
+            raise WireProtocolError("Truncated header")
+        _, version, count = _HEADER.unpack_from(data, 0)
+        if version != VERSION:
+            raise WireProtocolError(f"Unsupported protocol version {version}")
+        try:
+            return self._decode_messages(data, _HEADER.size, count)
+        except (struct.error, IndexError, KeyError, UnicodeDecodeError) as e:
+            raise WireProtocolError(f"Malformed packet: {e!r}") from e
+
+    def _decode_messages(self, data, offset, count):
+        messages = []
+        strings = self.remote_strings
+        for _ in range(count):
+            kind = data[offset]
+            offset += 1
+            if kind == MSG_VAR_DELTA:
+                entity_id, offset = _read_id(data, offset)
+                sync_id, offset = _read_id(data, offset)
+                change_count = data[offset]
+                offset += 1
+                changes = {}
+                for _ in range(change_count):
+                    var_id, offset = _read_id(data, offset)
+                    changes[strings[var_id]], offset = self._decode_value(data, offset)
+                messages.append({"entity": strings[entity_id], "delta": changes, "sync_type": strings[sync_id]})
+            elif kind == MSG_DEFINE:
+                string_id, offset = _read_id(data, offset)
+                length = data[offset]
+                _check_size(data, offset + 1, length)
+                # Ack every DEFINE, not only new ones: the peer repeats it until an ack arrives
+                if string_id not in self.pending_acks:
+                    self.pending_acks.append(string_id)
+                strings[string_id] = bytes(data[offset + 1:offset + 1 + length]).decode("utf-8")
+                offset += 1 + length
+            elif kind == MSG_INPUT:
+                action_id, offset = _read_id(data, offset)
+                category_id, offset = _read_id(data, offset)
+                messages.append({"action": strings[action_id], "category": strings[category_id],
+                                 "pressed": bool(data[offset])})
+                offset += 1
+            elif kind == MSG_SNAPSHOT:
+                _, tick, baseline = _SNAPSHOT.unpack_from(data, offset - 1)
+                entities, offset = self._decode_value(data, offset - 1 + _SNAPSHOT.size)
+                removed, offset = self._decode_value(data, offset)
+                messages.append({"snapshot": tick, "baseline": None if baseline == NO_BASELINE else baseline,
+                                 "entities": entities, "removed": removed})
+            elif kind == MSG_SNAPSHOT_ACK:
+                messages.append({"snapshot_ack": _SNAPSHOT_ACK.unpack_from(data, offset - 1)[1]})
+                offset += _SNAPSHOT_ACK.size - 1
+            elif kind == MSG_INTEREST:
+                interest, offset = self._decode_value(data, offset)
+                messages.append({"interest": interest})
+            elif kind == MSG_STRING_ACK:
+                ack_count = data[offset]
+                offset += 1
+                for _ in range(ack_count):
+                    string_id, offset = _read_id(data, offset)
+                    self.confirmed.add(string_id)
+            else:
+                raise WireProtocolError(f"Unknown message type {kind}")
+        if offset != len(data):
+            raise WireProtocolError(f"{len(data) - offset} trailing bytes after {count} messages")
+        return messages
+
+    def _decode_value(self, data, offset):
+        tag = data[offset]
+        if tag == T_FLOAT32:
+            return _FLOAT32.unpack_from(data, offset)[1], offset + _FLOAT32.size
+        vector = _TAG_VECTORS.get(tag)
+        if vector is not None:
+            return vector.unpack_from(data, offset)[1:], offset + vector.size
+        if tag == T_STRING_REF:
+            string_id, offset = _read_id(data, offset + 1)
+            return self.remote_strings[string_id], offset
+        if tag == T_NONE:
+            return None, offset + 1
+        if tag == T_FALSE:
+            return False, offset + 1
+        if tag == T_TRUE:
+            return True, offset + 1
+        if tag == T_INT8:
+            return _INT8.unpack_from(data, offset)[1], offset + _INT8.size
+        if tag == T_INT32:
+            return _INT32.unpack_from(data, offset)[1], offset + _INT32.size
+        if tag == T_INT64:
+            return _INT64.unpack_from(data, offset)[1], offset + _INT64.size
+        if tag == T_FLOAT64:
+            return _FLOAT64.unpack_from(data, offset)[1], offset + _FLOAT64.size
+        _, size = _SIZED.unpack_from(data, offset)
+        offset += _SIZED.size
+        if tag == T_STRING or tag == T_BYTES:
+            _check_size(data, offset, size)
+        if tag == T_STRING:
+            return bytes(data[offset:offset + size]).decode("utf-8"), offset + size
+        if tag == T_BYTES:
+            return bytes(data[offset:offset + size]), offset + size
+        if tag == T_LIST:
+            items = []
+            for _ in range(size):
+                item, offset = self._decode_value(data, offset)
+                items.append(item)
+            return items, offset
+        if tag == T_DICT:
+            items = {}
+            for _ in range(size):
+                key_id, offset = _read_id(data, offset)
+                items[self.remote_strings[key_id]], offset = self._decode_value(data, offset)
+            return items, offset
+        raise WireProtocolError(f"Unknown value tag {tag}")
+
+
+def _check_size(data, offset, size):
+    if offset + size > len(data):
+        raise WireProtocolError("Truncated value")
+
+
+def fragment(packet, mtu, group):
+    """Splits a packet larger than mtu into FRAGMENT datagrams of group."""
+    chunk = mtu - _FRAGMENT.size
+    total = -(-len(packet) // chunk)
+    if total > 255:
+        raise WireProtocolError(f"Packet of {len(packet)} bytes needs too many fragments")
+    return [
+        _FRAGMENT.pack(FRAGMENT_MAGIC, VERSION, group & 0xFFFF, index, total) + packet[index * chunk:(index + 1) * chunk]
+        for index in range(total)
+    ]
+
+
+class Reassembler:
+    """
+    Rebuilds packets split by fragment(). Incomplete groups are dropped after
+    timeout seconds (a fragment was lost; the data is superseded by then).
+    """
+
+    def __init__(self, timeout=2.0):
+        self.timeout = timeout
+        self.groups = {}  # (address, group) -> (first seen, total, {index: chunk})
+
+    def feed(self, data, address=None):
+        """The complete packet for data, or None while fragments are missing."""
+        if data[:2] != FRAGMENT_MAGIC:
+            return data
+        if len(data) < _FRAGMENT.size:
+            raise WireProtocolError("Truncated fragment")
+        _, version, group, index, total = _FRAGMENT.unpack_from(data, 0)
+        if version != VERSION or index >= total:
+            raise WireProtocolError("Bad fragment header")
+        now = time.monotonic()
+        if len(self.groups) > 16:
+            self.groups = {key: entry for key, entry in self.groups.items() if now - entry[0] < self.timeout}
+        key = (address, group)
+        entry = self.groups.get(key)
+        if entry is None or entry[1] != total or now - entry[0] >= self.timeout:
+            entry = self.groups[key] = (now, total, {})
+        entry[2][index] = bytes(data[_FRAGMENT.size:])
+        if len(entry[2]) < total:
+            return None
+        del self.groups[key]
+        return b"".join(entry[2][i] for i in range(total))
+
+
+def _benchmark(entities=8, rounds=5000):
+    import timeit
+
+    udp_overhead = 28  # IPv4 + UDP headers per datagram
+    deltas = [
+        {"entity": f"Enemy_{i:02d}", "delta": {"position": (12.5 + i, -3.25, 0.0), "health": 87.5, "state": "chasing"},
+         "sync_type": "udp"}
+        for i in range(entities)
+    ]
+    # What MonoBehavior sent before deltas: one message per variable per frame
+    per_variable = [
+        {"entity": delta["entity"], "variable": name, "value": value, "sync_type": "udp"}
+        for delta in deltas for name, value in delta["delta"].items()
+    ]
+
+    sender, receiver = Session(), Session()
+    receiver.decode(sender.encode(deltas))  # Warm up the string tables
+    sender.decode(receiver.encode([]))  # Deliver the acks
+    packet = sender.encode(deltas)
+
+    def json_encode(messages):
+        return [json.dumps(message).encode() for message in messages]
+
+    def report(label, messages, encode, decode, datagrams, payload):
+        encode_time = timeit.timeit(encode, number=rounds) / rounds
+        decode_time = timeit.timeit(decode, number=rounds) / rounds
+        wire = payload + datagrams * udp_overhead
+        print(f"{label:<22}{payload:6d} B payload {wire:6d} B on the wire in {datagrams:2d} datagrams, "
+              f"encode {encode_time * 1e6:7.1f}us, decode {decode_time * 1e6:7.1f}us")
+        return wire, encode_time
+
+    print(f"One tick of {entities} entities (position, health, state)")
+    legacy_packets = json_encode(per_variable)
+    legacy = report("JSON per variable", per_variable, lambda: json_encode(per_variable),
+                    lambda: [json.loads(p) for p in legacy_packets], len(legacy_packets),
+                    sum(map(len, legacy_packets)))
+    delta_packets = json_encode(deltas)
+    report("JSON per entity delta", deltas, lambda: json_encode(deltas),
+           lambda: [json.loads(p) for p in delta_packets], len(delta_packets), sum(map(len, delta_packets)))
+    binary = report("Binary", deltas, lambda: sender.encode(deltas), lambda: receiver.decode(packet), 1, len(packet))
+    print(f"Binary vs JSON per variable: {legacy[0] / binary[0]:.1f}x fewer bytes on the wire, "
+          f"{legacy[1] / binary[1]:.1f}x less encode time")
+
+
+if __name__ == "__main__":
+    _benchmark()